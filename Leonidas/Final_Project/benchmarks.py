@@ -0,0 +1,298 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import timeit
+from files import instrumentation
+from files.bbs_random import BBSRandom
+from files.bootstrap import Bootstrap
+from files.crypto_utils import FixedBaseTable, ModContext, mod_pow
+from files.elgamal_cipher import ElGamal
+from files.rsa_cipher import RSA
+
+
+BIT_SIZES = [16, 32, 64, 256, 1024, 2048]
+REPEAT = 5
+SEED = 789
+
+# Seconds spent per suite measurement (quick mode divides by 10)
+MIN_TIME = 0.5
+REGRESSION_THRESHOLD = 0.10
+
+PRIME_RANGES = [(1000, 10000), (10 ** 5, 10 ** 6), (2 ** 31, 2 ** 32), (2 ** 63, 2 ** 64)]
+PRIME_BITS = [64, 128, 256]
+# find_generator trial-divides p - 1, so ElGamal keygen stays below ~2^40
+ELGAMAL_RANGES = [(1000, 10000), (10 ** 5, 10 ** 6), (2 ** 31, 2 ** 32)]
+RSA_ATTACK_RANGES = [(1000, 10000), (10 ** 4, 10 ** 5), (10 ** 5, 10 ** 6)]
+ELGAMAL_ATTACK_RANGES = [(1000, 10000), (10 ** 5, 10 ** 6), (10 ** 7, 10 ** 8)]
+
+# Test vectors from the README: (n, e, ciphertext, plaintext)
+README_RSA = [
+    (12697493, 5664221, 4803848, 777),
+    (18865541, 65537, 4240429, 1337),
+    (25931089, 16691407, 7510948, 1234),
+    (73846469, 65537, 31624613, 9878),
+]
+# (p, g, public key, (c1, c2), plaintext)
+README_ELGAMAL = [
+    (8807, 1820, 720, (5651, 7668), 777),
+    (787, 2, 255, (582, 689), 42),
+    (5639, 2158, 3580, (1768, 5343), 300),
+    (9871, 3, 3124, (1728, 8946), 617),
+    (9871, 3, 3124, (734, 3600), 321),
+    (787, 2, 255, (718, 169), 420),
+]
+
+
+def time_call(func, number):
+    """
+    Best-of-REPEAT time per call in microseconds.
+    """
+    best = min(timeit.repeat(func, number=number, repeat=REPEAT))
+    return best / number * 1e6
+
+
+def bench_mod_pow(bit_sizes=BIT_SIZES):
+    """
+    Compares mod_pow, the builtin pow and both ModContext backends on the
+    same random odd modulus / base / full size exponent per bit size.
+    """
+    rng = random.Random(SEED)
+    rows = []
+
+    for bits in bit_sizes:
+        modulus = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+        base = rng.randrange(2, modulus)
+        exp = rng.randrange(modulus // 2, modulus)
+        number = max(1, 20000 // bits)
+
+        builtin_ctx = ModContext(modulus)
+        montgomery_ctx = ModContext(modulus, backend="montgomery")
+
+        rows.append({
+            "bits": bits,
+            "mod_pow": time_call(lambda: mod_pow(base, exp, modulus), number),
+            "pow": time_call(lambda: pow(base, exp, modulus), number),
+            "ctx_builtin": time_call(lambda: builtin_ctx.pow(base, exp), number),
+            "ctx_montgomery": time_call(lambda: montgomery_ctx.pow(base, exp), number),
+        })
+
+    return rows
+
+
+def bench_fixed_base(bit_sizes=BIT_SIZES):
+    """
+    Compares a FixedBaseTable lookup against pow for ElGamal style
+    exponentiations (fixed base, random exponent below the modulus).
+    """
+    rng = random.Random(SEED)
+    rows = []
+
+    for bits in bit_sizes:
+        modulus = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+        base = rng.randrange(2, modulus)
+        exp = rng.randrange(modulus // 2, modulus)
+        number = max(1, 20000 // bits)
+
+        table = FixedBaseTable(base, modulus, modulus.bit_length())
+        rows.append({
+            "bits": bits,
+            "pow": time_call(lambda: pow(base, exp, modulus), number),
+            "fixed_base": time_call(lambda: table.pow(exp), number),
+            "table_build": time_call(
+                lambda: FixedBaseTable(base, modulus, modulus.bit_length()), 1),
+        })
+
+    return rows
+
+
+def print_table(rows):
+    columns = list(rows[0].keys())
+    sys.stdout.write("".join(f"{name:>16}" for name in columns) + "\n")
+    for row in rows:
+        cells = [f"{row['bits']:>16}"]
+        cells += [f"{row[name]:>14.2f}us" for name in columns[1:]]
+        sys.stdout.write("".join(cells) + "\n")
+
+
+def measure(func, min_time=MIN_TIME):
+    """
+    Calls func until min_time has passed and returns seconds per call.
+    One untimed warm-up call fills caches and lazy imports first.
+    """
+    func()
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time or calls == 0:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+    return elapsed / calls
+
+
+def range_label(low, high):
+    return f"{low}-{high}"
+
+
+def rsa_key(low, high):
+    cipher = RSA(n=1, e=1, d=1)
+    cipher.generate_keys(low, high, bootstrap=Bootstrap(SEED))
+    return cipher
+
+
+def elgamal_key(low, high):
+    cipher = ElGamal(p=1)
+    cipher.generate_keys(low, high, bootstrap=Bootstrap(SEED))
+    return cipher
+
+
+def check(name, result, expected):
+    if result != expected:
+        raise RuntimeError(f"{name}: got {result}, expected {expected}")
+
+
+def run_suite(quick=False):
+    """
+    Runs every benchmark with seeded key material and returns
+    {name: seconds per operation}.
+    """
+    min_time = MIN_TIME / 10 if quick else MIN_TIME
+    ranges = PRIME_RANGES[:2] if quick else PRIME_RANGES
+    results = {}
+
+    def record(name, func):
+        results[name] = measure(func, min_time)
+        sys.stderr.write(f"{name:<48} {results[name] * 1e6:>14.2f}us\n")
+
+    for low, high in ranges:
+        record(f"prime_in_range[{range_label(low, high)}]",
+               lambda: Bootstrap(SEED).generate_prime_in_range(low, high))
+    for bits in PRIME_BITS[:1] if quick else PRIME_BITS:
+        record(f"prime_3_mod_4[{bits}]",
+               lambda: Bootstrap(SEED).generate_prime_congruent_3_mod_4(bits))
+
+    for low, high in ranges:
+        label = range_label(low, high)
+        record(f"rsa_keygen[{label}]", lambda: rsa_key(low, high))
+        cipher = rsa_key(low, high)
+        messages = [random.Random(SEED + i).randrange(1, cipher.n) for i in range(256)]
+        ciphertexts = [cipher.encrypt(m) for m in messages]
+        record(f"rsa_encrypt[{label}]", lambda: cipher.encrypt(messages[0]))
+        record(f"rsa_decrypt[{label}]", lambda: cipher.decrypt(ciphertexts[0]))
+        record(f"rsa_encrypt_batch256[{label}]", lambda: cipher.encrypt_batch(messages))
+
+    for low, high in ELGAMAL_RANGES[:2] if quick else ELGAMAL_RANGES:
+        label = range_label(low, high)
+        record(f"elgamal_keygen[{label}]", lambda: elgamal_key(low, high))
+        cipher = elgamal_key(low, high)
+        pair = cipher.encrypt(42)
+        pairs = [cipher.encrypt(m) for m in range(1, 257)]
+        record(f"elgamal_encrypt[{label}]", lambda: cipher.encrypt(42))
+        record(f"elgamal_decrypt[{label}]", lambda: cipher.decrypt(pair))
+        record(f"elgamal_decrypt_batch256[{label}]", lambda: cipher.decrypt_batch(pairs))
+
+    bbs = BBSRandom(min_value=10 ** 5, max_value=10 ** 6, bootstrap=Bootstrap(SEED))
+    record("bbs_rand[bit]", lambda: bbs.rand())
+
+    attacker = RSA(n=1, e=1, d=1)
+    for n, e, cipher_text, clear_text in README_RSA:
+        name = f"rsa_attack_readme[{n}]"
+        check(name, attacker.attack_from_components(cipher_text, n, e, bootstrap=Bootstrap(SEED)), clear_text)
+        record(name, lambda: attacker.attack_from_components(cipher_text, n, e, bootstrap=Bootstrap(SEED)))
+    for low, high in RSA_ATTACK_RANGES[:2] if quick else RSA_ATTACK_RANGES:
+        target = rsa_key(low, high)
+        record(f"rsa_attack[{range_label(low, high)}]",
+               lambda: attacker.attack_from_components(target.encrypt(7), target.n, target.e,
+                                                       bootstrap=Bootstrap(SEED)))
+
+    for p, g, public_key, (c1, c2), clear_text in README_ELGAMAL:
+        name = f"elgamal_attack_readme[{p},{c1}]"
+        target = ElGamal(p=p, g=g, public_key=public_key)
+        check(name, target.attack_from_values(c1, c2), clear_text)
+        record(name, lambda: target.attack_from_values(c1, c2))
+    for low, high in ELGAMAL_ATTACK_RANGES[:2] if quick else ELGAMAL_ATTACK_RANGES:
+        target = elgamal_key(low, high)
+        c1, c2 = target.encrypt(7)
+        record(f"elgamal_attack[{range_label(low, high)}]",
+               lambda: target.attack_from_values(c1, c2))
+
+    return results
+
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """
+    Prints old / new time per benchmark and returns the names that got
+    slower by more than threshold (0.10 = 10 %).
+    """
+    regressions = []
+    sys.stdout.write(f"{'benchmark':<48}{'old':>14}{'new':>14}{'change':>10}\n")
+    for name in sorted(set(baseline) & set(current)):
+        old, new = baseline[name], current[name]
+        change = new / old - 1 if old else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        sys.stdout.write(f"{name:<48}{old * 1e6:>12.2f}us{new * 1e6:>12.2f}us{change:>+9.1%}{flag}\n")
+    for name in sorted(set(baseline) ^ set(current)):
+        sys.stdout.write(f"{name:<48}  only in {'baseline' if name in baseline else 'current'}\n")
+    return regressions
+
+
+def load_results(file_path):
+    with open(file_path, "r", encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for keygen, cipher operations and attacks.")
+    commands = parser.add_subparsers(dest="command")
+
+    run = commands.add_parser("run", help="Run the suite and write JSON results")
+    run.add_argument("--output", "-o", default="-", help="Result file ('-' for stdout)")
+    run.add_argument("--quick", action="store_true", help="Smaller sizes, shorter measurements")
+
+    cmp = commands.add_parser("compare", help="Compare two result files")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+
+    commands.add_parser("micro", help="Modular exponentiation tables (default)")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        with instrumentation.quiet():
+            results = run_suite(quick=args.quick)
+        report = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "seed": SEED,
+                "quick": args.quick,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "results": results,
+        }
+        text = json.dumps(report, indent=2, sort_keys=True) + "\n"
+        if args.output == "-":
+            sys.stdout.write(text)
+        else:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(text)
+        return 0
+
+    if args.command == "compare":
+        regressions = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+        return 1 if regressions else 0
+
+    print_table(bench_mod_pow())
+    sys.stdout.write("\n")
+    print_table(bench_fixed_base())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+import argparse
+import json
+import sys
+from contextlib import nullcontext
+
+
+# Cipher modules are imported inside the handlers so that a single
+# encrypt/decrypt does not pay for imports it never uses.
+
+JOB_CHUNK_SIZE = 1024
+JOB_BATCH_SIZE = 256
+# Below this many values the batch path (and its NumPy import) is not worth it
+BATCH_THRESHOLD = 64
+
+
+def emit(record):
+    sys.stdout.write(json.dumps(record) + "\n")
+
+
+def read_ints(file_path):
+    from files.keyring import read_int_lines
+    return read_int_lines(file_path)
+
+
+def parse_pair(text):
+    """
+    Parses an ElGamal ciphertext given as "c1,c2".
+    """
+    parts = str(text).split(",")
+    if len(parts) != 2:
+        raise ValueError(f"ElGamal ciphertext must be c1,c2: {text}")
+    return int(parts[0]), int(parts[1])
+
+
+def rsa_from_args(args, need_private):
+    from files.rsa_cipher import RSA
+
+    if args.key_file:
+        values = read_ints(args.key_file)
+        if len(values) < 2:
+            raise RuntimeError(f"ERROR: Invalid key file: {args.key_file}")
+        if need_private:
+            return RSA(n=values[0], d=values[1], primes=values[2:])
+        return RSA(n=values[0], e=values[1])
+
+    if args.n is None or (args.d if need_private else args.e) is None:
+        raise ValueError("RSA needs --key-file or --n with --e (public) / --d (private)")
+    return RSA(n=args.n, e=args.e, d=args.d)
+
+
+def elgamal_from_args(args, need_private):
+    from files.elgamal_cipher import ElGamal
+
+    p, g, public_key, private_key = args.p, args.g, args.public_key, args.private_key
+    if args.key_file:
+        values = read_ints(args.key_file)
+        if len(values) < 3:
+            raise RuntimeError(f"ERROR: Invalid key file: {args.key_file}")
+        p, g, public_key = values[:3]
+    if args.private_key_file:
+        values = read_ints(args.private_key_file)
+        if not values:
+            raise RuntimeError(f"ERROR: Invalid key file: {args.private_key_file}")
+        private_key = values[0]
+
+    if p is None or (need_private and private_key is None):
+        raise ValueError("ElGamal needs --key-file/--p, --g, --public-key and --private-key(-file) to decrypt")
+    return ElGamal(p=p, g=g, public_key=public_key, private_key=private_key)
+
+
+def cmd_generate(args):
+    if args.algorithm == "rsa":
+        from files.rsa_cipher import RSA
+        cipher = RSA(args.public_key_file or "rsa_key.pub", args.private_key_file or "rsa_key",
+                     min_prime=args.min_prime, max_prime=args.max_prime,
+                     load_from_files=False, num_primes=args.num_primes)
+        emit({"algorithm": "rsa", "n": cipher.n, "e": cipher.e, "d": cipher.d, "primes": cipher.primes})
+    else:
+        from files.elgamal_cipher import ElGamal
+        cipher = ElGamal(args.public_key_file or "elgamal_key.pub", args.private_key_file or "elgamal_key",
+                         min_random_number=args.min_prime, max_random_number=args.max_prime,
+                         load_from_files=False)
+        emit({"algorithm": "elgamal", "p": cipher.p, "g": cipher.g,
+              "public_key": cipher.public_key, "private_key": cipher.private_key})
+
+
+def cmd_encrypt(args):
+    if args.algorithm == "rsa":
+        cipher = rsa_from_args(args, need_private=False)
+        values = [int(v) for v in args.values]
+        if len(values) >= BATCH_THRESHOLD:
+            results = cipher.encrypt_batch(values)
+        else:
+            results = [cipher.encrypt(v) for v in values]
+        for value, result in zip(values, results):
+            emit({"value": value, "result": result})
+    else:
+        cipher = elgamal_from_args(args, need_private=False)
+        for value in args.values:
+            emit({"value": int(value), "result": list(cipher.encrypt(int(value)))})
+
+
+def cmd_decrypt(args):
+    if args.algorithm == "rsa":
+        cipher = rsa_from_args(args, need_private=True)
+        for value in args.values:
+            emit({"value": int(value), "result": cipher.decrypt(int(value))})
+    else:
+        cipher = elgamal_from_args(args, need_private=True)
+        pairs = [parse_pair(v) for v in args.values]
+        for pair, result in zip(pairs, cipher.decrypt_batch(pairs)):
+            emit({"value": list(pair), "result": result})
+
+
+def cmd_attack(args):
+    from files.crypto_service import run_batch
+
+    if args.algorithm == "rsa":
+        cipher = rsa_from_args(args, need_private=False)
+        components = (cipher.n, cipher.e, None)
+        values = [int(v) for v in args.values]
+    else:
+        cipher = elgamal_from_args(args, need_private=False)
+        components = (cipher.p, cipher.g, cipher.public_key, None)
+        values = [parse_pair(v) for v in args.values]
+
+    # run_batch recovers the private key once for all ciphertexts
+    for value, (ok, result) in zip(values, run_batch(args.algorithm, "attack", components, values)):
+        value = list(value) if isinstance(value, tuple) else value
+        emit({"value": value, "result": result} if ok else {"value": value, "error": result})
+
+
+def cmd_bench(args):
+    import benchmarks
+    benchmarks.print_table(benchmarks.bench_mod_pow())
+    sys.stdout.write("\n")
+    benchmarks.print_table(benchmarks.bench_fixed_base())
+
+
+def cmd_encrypt_file(args):
+    from files.hybrid import encrypt_file
+    if args.algorithm == "rsa":
+        cipher = rsa_from_args(args, need_private=False)
+    else:
+        cipher = elgamal_from_args(args, need_private=False)
+    size = encrypt_file(cipher, args.input, args.output, args.chunk_size)
+    emit({"input": args.input, "output": args.output, "bytes": size})
+
+
+def cmd_decrypt_file(args):
+    from files.hybrid import decrypt_file
+    if args.algorithm == "rsa":
+        cipher = rsa_from_args(args, need_private=True)
+    else:
+        cipher = elgamal_from_args(args, need_private=True)
+    size = decrypt_file(cipher, args.input, args.output)
+    emit({"input": args.input, "output": args.output, "bytes": size})
+
+
+def cmd_corpus(args):
+    from files.corpus import run_corpus
+    attacked = run_corpus(args.keys, args.ciphers, args.output, workers=args.workers,
+                          resume=not args.restart, time_limit=args.time_limit,
+                          memory_limit=args.memory_limit, checkpoint_dir=args.checkpoint_dir)
+    emit({"output": args.output, "attacked_keys": attacked})
+
+
+def read_job_chunks(file_path):
+    """
+    Yields lists of up to JOB_CHUNK_SIZE (line_number, job) from a
+    JSON-lines file ("-" for stdin).
+    """
+    stream = sys.stdin if file_path == "-" else open(file_path, "r", encoding="utf-8")
+    try:
+        chunk = []
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+            except ValueError as err:
+                job = err
+            chunk.append((line_number, job))
+            if len(chunk) >= JOB_CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def cmd_jobs(args):
+    """
+    Runs a JSON-lines job file. Each line is a request like the crypto
+    service takes: {"id", "algorithm", "op", "key", "value"}, or
+    {"id", "algorithm", "op": "generate", "min_prime", "max_prime",
+    "num_primes"} for a new key. Jobs for the same key and operation within
+    a chunk run as one batch; results are streamed in input order.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from files.crypto_service import parse_request, parse_generate, key_record, run_batch
+    from files.key_inventory import generate_key
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for chunk in read_job_chunks(args.job_file):
+            results = {}
+            groups = {}
+            generated = []
+            for line_number, job in chunk:
+                try:
+                    if not isinstance(job, dict):
+                        raise ValueError(f"Invalid job: {job}")
+                    if str(job.get("op", "")).lower() == "generate":
+                        args = parse_generate(job)
+                        generated.append((line_number, args[0], pool.submit(generate_key, *args)))
+                        continue
+                    batch_key, value = parse_request(job)
+                except Exception as err:
+                    results[line_number] = (False, str(err))
+                    continue
+                groups.setdefault(batch_key, []).append((line_number, value))
+
+            futures = []
+            for (algorithm, operation, components), group in groups.items():
+                # Large groups are split so every worker gets a share
+                for start in range(0, len(group), JOB_BATCH_SIZE):
+                    items = group[start:start + JOB_BATCH_SIZE]
+                    values = [value for _, value in items]
+                    futures.append((items, pool.submit(run_batch, algorithm, operation, components, values)))
+
+            for items, future in futures:
+                try:
+                    batch_results = future.result()
+                except Exception as err:
+                    batch_results = [(False, str(err))] * len(items)
+                for (line_number, _), result in zip(items, batch_results):
+                    results[line_number] = result
+
+            for line_number, algorithm, future in generated:
+                try:
+                    results[line_number] = (True, key_record(algorithm, future.result()))
+                except Exception as err:
+                    results[line_number] = (False, str(err))
+
+            for line_number, job in chunk:
+                ok, result = results[line_number]
+                record = {"id": job.get("id") if isinstance(job, dict) else None, "line": line_number}
+                record["result" if ok else "error"] = result
+                emit(record)
+            sys.stdout.flush()
+
+
+def add_key_arguments(parser, values=True):
+    parser.add_argument("--algorithm", "-a", choices=["rsa", "elgamal"], required=True)
+    parser.add_argument("--key-file", help="RSA: public (encrypt/attack) or private (decrypt) key file; "
+                                           "ElGamal: public key file")
+    parser.add_argument("--private-key-file", help="ElGamal private key file")
+    parser.add_argument("--n", type=int)
+    parser.add_argument("--e", type=int)
+    parser.add_argument("--d", type=int)
+    parser.add_argument("--p", type=int)
+    parser.add_argument("--g", type=int)
+    parser.add_argument("--public-key", type=int)
+    parser.add_argument("--private-key", type=int)
+    if values:
+        parser.add_argument("values", nargs="+", help="Integers (RSA / ElGamal plaintext) or c1,c2 pairs")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Non-interactive RSA / ElGamal command line.")
+    parser.add_argument("--quiet", "-q", action="store_true", help="Drop step messages on stderr")
+    parser.add_argument("--metrics", choices=["json", "prometheus"],
+                        help="Collect timings / operation counts and print them to stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="Generate and save a key pair")
+    generate.add_argument("--algorithm", "-a", choices=["rsa", "elgamal"], required=True)
+    generate.add_argument("--min-prime", type=int, default=1000)
+    generate.add_argument("--max-prime", type=int, default=10000)
+    generate.add_argument("--num-primes", type=int, default=2, help="RSA only (2-5)")
+    generate.add_argument("--public-key-file")
+    generate.add_argument("--private-key-file")
+    generate.set_defaults(handler=cmd_generate)
+
+    for name, handler in (("encrypt", cmd_encrypt), ("decrypt", cmd_decrypt), ("attack", cmd_attack)):
+        sub = commands.add_parser(name, help=f"{name.capitalize()} one or more values")
+        add_key_arguments(sub)
+        sub.set_defaults(handler=handler)
+
+    for name, handler in (("encrypt-file", cmd_encrypt_file), ("decrypt-file", cmd_decrypt_file)):
+        sub = commands.add_parser(name, help=f"Hybrid {name.split('-')[0]}ion of a file of any size")
+        add_key_arguments(sub, values=False)
+        sub.add_argument("--input", "-i", required=True)
+        sub.add_argument("--output", "-o", required=True)
+        if name == "encrypt-file":
+            sub.add_argument("--chunk-size", type=int, default=1 << 20)
+        sub.set_defaults(handler=handler)
+
+    bench = commands.add_parser("bench", help="Run the micro benchmarks")
+    bench.set_defaults(handler=cmd_bench)
+
+    jobs = commands.add_parser("jobs", help="Run a JSON-lines job file ('-' for stdin)")
+    jobs.add_argument("job_file")
+    jobs.add_argument("--workers", "-j", type=int, default=None)
+    jobs.set_defaults(handler=cmd_jobs)
+
+    corpus = commands.add_parser("corpus", help="Attack every public key found against the ciphertext files found")
+    corpus.add_argument("--keys", nargs="+", required=True,
+                        help="Public key directories (*.pub) or glob patterns")
+    corpus.add_argument("--ciphers", nargs="+", required=True,
+                        help="Ciphertext directories (*cipher*) or glob patterns")
+    corpus.add_argument("--output", "-o", required=True, help="JSON-lines result file (appended to)")
+    corpus.add_argument("--workers", "-j", type=int, default=None)
+    corpus.add_argument("--restart", action="store_true", help="Ignore earlier results in the output file")
+    corpus.add_argument("--time-limit", type=float, help="Seconds per key before its attack is given up")
+    corpus.add_argument("--memory-limit", type=int, help="Bytes per attack (rules out large BSGS tables)")
+    corpus.add_argument("--checkpoint-dir", help="Save long attacks here and resume them on the next run")
+    corpus.set_defaults(handler=cmd_corpus)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    from files import instrumentation
+
+    if args.metrics:
+        context = instrumentation.collect(quiet=True if args.quiet else None)
+    elif args.quiet:
+        context = instrumentation.quiet()
+    else:
+        context = nullcontext()
+
+    try:
+        with context:
+            args.handler(args)
+    except Exception as err:
+        sys.stderr.write(f"ERROR: {err}\n")
+        return 1
+    finally:
+        if args.metrics == "json":
+            sys.stderr.write(instrumentation.metrics.to_json() + "\n")
+        elif args.metrics == "prometheus":
+            sys.stderr.write(instrumentation.metrics.to_prometheus())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+// Parity driver for the C++ implementation (Alexan/final_project), built
+// by parity.py together with its sources (all but main.cpp).
+//
+// stdin:  "<op> <count> <key values...>" followed by count argument lines
+// stdout: "= <result values...> <nanoseconds>" per argument line, then
+//         "=end <batch number>" (counted from 0) after each batch
+//
+// Keys are RSA "n e d" / ElGamal "p g y x" and are written as key files
+// into the work directory given as argv[1], where the classes load them.
+
+#include "ElGamal.h"
+#include "RSA.h"
+#include <chrono>
+#include <fstream>
+#include <gmpxx.h>
+#include <iostream>
+#include <memory>
+#include <sstream>
+#include <string>
+#include <vector>
+
+using namespace std;
+
+static void writeValues(const string& path, const vector<mpz_class>& values)
+{
+    ofstream out(path);
+    for (const mpz_class& value : values) {
+        out << value << '\n';
+    }
+}
+
+static vector<mpz_class> readValues(istringstream& in)
+{
+    vector<mpz_class> values;
+    string word;
+    while (in >> word) {
+        values.emplace_back(word);
+    }
+    return values;
+}
+
+int main(int argc, char* argv[])
+{
+    if (argc < 2) {
+        cerr << "usage: parity_driver <work dir>\n";
+        return 1;
+    }
+    const string dir = argv[1];
+    const string pubFile = dir + "/key.pub";
+    const string privFile = dir + "/key";
+    const string cipherFile = dir + "/cipher.txt";
+
+    string header;
+    size_t batch = 0;
+    while (getline(cin, header)) {
+        istringstream hs(header);
+        string op;
+        size_t count = 0;
+        hs >> op >> count;
+        const vector<mpz_class> key = readValues(hs);
+        const bool isRsa = op.rfind("rsa_", 0) == 0;
+
+        unique_ptr<RSA> rsa;
+        unique_ptr<ElGamal> elgamal;
+        if (isRsa) {
+            writeValues(pubFile, { key[0], key[1] });
+            writeValues(privFile, { key[0], key[2] });
+            rsa = make_unique<RSA>(pubFile, privFile);
+        } else {
+            writeValues(pubFile, { key[0], key[1], key[2] });
+            writeValues(privFile, { key[3] });
+            elgamal = make_unique<ElGamal>(pubFile, privFile);
+        }
+
+        for (size_t i = 0; i < count; i++) {
+            string line;
+            getline(cin, line);
+            istringstream ls(line);
+            const vector<mpz_class> args = readValues(ls);
+            if (op == "rsa_attack") {
+                writeValues(cipherFile, { args[0] });
+            } else if (op == "elgamal_attack") {
+                writeValues(cipherFile, { args[0], args[1] });
+            }
+
+            vector<mpz_class> result;
+            const auto start = chrono::steady_clock::now();
+            if (op == "rsa_encrypt") {
+                result.push_back(rsa->encrypt(args[0]));
+            } else if (op == "rsa_decrypt") {
+                result.push_back(rsa->decrypt(args[0]));
+            } else if (op == "rsa_attack") {
+                result.push_back(rsa->attack(cipherFile, pubFile));
+            } else if (op == "elgamal_encrypt") {
+                const pair<mpz_class, mpz_class> cipher = elgamal->encrypt(args[0], key[2]);
+                result.push_back(cipher.first);
+                result.push_back(cipher.second);
+            } else if (op == "elgamal_decrypt") {
+                result.push_back(elgamal->decrypt(make_pair(args[0], args[1])));
+            } else if (op == "elgamal_attack") {
+                result.push_back(elgamal->attack(cipherFile));
+            } else {
+                cerr << "Unknown operation: " << op << '\n';
+                return 1;
+            }
+            const auto ns = chrono::duration_cast<chrono::nanoseconds>(
+                chrono::steady_clock::now() - start).count();
+
+            cout << '=';
+            for (const mpz_class& value : result) {
+                cout << ' ' << value;
+            }
+            cout << ' ' << ns << '\n';
+        }
+        cout << "=end " << batch++ << '\n';
+        cout.flush();
+    }
+    return 0;
+}
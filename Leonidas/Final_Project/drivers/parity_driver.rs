@@ -0,0 +1,64 @@
+// Parity driver for the Rust implementation (Ryan/project). parity.py
+// builds it in a scratch crate and prepends the `#[path = ...] mod rsa;`
+// and `mod elgamal;` declarations that point at the project's sources.
+//
+// stdin:  "<op> <count> <key values...>" followed by count argument lines
+// stdout: "= <result values...> <nanoseconds>" per argument line, then
+//         "=end <batch number>" (counted from 0) after each batch
+//
+// Keys are RSA "n e d" / ElGamal "p g y x". Other stdout lines (the
+// project prints progress) are ignored by the harness.
+
+use rand::Rng;
+use std::io::{self, BufRead, Write};
+use std::time::Instant;
+
+fn parse_values(words: &[&str]) -> Vec<i128> {
+    words.iter().map(|w| w.parse::<i128>().expect("integer expected")).collect()
+}
+
+fn main() {
+    let stdin = io::stdin();
+    let mut lines = stdin.lock().lines();
+    let mut batch = 0;
+
+    while let Some(Ok(header)) = lines.next() {
+        let words: Vec<&str> = header.split_whitespace().collect();
+        if words.len() < 2 {
+            continue;
+        }
+        let op = words[0];
+        let count: usize = words[1].parse().expect("count expected");
+        let key = parse_values(&words[2..]);
+
+        for _ in 0..count {
+            let line = lines.next().expect("argument line expected").expect("read failed");
+            let args = parse_values(&line.split_whitespace().collect::<Vec<&str>>());
+
+            let start = Instant::now();
+            let result: Vec<i128> = match op {
+                "rsa_encrypt" => vec![rsa::encrypt(args[0], key[1], key[0])],
+                "rsa_decrypt" => vec![rsa::decrypt(args[0], key[0], key[2])],
+                "rsa_attack" => vec![rsa::intercept(args[0], key[0], key[1])],
+                "elgamal_encrypt" => {
+                    let k = rand::rng().random_range(2..key[0] - 1);
+                    vec![
+                        elgamal::elgamal_gen_public_key(key[0], key[1], k),
+                        elgamal::encrypt(args[0], key[2], k, key[0]),
+                    ]
+                }
+                "elgamal_decrypt" => vec![elgamal::decrypt(args[1], args[0], key[3], key[0])],
+                "elgamal_attack" => vec![elgamal::intercept(args[1], key[1], args[0], key[2], key[0])],
+                _ => panic!("Unknown operation: {}", op),
+            };
+            let ns = start.elapsed().as_nanos();
+
+            let values: Vec<String> = result.iter().map(|v| v.to_string()).collect();
+            let mut out = io::stdout().lock();
+            writeln!(out, "= {} {}", values.join(" "), ns).expect("write failed");
+        }
+        writeln!(io::stdout().lock(), "=end {}", batch).expect("write failed");
+        batch += 1;
+        io::stdout().flush().expect("flush failed");
+    }
+}
@@ -0,0 +1,350 @@
+# crypto_project/attack_planner.py
+
+import math
+import os
+import threading
+import time
+from .bootstrap import Bootstrap, ROUNDS
+from .crypto_utils import mod_inverse, miller_rabin_test
+from .rsa_cipher import RSA
+from .elgamal_cipher import ElGamal
+from .bsgs_disk import disk_baby_step_giant_step, bucket_count, DEFAULT_MEMORY_LIMIT
+from .bsgs_parallel import parallel_baby_step_giant_step, PARALLEL_MOD_LIMIT, PARALLEL_MIN_STEPS
+from .index_calculus import (index_calculus_log, factor_base, factor_base_bound,
+                             values_per_relation, RELATION_EXTRA)
+
+
+# Cost model, measured with CPython 3.11 on one core. A Pollard rho step
+# (three squarings and a Euclidean gcd) grows with the size of n; a BSGS
+# step is one multiplication and one dict operation.
+RHO_SECONDS_PER_BIT = 0.07e-6
+RHO_MIN_STEP_SECONDS = 1e-6
+BSGS_STEP_SECONDS = 0.8e-6
+TRIAL_DIVISION_STEP_SECONDS = 0.15e-6
+# Disk BSGS: write one baby and one giant record, read and match them later
+DISK_BSGS_STEP_SECONDS = 1.3e-6
+# Dict slot, key and value of one baby step table entry (plus the key's digits)
+BSGS_ENTRY_BYTES = 125
+# Parallel BSGS: CPU time of one step summed over all workers. Baby steps
+# go through per-worker lists, staging memory and a shared hash table
+# (measured 2-3x a serial step)
+PARALLEL_STEP_SECONDS = 2.4e-6
+# Peak per entry: phase 1 holds a (value, j) tuple in a worker list
+# (~64 bytes plus ~60 for the two ints) next to its 16 byte staging
+# record; phase 2 the staging record plus hash slots (at most 4 per
+# entry) of 16 bytes
+PARALLEL_ENTRY_BYTES = 140
+PARALLEL_STARTUP_SECONDS = 0.2
+# Index calculus: one sieved value r + t * p, and the bytes of one
+# eliminated row entry per factor base prime
+INDEX_CALCULUS_VALUE_SECONDS = 0.5e-6
+INDEX_CALCULUS_ENTRY_BYTES = 64
+
+# p - 1 is trial divided up to this bound when estimating its smoothness
+TRIAL_DIVISION_LIMIT = 1 << 16
+# A plan is refused up front if its estimate exceeds the budget this often
+ESTIMATE_SLACK = 4.0
+
+
+class BudgetExceeded(RuntimeError):
+    pass
+
+
+class Budget:
+    """
+    Wall-clock / iteration limit for one attack with cooperative
+    cancellation. The attack loops call spend() every few iterations.
+    cancel_event may be any object with is_set() (e.g. a
+    multiprocessing.Event for cross-process cancellation).
+    """
+
+    def __init__(self, seconds=None, max_iterations=None, cancel_event=None):
+        self.seconds = seconds
+        self.max_iterations = max_iterations
+        self.cancel_event = cancel_event or threading.Event()
+        self.iterations = 0
+        self.started = time.monotonic()
+        self.deadline = None if seconds is None else self.started + seconds
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def remaining_seconds(self):
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def spend(self, iterations=1):
+        self.iterations += iterations
+        self.check()
+
+    def check(self):
+        if self.cancel_event.is_set():
+            raise BudgetExceeded("Attack cancelled")
+        if self.max_iterations is not None and self.iterations > self.max_iterations:
+            raise BudgetExceeded(f"Iteration budget of {self.max_iterations} exceeded")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise BudgetExceeded(f"Time budget of {self.seconds} s exceeded")
+
+
+class Estimate:
+    """
+    Expected cost of one attack strategy.
+    """
+
+    def __init__(self, strategy, iterations, seconds, memory_bytes, note=""):
+        self.strategy = strategy
+        self.iterations = int(iterations)
+        self.seconds = seconds
+        self.memory_bytes = int(memory_bytes)
+        self.note = note
+
+    def as_dict(self):
+        return {
+            "strategy": self.strategy,
+            "iterations": self.iterations,
+            "seconds": self.seconds,
+            "memory_bytes": self.memory_bytes,
+            "note": self.note,
+        }
+
+    def __repr__(self):
+        return (f"Estimate({self.strategy!r}, ~{self.seconds:.3g} s, "
+                f"{self.memory_bytes} bytes, {self.iterations} iterations)")
+
+
+def _is_prime(n):
+    return miller_rabin_test(n, ROUNDS, Bootstrap())
+
+
+def trial_division(n, limit=TRIAL_DIVISION_LIMIT):
+    """
+    Splits off prime factors below limit. Returns ({prime: exponent}, cofactor).
+    """
+    n = int(n)
+    factors = {}
+    for q in [2] + list(range(3, limit, 2)):
+        if q * q > n:
+            break
+        while n % q == 0:
+            factors[q] = factors.get(q, 0) + 1
+            n //= q
+    if 1 < n < limit * limit:
+        # No factor below limit, so the rest is prime
+        factors[n] = factors.get(n, 0) + 1
+        n = 1
+    return factors, n
+
+
+def factorize(n, budget=None, checkpoint=None):
+    """
+    Full factorization {prime: exponent}: trial division, then Pollard
+    rho on the composite cofactors.
+    """
+    factors, rest = trial_division(n)
+    stack = [rest] if rest > 1 else []
+    rho = RSA(n=1, e=1)
+    while stack:
+        m = stack.pop()
+        if _is_prime(m):
+            factors[m] = factors.get(m, 0) + 1
+            continue
+        d = rho.pollards_rho(m, budget, checkpoint)
+        stack.extend((d, m // d))
+    return factors
+
+
+def _rho_seconds(bits):
+    return max(RHO_MIN_STEP_SECONDS, RHO_SECONDS_PER_BIT * bits)
+
+
+def estimate_rsa(n):
+    """
+    Pollard rho finds a factor q after about sqrt(pi * q / 2) steps; for
+    balanced primes q ~ sqrt(n), so ~1.25 * n^(1/4).
+    """
+    n = int(n)
+    iterations = 1.25 * math.isqrt(math.isqrt(n)) + 1
+    return [Estimate("pollard_rho", iterations, iterations * _rho_seconds(n.bit_length()), 0,
+                     "two balanced primes assumed; smaller factors are found sooner")]
+
+
+def estimate_elgamal(p, memory_limit=None):
+    """
+    BSGS needs ~sqrt(p) steps and table entries; the parallel variant
+    splits costlier steps over the CPUs (p < 2^64 only, offered where
+    that is faster), the disk variant keeps the table in bucket files
+    and runs in memory_limit (or its default).
+    Pohlig-Hellman solves one small BSGS per prime factor of p - 1, so it
+    costs ~sqrt(q) for the largest prime q dividing p - 1 (the smoothness
+    of p - 1). Index calculus needs about one relation per factor base
+    prime, and one in ~u^u sieved values is smooth, where u is the size
+    of the values over the size of the factor base bound.
+    """
+    p = int(p)
+    order = p - 1
+    m = math.isqrt(order) + 1
+    entry_bytes = BSGS_ENTRY_BYTES + p.bit_length() // 8
+    serial_seconds = 2 * m * BSGS_STEP_SECONDS
+    estimates = [Estimate("bsgs", 2 * m, serial_seconds, m * entry_bytes)]
+
+    # Offered only where the extra work per step pays off over serial BSGS
+    workers = os.cpu_count() or 1
+    parallel_seconds = PARALLEL_STARTUP_SECONDS + 2 * m * PARALLEL_STEP_SECONDS / workers
+    if (workers > 1 and p < PARALLEL_MOD_LIMIT and m >= PARALLEL_MIN_STEPS
+            and parallel_seconds < serial_seconds):
+        estimates.append(Estimate("bsgs_parallel", 2 * m, parallel_seconds,
+                                  m * PARALLEL_ENTRY_BYTES, f"{workers} workers"))
+
+    disk_memory = memory_limit or DEFAULT_MEMORY_LIMIT
+    try:
+        buckets = bucket_count(m, disk_memory)
+    except ValueError:
+        pass
+    else:
+        disk_bytes = 2 * (m + 1) * 2 * ((p.bit_length() + 7) // 8 if p.bit_length() > 64 else 8)
+        estimates.append(Estimate("bsgs_disk", 2 * m, 2 * m * DISK_BSGS_STEP_SECONDS, disk_memory,
+                                  f"{buckets} buckets, {disk_bytes} bytes on disk"))
+
+    # Both index calculus and Pohlig-Hellman factor p - 1 first: trial
+    # division, then rho steps that may split the cofactor
+    factors, cofactor = trial_division(order)
+    trial_steps = min(TRIAL_DIVISION_LIMIT // 2, math.isqrt(order))
+    factoring_seconds = trial_steps * TRIAL_DIVISION_STEP_SECONDS
+    if cofactor > 1:
+        factoring_seconds += 1.25 * math.isqrt(math.isqrt(cofactor)) * _rho_seconds(cofactor.bit_length())
+
+    bound = factor_base_bound(p)
+    size = len(factor_base(bound))
+    values = (size + RELATION_EXTRA) * values_per_relation(p, bound)
+    estimates.append(Estimate("index_calculus", int(values),
+                              factoring_seconds + values * INDEX_CALCULUS_VALUE_SECONDS,
+                              size * size * INDEX_CALCULUS_ENTRY_BYTES,
+                              f"{size} factor base primes up to {bound}"))
+
+    steps = sum(e * 2 * (math.isqrt(q) + 1) for q, e in factors.items())
+    table = max([math.isqrt(q) + 1 for q in factors] or [1])
+    seconds = factoring_seconds
+    if cofactor > 1:
+        # Unknown split of the cofactor: assume the worst case (it is prime)
+        steps += 2 * (math.isqrt(cofactor) + 1)
+        table = max(table, math.isqrt(cofactor) + 1)
+        note = f"p - 1 has an unfactored part of {cofactor.bit_length()} bits"
+    else:
+        note = f"largest prime factor of p - 1: {max(factors)}"
+    seconds += steps * BSGS_STEP_SECONDS
+    estimates.append(Estimate("pohlig_hellman", steps, seconds, table * entry_bytes, note))
+    return estimates
+
+
+def plan_attack(algorithm, components, memory_limit=None):
+    """
+    Estimates for every strategy that fits into memory_limit (bytes),
+    cheapest first.
+    """
+    if algorithm == "rsa":
+        estimates = estimate_rsa(components[0])
+    elif algorithm == "elgamal":
+        estimates = estimate_elgamal(components[0], memory_limit)
+    else:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+
+    if memory_limit is not None:
+        estimates = [e for e in estimates if e.memory_bytes <= memory_limit]
+    return sorted(estimates, key=lambda e: e.seconds)
+
+
+def pohlig_hellman_partial(g, y, p, factors, budget=None):
+    """
+    x mod the product of the given prime powers q^e dividing p - 1, from
+    one BSGS per digit in the subgroup of order q, combined with CRT.
+    Returns (x, modulus).
+    """
+    order = p - 1
+    solver = ElGamal(p=p, g=g, public_key=y)
+    x = 0
+    modulus = 1
+    for q, e in factors.items():
+        g_q = pow(g, order // q, p)
+        x_q = 0
+        for k in range(e):
+            h = pow(y * mod_inverse(pow(g, x_q, p), p) % p, order // q ** (k + 1), p)
+            x_q += solver.baby_step_giant_step(g_q, h, p, budget, order=q) % q * q ** k
+        q_e = q ** e
+        # CRT step: x ≡ x_q (mod q^e)
+        x += modulus * ((x_q - x) * mod_inverse(modulus, q_e) % q_e)
+        modulus *= q_e
+    return x, modulus
+
+
+def pohlig_hellman(g, y, p, factors, budget=None):
+    """
+    Discrete logarithm of y to base g modulo p from the factorization of
+    p - 1: one BSGS in each subgroup of prime order q, combined with CRT.
+    """
+    x, _ = pohlig_hellman_partial(g, y, p, factors, budget)
+    if pow(g, x, p) != y % p:
+        raise RuntimeError("Pohlig-Hellman failed (g is not a generator)")
+    return x
+
+
+def _run_strategy(strategy, algorithm, components, budget, checkpoint=None, memory_limit=None):
+    if algorithm == "rsa":
+        n, e = components[:2]
+        if _is_prime(n):
+            raise ValueError("ERROR: n is prime, nothing to factor")
+        factors = factorize(n, budget, checkpoint)
+        phi = 1
+        for q, k in factors.items():
+            phi *= q ** (k - 1) * (q - 1)
+        return mod_inverse(e, phi)
+
+    p, g, public_key = components[:3]
+    if strategy == "pohlig_hellman":
+        factors, cofactor = trial_division(p - 1)
+        if cofactor > 1:
+            for q, k in factorize(cofactor, budget, checkpoint).items():
+                factors[q] = factors.get(q, 0) + k
+        return pohlig_hellman(g, public_key, p, factors, budget)
+    if strategy == "index_calculus":
+        store_dir = checkpoint.directory if checkpoint is not None else None
+        return index_calculus_log(g, public_key, p, store_dir=store_dir, budget=budget)
+    if strategy == "bsgs_parallel":
+        return parallel_baby_step_giant_step(g, public_key, p, budget=budget)
+    if strategy == "bsgs_disk":
+        return disk_baby_step_giant_step(g, public_key, p, memory_limit or DEFAULT_MEMORY_LIMIT,
+                                         budget=budget)
+    solver = ElGamal(p=p, g=g, public_key=public_key)
+    return solver.baby_step_giant_step(g, public_key, p, budget, checkpoint=checkpoint)
+
+
+def run_attack(algorithm, components, budget=None, memory_limit=None, checkpoint=None):
+    """
+    Recovers the private key (RSA: d / ElGamal: x) from the public
+    components with the cheapest strategy that fits memory_limit.
+    A strategy failing for other reasons than the budget falls through to
+    the next one. With a Checkpoint, rho walks and BSGS searches resume
+    where an earlier run stopped. Returns (strategy, private key).
+    """
+    plans = plan_attack(algorithm, components, memory_limit)
+    if not plans:
+        raise BudgetExceeded("No strategy fits into the memory limit")
+
+    remaining = budget.remaining_seconds() if budget is not None else None
+    if remaining is not None and plans[0].seconds > ESTIMATE_SLACK * remaining:
+        raise BudgetExceeded(f"Estimated {plans[0].seconds:.3g} s for {plans[0].strategy}, "
+                             f"budget is {remaining:.3g} s")
+
+    error = None
+    for plan in plans:
+        try:
+            return plan.strategy, _run_strategy(plan.strategy, algorithm, components, budget,
+                                                checkpoint, memory_limit)
+        except BudgetExceeded:
+            raise
+        except RuntimeError as err:
+            error = err
+    raise error
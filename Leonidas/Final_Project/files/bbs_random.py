@@ -10,12 +10,13 @@ class BBSRandom:
     
     """
 
-    def __init__(self, bit_length=512, min_value=None, max_value=None):
+    def __init__(self, bit_length=512, min_value=None, max_value=None, bootstrap=None):
         self.n = None
         self.current_s = None
         self.bit_length = None
 
-        bootstrap = Bootstrap()
+        # A seeded Bootstrap gives a reproducible sequence
+        bootstrap = bootstrap or Bootstrap()
 
         if min_value is None or max_value is None:
             # Constructor with bit_length
@@ -1,21 +1,115 @@
 # crypto_project/bootstrap.py
 
 import random
+import threading
+from array import array
+from collections import OrderedDict
+from itertools import compress
+from math import isqrt
 from .crypto_utils import are_relatively_prime, miller_rabin_test
 
 
 INIT_NOT_PRIME = 15
 ROUNDS = 20
 
+# Ranges at most this wide with max below INDEX_MAX_VALUE are sieved once
+# into a PrimeIndex; wider ones keep rejection sampling
+INDEX_MAX_SPAN = 1 << 22
+INDEX_MAX_VALUE = 1 << 40
+INDEX_CACHE_SIZE = 32
+SIEVE_SEGMENT = 1 << 18
+
+
+def _sieve(low, high, base_primes):
+    """
+    Primes in [low, high) (2 <= low), crossing off multiples of base_primes,
+    which must hold every prime up to sqrt(high).
+    """
+    flags = bytearray(b"\x01") * (high - low)
+    for q in base_primes:
+        if q * q >= high:
+            break
+        start = max(q * q, -(-low // q) * q) - low
+        flags[start::q] = bytes(len(range(start, high - low, q)))
+    return compress(range(low, high), flags)
+
+
+def _base_primes(limit):
+    """
+    Primes up to limit (plain sieve of Eratosthenes).
+    """
+    flags = bytearray(b"\x01") * (limit + 1)
+    flags[:2] = bytes(min(2, limit + 1))
+    for q in range(2, isqrt(limit) + 1):
+        if flags[q]:
+            flags[q * q::q] = bytes(len(range(q * q, limit + 1, q)))
+    return list(compress(range(limit + 1), flags))
+
+
+class PrimeIndex:
+    """
+    The odd primes of [min_value, max_value] from a segmented sieve, and
+    separately those ≡ 3 (mod 4), so picking a prime is one random index.
+    """
+
+    def __init__(self, min_value, max_value):
+        self.min_value = min_value
+        self.max_value = max_value
+        self.primes = array("Q")
+        self.primes_3_mod_4 = array("Q")
+
+        base_primes = _base_primes(isqrt(max_value))
+        for low in range(max(3, min_value), max_value + 1, SIEVE_SEGMENT):
+            segment = list(_sieve(low, min(low + SIEVE_SEGMENT, max_value + 1), base_primes))
+            self.primes.extend(segment)
+            self.primes_3_mod_4.extend(q for q in segment if q % 4 == 3)
+
+    def pick(self, rng, congruent_3_mod_4=False):
+        primes = self.primes_3_mod_4 if congruent_3_mod_4 else self.primes
+        if not primes:
+            kind = "prime ≡ 3 (mod 4)" if congruent_3_mod_4 else "prime"
+            raise ValueError(f"ERROR: No {kind} in [{self.min_value}, {self.max_value}]")
+        return primes[rng.randrange(len(primes))]
+
+
+_index_cache = OrderedDict()
+_index_lock = threading.Lock()
+
+
+def prime_index(min_value, max_value):
+    """
+    Cached PrimeIndex of [min_value, max_value], or None if the range is
+    too wide or too large to sieve.
+    """
+    min_value = int(min_value)
+    max_value = int(max_value)
+    if max_value - min_value > INDEX_MAX_SPAN or max_value >= INDEX_MAX_VALUE:
+        return None
+
+    key = (min_value, max_value)
+    with _index_lock:
+        index = _index_cache.get(key)
+        if index is not None:
+            _index_cache.move_to_end(key)
+            return index
+
+    index = PrimeIndex(min_value, max_value)
+    with _index_lock:
+        _index_cache[key] = index
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
+
 
 class Bootstrap:
     """
     Uses Python's random module to generate initial values and candidates.
+    A seed gives a reproducible (not secure) generator for benchmarks.
     """
 
-    def __init__(self):
+    def __init__(self, seed=None):
         # SystemRandom uses OS randomness
-        self.rng = random.SystemRandom()
+        self.rng = random.SystemRandom() if seed is None else random.Random(seed)
 
     def random_number(self, bit_length):
         if bit_length <= 0:
@@ -83,7 +177,12 @@ class Bootstrap:
     def generate_prime_in_range(self, min_value, max_value):
         """
         Generates a prime number in the range [min_value, max_value].
+        Small ranges pick from a cached PrimeIndex.
         """
+        index = prime_index(min_value, max_value)
+        if index is not None:
+            return index.pick(self.rng)
+
         candidate = INIT_NOT_PRIME
         while not miller_rabin_test(candidate, ROUNDS, self):
             candidate = self.random_in_range(min_value, max_value)
@@ -94,7 +193,12 @@ class Bootstrap:
     def generate_prime_in_range_congruent_3_mod_4(self, min_value, max_value):
         """
         Generates a prime number in the range [min, max] with p ≡ 3 (mod 4).
+        Small ranges pick from a cached PrimeIndex.
         """
+        index = prime_index(min_value, max_value)
+        if index is not None:
+            return index.pick(self.rng, congruent_3_mod_4=True)
+
         candidate = INIT_NOT_PRIME
         while not miller_rabin_test(candidate, ROUNDS, self):
             candidate = self.random_in_range(min_value, max_value)
@@ -0,0 +1,171 @@
+# crypto_project/bsgs_disk.py
+
+import os
+import shutil
+import struct
+import tempfile
+from math import isqrt
+from .crypto_utils import mod_pow, mod_inverse, load_numpy, BUDGET_CHECK_INTERVAL
+from .instrumentation import log
+
+
+DEFAULT_MEMORY_LIMIT = 64 << 20
+# Bucket files per table: one table is written at a time, so this many
+# files are open at once (below the common limit of 1024 per process)
+MAX_BUCKETS = 1000
+# Matching one bucket pair holds this much per record: a NumPy sort
+# (record, sort keys and indices) or, without NumPy, a list entry plus
+# a set entry per value
+SORT_ENTRY_BYTES = 48
+SET_ENTRY_BYTES = 120
+# Part of the memory limit used for write buffers (the rest is for matching)
+BUFFER_SHARE = 0.25
+
+# (value, index) records; values below 2^64 take the struct fast path
+RECORD = struct.Struct(">QQ")
+
+
+def _record_codec(width):
+    if width <= 8:
+        return RECORD.size, RECORD.pack, RECORD.iter_unpack
+
+    size = 2 * width
+
+    def pack(value, index):
+        return value.to_bytes(width, "big") + index.to_bytes(width, "big")
+
+    def unpack_all(data):
+        for offset in range(0, len(data), size):
+            yield (int.from_bytes(data[offset:offset + width], "big"),
+                   int.from_bytes(data[offset + width:offset + size], "big"))
+    return size, pack, unpack_all
+
+
+def bucket_count(m, memory_limit, entry_bytes=SORT_ENTRY_BYTES):
+    """
+    Number of buckets so that one baby bucket plus one giant bucket
+    (about 2 * (m + 1) / buckets records) can be matched within memory_limit.
+    """
+    match_memory = int(memory_limit * (1 - BUFFER_SHARE))
+    buckets = max(1, -(-2 * (m + 1) * entry_bytes // match_memory))
+    if buckets > MAX_BUCKETS:
+        raise ValueError(f"ERROR: memory_limit too small, {buckets} buckets needed (max {MAX_BUCKETS})")
+    return buckets
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _match_sorted(np, baby_data, giant_data):
+    """
+    Sort-merge of two buckets of fixed-width records with NumPy.
+    Yields (j, i) for values found in both.
+    """
+    baby = np.frombuffer(baby_data, dtype=">u8").reshape(-1, 2)
+    giant = np.frombuffer(giant_data, dtype=">u8").reshape(-1, 2)
+    _, baby_at, giant_at = np.intersect1d(baby[:, 0], giant[:, 0], return_indices=True)
+    for b, g in zip(baby_at.tolist(), giant_at.tolist()):
+        yield int(baby[b, 1]), int(giant[g, 1])
+
+
+def _match_sets(unpack_all, baby_data, giant_data):
+    """
+    Pure Python matching: intersect the value sets, then look up the
+    indices of the (few) common values.
+    """
+    common = {value for value, _ in unpack_all(baby_data)}
+    common.intersection_update(value for value, _ in unpack_all(giant_data))
+    if not common:
+        return
+    baby = {value: j for value, j in unpack_all(baby_data) if value in common}
+    for value, i in unpack_all(giant_data):
+        if value in common:
+            yield baby[value], i
+
+
+def _partition(paths, start, factor, m, p, pack, buffer_bytes, budget=None):
+    """
+    Writes the records (start * factor^step mod p, step) for step = 0..m
+    into the bucket files paths, by value mod the bucket count.
+    """
+    buckets = len(paths)
+    files = [open(path, "wb") for path in paths]
+    buffers = [bytearray() for _ in files]
+    try:
+        val = start
+        for step in range(m + 1):
+            buf = buffers[val % buckets]
+            buf += pack(val, step)
+            if len(buf) >= buffer_bytes:
+                files[val % buckets].write(buf)
+                buf.clear()
+            val = (val * factor) % p
+            if budget is not None and (step + 1) % BUDGET_CHECK_INTERVAL == 0:
+                budget.spend(BUDGET_CHECK_INTERVAL)
+    finally:
+        for f, buf in zip(files, buffers):
+            f.write(buf)
+            f.close()
+
+
+def disk_baby_step_giant_step(a, value, p, memory_limit=DEFAULT_MEMORY_LIMIT, work_dir=None,
+                              order=None, budget=None):
+    """
+    Solve a^x ≡ value (mod p) like ElGamal.baby_step_giant_step, but with
+    the tables on disk: baby steps a^(j*m) and giant steps value * a^(-i)
+    are hash partitioned (by value mod the bucket count) into bucket files
+    written sequentially in large blocks. Each bucket pair is then matched
+    on its own (sort-merge with NumPy, set intersection without), so peak
+    memory depends on memory_limit, not on p.
+    """
+    a = int(a)
+    value = int(value)
+    p = int(p)
+    n = p - 1 if order is None else int(order)
+    m = isqrt(n) + 1
+
+    width = (p.bit_length() + 7) // 8
+    np = load_numpy() if width <= 8 else None
+    buckets = bucket_count(m, memory_limit, SORT_ENTRY_BYTES if np is not None else SET_ENTRY_BYTES)
+    _, pack, unpack_all = _record_codec(width)
+    buffer_bytes = max(4096, int(memory_limit * BUFFER_SHARE) // buckets)
+
+    directory = tempfile.mkdtemp(prefix="bsgs-", dir=work_dir)
+    try:
+        log(f"Disk BSGS: m = {m}, {buckets} buckets in {directory}\n")
+        baby_paths = [os.path.join(directory, f"baby-{b:04d}.bin") for b in range(buckets)]
+        giant_paths = [os.path.join(directory, f"giant-{b:04d}.bin") for b in range(buckets)]
+
+        # Phase 1: partition the baby steps, then the giant steps, into
+        # bucket files, each appended sequentially through its own bounded
+        # buffer
+        try:
+            _partition(baby_paths, 1, mod_pow(a, m, p), m, p, pack, buffer_bytes, budget)
+            _partition(giant_paths, value, mod_inverse(a, p), m, p, pack, buffer_bytes, budget)
+        except OSError as err:
+            raise RuntimeError(f"Disk BSGS could not write its bucket files: {err}") from err
+
+        # Phase 2: match bucket by bucket
+        best = None
+        for baby_path, giant_path in zip(baby_paths, giant_paths):
+            baby_data, giant_data = _read(baby_path), _read(giant_path)
+            if np is not None:
+                matches = _match_sorted(np, baby_data, giant_data)
+            else:
+                matches = _match_sets(unpack_all, baby_data, giant_data)
+            for j, i in matches:
+                for x in (m * j - i, m * j + i):
+                    if x >= 0 and mod_pow(a, x, p) == value % p and (best is None or x < best):
+                        best = x
+            del baby_data, giant_data
+            if budget is not None:
+                budget.check()
+
+        if best is None:
+            raise RuntimeError("Baby-Step Giant-Step failed to find x")
+        log(f"Private key x = {best}\n")
+        return best
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
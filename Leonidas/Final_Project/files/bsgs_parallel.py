@@ -0,0 +1,240 @@
+# crypto_project/bsgs_parallel.py
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from math import isqrt
+from multiprocessing import shared_memory
+from .crypto_utils import mod_pow, mod_inverse, BUDGET_CHECK_INTERVAL
+from .instrumentation import log
+
+
+# Values must fit into the unsigned 64 bit table slots
+PARALLEL_MOD_LIMIT = 1 << 64
+# Below this many baby steps starting the workers costs more than it saves
+PARALLEL_MIN_STEPS = 1 << 16
+# Seconds between budget checks while the workers run
+POLL_INTERVAL = 0.05
+WORD = 8
+
+# Per worker process, set by _init_worker
+_stop = None
+
+
+def _init_worker(stop_event):
+    global _stop
+    _stop = stop_event
+
+
+def _attach(name):
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, shm.buf.cast("Q")
+
+
+def _slices(total, parts):
+    step = -(-total // parts)
+    return [(start, min(start + step, total)) for start in range(0, total, step)]
+
+
+def _baby_slice(staging_name, a, p, m, start, end, partitions):
+    """
+    Phase 1: baby steps a^(j*m) for j in [start, end), written to the
+    staging arrays at [start, end) grouped by partition (value mod
+    partitions). Returns the entry count per partition.
+    """
+    shm, words = _attach(staging_name)
+    try:
+        total = m + 1
+        a_m = mod_pow(a, m, p)
+        val = mod_pow(a_m, start, p)
+        groups = [[] for _ in range(partitions)]
+        for j in range(start, end):
+            groups[val % partitions].append((val, j))
+            val = (val * a_m) % p
+            if (j - start) % BUDGET_CHECK_INTERVAL == 0 and _stop.is_set():
+                return None
+
+        pos = start
+        for group in groups:
+            for val, j in group:
+                words[pos] = val
+                words[total + pos] = j
+                pos += 1
+        return [len(group) for group in groups]
+    finally:
+        words.release()
+        shm.close()
+
+
+def _insert_partition(staging_name, table_name, m, partition, regions, base, capacity):
+    """
+    Phase 2: inserts this partition's staging entries (regions is a list
+    of (start, count) ranges) into its own open-addressing sub-table at
+    [base, base + capacity). No other worker writes to these slots.
+    Key 0 marks an empty slot (table values are never 0 mod p).
+    """
+    staging_shm, staging = _attach(staging_name)
+    table_shm, table = _attach(table_name)
+    try:
+        total = m + 1
+        size = len(table) // 2
+        mask = capacity - 1
+        for start, count in regions:
+            for pos in range(start, start + count):
+                val = staging[pos]
+                slot = val & mask
+                while table[base + slot] != 0 and table[base + slot] != val:
+                    slot = (slot + 1) & mask
+                if table[base + slot] == 0:
+                    table[base + slot] = val
+                    table[size + base + slot] = staging[total + pos]
+                if (pos - start) % BUDGET_CHECK_INTERVAL == 0 and _stop.is_set():
+                    return None
+        return partition
+    finally:
+        staging.release()
+        table.release()
+        staging_shm.close()
+        table_shm.close()
+
+
+def _giant_range(table_name, a, value, p, m, start, end, partitions, bases, capacities):
+    """
+    Phase 3: giant steps value * a^(-i) for i in [start, end), probing the
+    shared table in place. Returns x on a verified match, None otherwise;
+    stops early once any worker has found x.
+    """
+    shm, table = _attach(table_name)
+    try:
+        size = len(table) // 2
+        a_inv = mod_inverse(a, p)
+        gamma = (value * mod_pow(a_inv, start, p)) % p
+        for i in range(start, end):
+            partition = gamma % partitions
+            base = bases[partition]
+            mask = capacities[partition] - 1
+            slot = gamma & mask
+            key = table[base + slot]
+            while key != 0:
+                if key == gamma:
+                    j = table[size + base + slot]
+                    for x in (m * j - i, m * j + i):
+                        if x >= 0 and mod_pow(a, x, p) == value:
+                            _stop.set()
+                            return x
+                    break
+                slot = (slot + 1) & mask
+                key = table[base + slot]
+            gamma = (gamma * a_inv) % p
+            if (i - start) % BUDGET_CHECK_INTERVAL == 0 and _stop.is_set():
+                return None
+        return None
+    finally:
+        table.release()
+        shm.close()
+
+
+def _wait_all(futures, stop, budget):
+    """
+    Results of futures in order. Checks the budget while waiting and
+    stops the workers if it runs out.
+    """
+    pending = set(futures)
+    while pending:
+        _, pending = wait(pending, timeout=POLL_INTERVAL)
+        if budget is not None:
+            try:
+                budget.check()
+            except Exception:
+                stop.set()
+                raise
+    return [future.result() for future in futures]
+
+
+def _capacity(count):
+    capacity = 8
+    while capacity < 2 * count:
+        capacity *= 2
+    return capacity
+
+
+def parallel_baby_step_giant_step(a, value, p, workers=None, order=None, budget=None):
+    """
+    Solve a^x ≡ value (mod p) with baby and giant steps spread over
+    worker processes. The baby-step table is an open-addressing hash in
+    shared memory, split into one sub-table per worker (by value mod the
+    worker count) so inserts never race; giant-step ranges then probe it
+    without copying. The first verified match stops all workers.
+    Falls back to the serial ElGamal.baby_step_giant_step for p >= 2^64,
+    one worker or small groups.
+    """
+    a = int(a)
+    value = int(value) % int(p)
+    p = int(p)
+    n = p - 1 if order is None else int(order)
+    m = isqrt(n) + 1
+    workers = workers or os.cpu_count() or 1
+
+    if p >= PARALLEL_MOD_LIMIT or workers < 2 or m < PARALLEL_MIN_STEPS:
+        from .elgamal_cipher import ElGamal
+        return ElGamal(p=p).baby_step_giant_step(a, value, p, budget, order=order)
+
+    total = m + 1
+    log(f"Parallel BSGS: m = {m}, {workers} workers\n")
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    stop = context.Event()
+
+    staging = shared_memory.SharedMemory(create=True, size=2 * total * WORD)
+    table = None
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker, initargs=(stop,)) as pool:
+            # Phase 1: baby steps, grouped by partition inside each slice
+            slices = _slices(total, workers)
+            counts = _wait_all([pool.submit(_baby_slice, staging.name, a, p, m, start, end, workers)
+                                for start, end in slices], stop, budget)
+            if None in counts:
+                raise RuntimeError("Parallel BSGS: a baby-step worker stopped early")
+            if budget is not None:
+                budget.spend(total)
+
+            # Phase 2: one sub-table per partition, sized from the counts
+            capacities = [_capacity(sum(c[w] for c in counts)) for w in range(workers)]
+            bases = [sum(capacities[:w]) for w in range(workers)]
+            # New shared memory is zero-filled, so every slot starts empty
+            table = shared_memory.SharedMemory(create=True, size=2 * sum(capacities) * WORD)
+            regions = []
+            for w in range(workers):
+                regions.append([(start + sum(c[:w]), c[w]) for (start, _), c in zip(slices, counts)])
+            inserted = _wait_all([pool.submit(_insert_partition, staging.name, table.name, m, w,
+                                              regions[w], bases[w], capacities[w])
+                                  for w in range(workers)], stop, budget)
+            if None in inserted:
+                raise RuntimeError("Parallel BSGS: an insert worker stopped early")
+
+            # Phase 3: giant steps until the first verified match
+            futures = [pool.submit(_giant_range, table.name, a, value, p, m, start, end,
+                                   workers, bases, capacities) for start, end in slices]
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    x = future.result()
+                    if x is not None:
+                        stop.set()
+                        log(f"Private key x = {x}\n")
+                        return x
+                if budget is not None:
+                    try:
+                        budget.check()
+                    except Exception:
+                        stop.set()
+                        raise
+        raise RuntimeError("Baby-Step Giant-Step failed to find x")
+    finally:
+        staging.close()
+        staging.unlink()
+        if table is not None:
+            table.close()
+            table.unlink()
@@ -0,0 +1,159 @@
+# crypto_project/checkpoint.py
+
+import hashlib
+import json
+import os
+import struct
+import time
+
+
+DEFAULT_INTERVAL = 60.0
+TABLE_READ_SIZE = 1 << 20
+
+# (key, value) table records; integers up to 64 bits take the struct fast
+# path, larger ones are stored big-endian in 2 * width bytes
+TABLE_RECORD = struct.Struct(">QQ")
+
+
+def _write_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class Checkpoint:
+    """
+    Directory of attack checkpoints, one per problem (attack kind plus the
+    numbers that define it, e.g. ("rho", (n,))). The state is a small JSON
+    file replaced atomically; large append-only data (the BSGS table) goes
+    to a side file whose committed length is recorded in that state, so a
+    crash between the two writes is harmless.
+    """
+
+    def __init__(self, directory, interval=DEFAULT_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self._last_save = {}
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError:
+            msg = f"ERROR: Could not create checkpoint directory: {directory}"
+            raise RuntimeError(msg)
+
+    def path(self, kind, problem):
+        text = json.dumps([kind] + [str(int(x)) for x in problem])
+        digest = hashlib.sha256(text.encode("ascii")).hexdigest()[:24]
+        return os.path.join(self.directory, f"{kind}-{digest}.json")
+
+    def table_path(self, kind, problem):
+        return self.path(kind, problem)[:-len(".json")] + ".table"
+
+    def due(self, kind, problem):
+        """
+        True once interval seconds passed since the last save (or the
+        first call) for this problem.
+        """
+        path = self.path(kind, problem)
+        now = time.monotonic()
+        return now - self._last_save.setdefault(path, now) >= self.interval
+
+    def load(self, kind, problem):
+        """
+        Saved state dict of this problem, or None.
+        """
+        path = self.path(kind, problem)
+        self._last_save[path] = time.monotonic()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if record.get("kind") != kind or record.get("problem") != [int(x) for x in problem]:
+            return None
+        return record["state"]
+
+    def save(self, kind, problem, state):
+        path = self.path(kind, problem)
+        record = {"kind": kind, "problem": [int(x) for x in problem], "state": state}
+        try:
+            _write_atomic(path, json.dumps(record).encode("utf-8"))
+        except OSError:
+            msg = f"ERROR: Could not write checkpoint: {path}"
+            raise RuntimeError(msg)
+        self._last_save[path] = time.monotonic()
+
+    def append_table(self, kind, problem, committed, items, width):
+        """
+        Cuts the side file back to `committed` bytes (anything after it
+        was never recorded in a state), appends the (key, value) items and
+        syncs it. width is the byte size of the largest key or value.
+        Returns the new committed length.
+        """
+        if width <= 8:
+            data = b"".join(TABLE_RECORD.pack(k, v) for k, v in items)
+        else:
+            data = b"".join(k.to_bytes(width, "big") + v.to_bytes(width, "big") for k, v in items)
+        path = self.table_path(kind, problem)
+        with open(path, "r+b" if os.path.exists(path) else "w+b") as f:
+            f.truncate(committed)
+            f.seek(committed)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        return committed + len(data)
+
+    def load_table(self, kind, problem, length, width, table):
+        """
+        Reads the first `length` bytes of the side file into the dict table.
+        Returns None if the side file is missing or shorter (the state
+        cannot be resumed then).
+        """
+        record_size = table_record_size(width)
+        block = max(1, TABLE_READ_SIZE // record_size) * record_size
+        try:
+            f = open(self.table_path(kind, problem), "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            while length > 0:
+                data = f.read(min(block, length))
+                if len(data) < min(block, length):
+                    return None
+                length -= len(data)
+                if width <= 8:
+                    table.update(TABLE_RECORD.iter_unpack(data))
+                    continue
+                for offset in range(0, len(data), record_size):
+                    key = int.from_bytes(data[offset:offset + width], "big")
+                    table[key] = int.from_bytes(data[offset + width:offset + record_size], "big")
+        return table
+
+    def clear(self, kind, problem):
+        for path in (self.path(kind, problem), self.table_path(kind, problem)):
+            if os.path.exists(path):
+                os.remove(path)
+        self._last_save.pop(self.path(kind, problem), None)
+
+
+def table_record_size(width):
+    return TABLE_RECORD.size if width <= 8 else 2 * width
+
+
+def tick(budget, checkpoint, kind, problem, iterations, save):
+    """
+    Hook for attack loops, called every BUDGET_CHECK_INTERVAL iterations:
+    saves when a checkpoint is due and charges the budget. If the budget
+    stops the attack, the state is saved first so it can be resumed.
+    """
+    if checkpoint is not None and checkpoint.due(kind, problem):
+        save()
+    if budget is not None:
+        try:
+            budget.spend(iterations)
+        except Exception:
+            if checkpoint is not None:
+                save()
+            raise
@@ -0,0 +1,234 @@
+# crypto_project/corpus.py
+
+import glob
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from . import instrumentation
+from .keyring import fingerprint, read_int_lines
+from .attack_planner import Budget, run_attack
+from .checkpoint import Checkpoint
+from .rsa_cipher import RSA
+from .elgamal_cipher import ElGamal
+
+
+def expand_paths(patterns, directory_filter):
+    """
+    Glob patterns or directories -> sorted list of files. Directories
+    contribute the files accepted by directory_filter(name).
+    """
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for name in os.listdir(pattern):
+                path = os.path.join(pattern, name)
+                if os.path.isfile(path) and directory_filter(name):
+                    paths.add(path)
+        else:
+            paths.update(p for p in glob.glob(pattern) if os.path.isfile(p))
+    return sorted(paths)
+
+
+def _guess_algorithm(name, count, rsa_count, elgamal_count):
+    name = os.path.basename(name).lower()
+    if "rsa" in name:
+        return "rsa"
+    if "elg" in name:
+        return "elgamal"
+    if count == rsa_count:
+        return "rsa"
+    if count == elgamal_count:
+        return "elgamal"
+    return None
+
+
+def discover_keys(patterns):
+    """
+    Reads public key files (RSA: n, e / ElGamal: p, g, public key).
+    Returns {fingerprint: target}; identical keys under several file
+    names become one target that lists every file.
+    """
+    targets = {}
+    for path in expand_paths(patterns, lambda name: name.endswith(".pub")):
+        try:
+            values = read_int_lines(path)
+        except (RuntimeError, ValueError):
+            continue
+        algorithm = _guess_algorithm(path, len(values), 2, 3)
+        if algorithm == "rsa" and len(values) >= 2:
+            components = tuple(values[:2])
+        elif algorithm == "elgamal" and len(values) >= 3:
+            components = tuple(values[:3])
+        else:
+            continue
+
+        fp = fingerprint(algorithm, components)
+        target = targets.setdefault(fp, {"algorithm": algorithm, "components": components, "files": []})
+        target["files"].append(path)
+    return targets
+
+
+def read_int_words(file_path):
+    """
+    All integers of a file, whitespace separated (ciphertext files put
+    ElGamal pairs on one line or on two).
+    """
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            return [int(word) for word in f.read().split()]
+    except OSError:
+        msg = f"ERROR: Could not open file: {file_path}"
+        raise RuntimeError(msg)
+
+
+def discover_ciphertexts(patterns):
+    """
+    Reads ciphertext files. RSA files hold one or more integers,
+    ElGamal files one or more c1, c2 pairs. Returns a list of
+    {"file", "algorithm", "values"}.
+    """
+    found = []
+    for path in expand_paths(patterns, lambda name: "cipher" in name.lower()):
+        try:
+            values = read_int_words(path)
+        except (RuntimeError, ValueError):
+            continue
+        algorithm = _guess_algorithm(path, len(values), 1, 2)
+        if not values or algorithm is None:
+            continue
+        if algorithm == "elgamal":
+            if len(values) % 2:
+                continue
+            values = [(values[i], values[i + 1]) for i in range(0, len(values), 2)]
+        found.append({"file": path, "algorithm": algorithm, "values": values})
+    return found
+
+
+def _fits(target, values):
+    modulus = target["components"][0]
+    if target["algorithm"] == "rsa":
+        return all(0 <= c < modulus for c in values)
+    return all(0 < c1 < modulus and 0 <= c2 < modulus for c1, c2 in values)
+
+
+def pair_targets(targets, ciphertexts):
+    """
+    Pairs every ciphertext file with every public key of the same
+    algorithm whose modulus can hold its values. Files carry no recipient,
+    so a ciphertext may be tried under several keys.
+    Returns {fingerprint: [ciphertext, ...]} for keys with work.
+    """
+    pairs = {}
+    for fp, target in targets.items():
+        matching = [c for c in ciphertexts
+                    if c["algorithm"] == target["algorithm"] and _fits(target, c["values"])]
+        if matching:
+            pairs[fp] = matching
+    return pairs
+
+
+def attack_target(algorithm, components, ciphertexts, time_limit=None, memory_limit=None,
+                  checkpoint_dir=None):
+    """
+    Worker side: recovers the private key of one public key once (with
+    the strategy the attack planner picks) and decrypts every paired
+    ciphertext file with it. Long attacks resume from checkpoint_dir.
+    Returns (strategy, private key, [(file, plaintexts), ...]).
+    """
+    budget = Budget(seconds=time_limit) if time_limit is not None else None
+    checkpoint = Checkpoint(checkpoint_dir) if checkpoint_dir is not None else None
+    with instrumentation.quiet():
+        strategy, private = run_attack(algorithm, components, budget, memory_limit, checkpoint)
+        if algorithm == "rsa":
+            cipher = RSA(n=components[0], e=components[1], d=private)
+            return strategy, private, [(f, [cipher.decrypt(c) for c in values]) for f, values in ciphertexts]
+
+        p, g, public_key = components
+        cipher = ElGamal(p=p, g=g, public_key=public_key, private_key=private)
+        return strategy, private, [(f, cipher.decrypt_batch(values)) for f, values in ciphertexts]
+
+
+def completed_fingerprints(output_path):
+    """
+    Fingerprints already attacked successfully in output_path. A partly
+    written last line (interrupted run) is cut off so appending starts on
+    a clean line.
+    """
+    if not os.path.exists(output_path):
+        return set()
+
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end != len(data):
+            f.truncate(end)
+
+    done = set()
+    for line in data[:end].splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        # Failed keys are tried again
+        if isinstance(record, dict) and "fingerprint" in record and "error" not in record:
+            done.add(record["fingerprint"])
+    return done
+
+
+def run_corpus(key_patterns, cipher_patterns, output_path, workers=None, resume=True,
+               time_limit=None, memory_limit=None, checkpoint_dir=None):
+    """
+    Attacks every distinct public key that has paired ciphertexts on a
+    process pool and appends one JSON line per key to output_path as
+    results come in. With resume=True keys already in the output are
+    skipped. time_limit (seconds) and memory_limit (bytes) apply per key;
+    attacks stopped by the time limit or a crash continue from their
+    checkpoints in checkpoint_dir on the next run.
+    Returns the number of keys attacked in this run.
+    """
+    targets = discover_keys(key_patterns)
+    pairs = pair_targets(targets, discover_ciphertexts(cipher_patterns))
+
+    if resume:
+        done = completed_fingerprints(output_path)
+    else:
+        done = set()
+        open(output_path, "w").close()
+    todo = [fp for fp in sorted(pairs) if fp not in done]
+    if not todo:
+        return 0
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool, \
+            open(output_path, "a", encoding="utf-8") as out:
+        futures = {}
+        for fp in todo:
+            target = targets[fp]
+            ciphertexts = [(c["file"], c["values"]) for c in pairs[fp]]
+            future = pool.submit(attack_target, target["algorithm"], target["components"], ciphertexts,
+                                 time_limit, memory_limit, checkpoint_dir)
+            futures[future] = fp
+
+        for future in as_completed(futures):
+            fp = futures[future]
+            target = targets[fp]
+            record = {
+                "fingerprint": fp,
+                "algorithm": target["algorithm"],
+                "key_files": target["files"],
+                "public_key": list(target["components"]),
+            }
+            try:
+                strategy, private, results = future.result()
+            except Exception as err:
+                record["error"] = str(err)
+            else:
+                record["strategy"] = strategy
+                record["private_key"] = private
+                record["results"] = [{"cipher_file": f, "plaintexts": values} for f, values in results]
+            # One write per key: a crash leaves at most one partial line
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+    return len(todo)
@@ -0,0 +1,295 @@
+# crypto_project/crypto_service.py
+
+import asyncio
+import json
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from .rsa_cipher import RSA
+from .elgamal_cipher import ElGamal
+from .attack_planner import run_attack
+from .key_inventory import generate_key
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8789
+BATCH_WINDOW = 0.002
+MAX_BATCH_SIZE = 256
+MAX_PENDING = 1024
+# Cipher objects kept per worker process
+MAX_CACHED_CIPHERS = 1024
+
+KEY_FIELDS = {
+    "rsa": ("n", "e", "d"),
+    "elgamal": ("p", "g", "public_key", "private_key"),
+}
+# "generate" is handled separately (see parse_generate)
+OPERATIONS = ("encrypt", "decrypt", "attack")
+
+# Per worker process: cipher objects (and their derived state) by key
+_ciphers = OrderedDict()
+
+
+def _cipher(algorithm, components):
+    cache_key = (algorithm, components)
+    cipher = _ciphers.get(cache_key)
+    if cipher is not None:
+        _ciphers.move_to_end(cache_key)
+        return cipher
+    fields = dict(zip(KEY_FIELDS[algorithm], components))
+    cipher = RSA(**fields) if algorithm == "rsa" else ElGamal(**fields)
+    _ciphers[cache_key] = cipher
+    while len(_ciphers) > MAX_CACHED_CIPHERS:
+        _ciphers.popitem(last=False)
+    return cipher
+
+
+def _attacker(algorithm, cipher):
+    """
+    Cipher holding the private key recovered from the public components:
+    one factorization / discrete logarithm for every ciphertext of a batch.
+    """
+    if algorithm == "rsa":
+        _, d = run_attack("rsa", (cipher.n, cipher.e))
+        return _cipher("rsa", (cipher.n, cipher.e, d))
+    _, x = run_attack("elgamal", (cipher.p, cipher.g, cipher.public_key))
+    return _cipher("elgamal", (cipher.p, cipher.g, cipher.public_key, x))
+
+
+def _run_items(algorithm, operation, cipher, values):
+    if operation == "encrypt":
+        if algorithm == "rsa":
+            return cipher.encrypt_batch(values)
+        return [list(cipher.encrypt(m)) for m in values]
+    return cipher.decrypt_batch(values)
+
+
+def run_batch(algorithm, operation, components, values):
+    """
+    Worker side of a micro-batch: one key, one operation, many values.
+    Returns [(ok, result_or_message), ...]; a failing batch is retried
+    item by item so one bad value does not fail its neighbours. An attack
+    recovers the private key once, then decrypts.
+    """
+    cipher = _cipher(algorithm, components)
+    if operation == "attack":
+        cipher = _attacker(algorithm, cipher)
+        operation = "decrypt"
+    try:
+        return [(True, r) for r in _run_items(algorithm, operation, cipher, values)]
+    except Exception:
+        if len(values) == 1:
+            raise
+
+    results = []
+    for value in values:
+        try:
+            results.append((True, _run_items(algorithm, operation, cipher, [value])[0]))
+        except Exception as err:
+            results.append((False, str(err)))
+    return results
+
+
+def parse_request(request):
+    """
+    Validates a request dict and returns (batch_key, value).
+    """
+    algorithm = str(request.get("algorithm", "")).lower()
+    operation = str(request.get("op", "")).lower()
+    if algorithm not in KEY_FIELDS:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    if operation not in OPERATIONS:
+        raise ValueError(f"Unknown operation: {operation}")
+
+    key = request.get("key") or {}
+    components = tuple(int(key[f]) if key.get(f) is not None else None
+                       for f in KEY_FIELDS[algorithm])
+    if components[0] is None:
+        raise ValueError(f"Missing key component: {KEY_FIELDS[algorithm][0]}")
+
+    value = request.get("value")
+    if algorithm == "elgamal" and operation != "encrypt":
+        c1, c2 = value
+        value = (int(c1), int(c2))
+    else:
+        value = int(value)
+
+    return (algorithm, operation, components), value
+
+
+def parse_generate(request):
+    """
+    Validates a generate request and returns the generate_key arguments
+    (algorithm, min_prime, max_prime, num_primes).
+    """
+    algorithm = str(request.get("algorithm", "")).lower()
+    if algorithm not in KEY_FIELDS:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    return (algorithm, int(request.get("min_prime", 1000)), int(request.get("max_prime", 10000)),
+            int(request.get("num_primes", 2)))
+
+
+def key_record(algorithm, components):
+    """
+    JSON-ready dict of a generated key (generate_key components).
+    """
+    if algorithm == "rsa":
+        n, e, d, primes = components
+        return {"n": n, "e": e, "d": d, "primes": list(primes)}
+    return dict(zip(KEY_FIELDS["elgamal"], components))
+
+
+class CryptoService:
+    """
+    Long running asyncio service speaking line-delimited JSON.
+    Concurrent requests for the same (algorithm, operation, key) are
+    gathered for up to batch_window seconds (or max_batch_size requests)
+    and run as one batch on a process pool. At most max_pending requests
+    are in flight; beyond that the service stops reading from clients.
+    """
+
+    def __init__(self, workers=None, batch_window=BATCH_WINDOW,
+                 max_batch_size=MAX_BATCH_SIZE, max_pending=MAX_PENDING, inventory=None):
+        self.workers = workers
+        self.inventory = inventory
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.max_pending = max_pending
+
+        self._pool = None
+        self._server = None
+        self._pending = None
+        self._batches = {}
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+        # Plain fork would hand open client sockets to the workers and keep
+        # those connections alive after the service closes them
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        self._pending = asyncio.Semaphore(self.max_pending)
+        if unix_path is not None:
+            self._server = await asyncio.start_unix_server(self.handle_connection, path=unix_path)
+        else:
+            self._server = await asyncio.start_server(self.handle_connection, host, port)
+        return self._server
+
+    async def serve_forever(self, **kwargs):
+        server = await self.start(**kwargs)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def generate(self, request):
+        """
+        Hands out a pre-generated key from the inventory (if one is
+        configured), otherwise generates one on the process pool.
+        """
+        args = parse_generate(request)
+        algorithm = args[0]
+        loop = asyncio.get_running_loop()
+
+        if self.inventory is not None:
+            cipher = await loop.run_in_executor(None, self.inventory.take, *args)
+            if algorithm == "rsa":
+                return key_record("rsa", (cipher.n, cipher.e, cipher.d, cipher.primes))
+            return key_record("elgamal", (cipher.p, cipher.g, cipher.public_key, cipher.private_key))
+
+        components = await loop.run_in_executor(self._pool, generate_key, *args)
+        return key_record(algorithm, components)
+
+    async def submit(self, request):
+        """
+        Queues one request dict into its micro-batch and returns the result.
+        """
+        if str(request.get("op", "")).lower() == "generate":
+            return await self.generate(request)
+        batch_key, value = parse_request(request)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        batch = self._batches.get(batch_key)
+        if batch is None:
+            batch = []
+            self._batches[batch_key] = batch
+            loop.call_later(self.batch_window, self._flush, batch_key, batch)
+        batch.append((value, future))
+
+        if len(batch) >= self.max_batch_size:
+            self._flush(batch_key, batch)
+        return await future
+
+    def _flush(self, batch_key, batch):
+        # The timer may fire after the batch was already flushed for size
+        if self._batches.get(batch_key) is not batch:
+            return
+        del self._batches[batch_key]
+        asyncio.ensure_future(self._run(batch_key, batch))
+
+    async def _run(self, batch_key, batch):
+        algorithm, operation, components = batch_key
+        values = [value for value, _ in batch]
+        loop = asyncio.get_running_loop()
+
+        try:
+            results = await loop.run_in_executor(
+                self._pool, run_batch, algorithm, operation, components, values)
+        except Exception as err:
+            results = [(False, str(err))] * len(batch)
+
+        for (_, future), (ok, result) in zip(batch, results):
+            if future.done():
+                continue
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(RuntimeError(result))
+
+    async def _answer(self, line, writer, write_lock):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as err:
+            response = {"id": None, "error": f"Invalid request: {err}"}
+        else:
+            response = {"id": request.get("id")}
+            try:
+                response["result"] = await self.submit(request)
+            except Exception as err:
+                response["error"] = str(err)
+        finally:
+            self._pending.release()
+
+        async with write_lock:
+            writer.write((json.dumps(response) + "\n").encode("utf-8"))
+            await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                # Backpressure: stop reading while too many requests are in flight
+                await self._pending.acquire()
+                task = asyncio.ensure_future(self._answer(line, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
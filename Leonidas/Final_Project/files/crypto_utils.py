@@ -1,6 +1,17 @@
 # crypto_project/crypto_utils.py
 
 from typing import Any
+from . import instrumentation
+
+
+# NumPy module once imported by load_numpy() (False if it is not installed)
+_numpy = None
+
+# Largest modulus for which (mod - 1)^2 still fits into an unsigned 64 bit word
+VECTOR_MOD_LIMIT = 1 << 32
+
+# Loop iterations between two checks of an attack budget (attack_planner.Budget)
+BUDGET_CHECK_INTERVAL = 1024
 
 
 def are_relatively_prime(x, y):
@@ -20,6 +31,8 @@ def extended_gcd(m, n):
     Extended Euclidean Algorithm:
     Returns (gcd, x, y) such that m*x + n*y = gcd.
     """
+    if instrumentation.ENABLED:
+        instrumentation.count("extended_gcd")
     old_r, r = int(m), int(n)
     old_s, s = 1, 0
     old_t, t = 0, 1
@@ -47,6 +60,8 @@ def find_gcd(large_number, small_number):
     """
     General Euclidean Algorithm.
     """
+    if instrumentation.ENABLED:
+        instrumentation.count("gcd")
     large_number = int(large_number)
     small_number = int(small_number)
     remainder = large_number % small_number
@@ -99,6 +114,8 @@ def miller_rabin_test(n, rounds, rng: Any):
         r += 1
 
     for _ in range(rounds):
+        if instrumentation.ENABLED:
+            instrumentation.count("miller_rabin_rounds")
         b = rng.random_in_range(2, n - 2)
         x = pow(b, m, n)
 
@@ -123,6 +140,8 @@ def mod_inverse(a, m):
     Modular inverse: a^(-1) mod m.
     Raises RuntimeError if gcd != 1.
     """
+    if instrumentation.ENABLED:
+        instrumentation.count("inversion")
     a = int(a)
     m = int(m)
     gcd_val, x, _ = extended_gcd(a, m)
@@ -135,11 +154,43 @@ def mod_inverse(a, m):
     return result
 
 
+def batch_mod_inverse(values, m):
+    """
+    Inverts all values mod m with Montgomery's trick:
+    one mod_inverse plus 3(n-1) multiplications.
+    Raises RuntimeError if any value has no inverse.
+    """
+    m = int(m)
+    values = [int(v) % m for v in values]
+    if not values:
+        return []
+    if instrumentation.ENABLED:
+        instrumentation.count("batch_inversion_values", len(values))
+
+    # prefix[i] = values[0] * ... * values[i]
+    prefix = []
+    acc = 1
+    for v in values:
+        acc = (acc * v) % m
+        prefix.append(acc)
+
+    inv = mod_inverse(prefix[-1], m)
+
+    result = [0] * len(values)
+    for i in range(len(values) - 1, 0, -1):
+        result[i] = (inv * prefix[i - 1]) % m
+        inv = (inv * values[i]) % m
+    result[0] = inv
+    return result
+
+
 def mod_pow(base, exp, mod):
     """
     Fast exponentiation: base^exp % mod.
     (You could also use pow(base, exp, mod).)
     """
+    if instrumentation.ENABLED:
+        instrumentation.count("modexp")
     base = int(base) % int(mod)
     exp = int(exp)
     mod = int(mod)
@@ -154,6 +205,235 @@ def mod_pow(base, exp, mod):
     return result
 
 
+def default_window_size(bit_length):
+    """
+    Window width for sliding-window exponentiation with exponents of the
+    given size (larger exponents amortize a larger table of odd powers).
+    """
+    if bit_length <= 24:
+        return 2
+    if bit_length <= 80:
+        return 3
+    if bit_length <= 240:
+        return 4
+    if bit_length <= 672:
+        return 5
+    return 6
+
+
+class ModContext:
+    """
+    Reusable per-modulus state for repeated exponentiations.
+
+    backend="builtin" hands the work to Python's pow (C sliding window),
+    backend="montgomery" runs a pure Python sliding window over Montgomery
+    products (R = 2^k, k = bit length of the modulus; even moduli use plain
+    reduction). See benchmarks.py for how the two compare.
+    """
+
+    BACKENDS = ("builtin", "montgomery")
+
+    def __init__(self, modulus, window=None, backend="builtin"):
+        modulus = int(modulus)
+        if modulus <= 0:
+            raise ValueError("modulus must be > 0")
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+
+        self.modulus = modulus
+        self.backend = backend
+        self.bit_length = modulus.bit_length()
+        self.window = window
+        self.montgomery = modulus > 1 and modulus % 2 == 1
+
+        if self.montgomery:
+            r = 1 << self.bit_length
+            self.r_mask = r - 1
+            self.n_prime = (-mod_inverse(modulus, r)) % r
+            self.r2 = (r * r) % modulus
+            self.one = r % modulus
+        else:
+            self.r_mask = None
+            self.n_prime = None
+            self.r2 = None
+            self.one = 1 % modulus
+
+    def reduce(self, t):
+        """
+        Montgomery reduction: t * R^(-1) mod n for 0 <= t < n * R.
+        """
+        m = ((t & self.r_mask) * self.n_prime) & self.r_mask
+        u = (t + m * self.modulus) >> self.bit_length
+        if u >= self.modulus:
+            u -= self.modulus
+        return u
+
+    def to_montgomery(self, x):
+        x = int(x) % self.modulus
+        if not self.montgomery:
+            return x
+        return self.reduce(x * self.r2)
+
+    def from_montgomery(self, x):
+        if not self.montgomery:
+            return x
+        return self.reduce(x)
+
+    def mul(self, a, b):
+        """
+        Multiplies two values that are already in the context's domain.
+        """
+        if self.montgomery:
+            return self.reduce(a * b)
+        return (a * b) % self.modulus
+
+    def pow(self, base, exp):
+        """
+        base^exp % modulus via sliding-window exponentiation.
+        """
+        exp = int(exp)
+        if exp < 0:
+            raise ValueError("exponent must be >= 0")
+        if instrumentation.ENABLED:
+            instrumentation.count("modexp")
+        if self.backend == "builtin":
+            return pow(int(base), exp, self.modulus)
+        if exp == 0:
+            return 1 % self.modulus
+
+        x = self.to_montgomery(base)
+        mul = self.mul
+        window = self.window or default_window_size(exp.bit_length())
+
+        # Odd powers x^1, x^3, ..., x^(2^w - 1)
+        x_squared = mul(x, x)
+        odd_powers = [x]
+        for _ in range((1 << (window - 1)) - 1):
+            odd_powers.append(mul(odd_powers[-1], x_squared))
+
+        result = self.one
+        i = exp.bit_length() - 1
+        while i >= 0:
+            if not (exp >> i) & 1:
+                result = mul(result, result)
+                i -= 1
+                continue
+
+            # Longest window ending in a set bit
+            low = max(i - window + 1, 0)
+            while not (exp >> low) & 1:
+                low += 1
+            width = i - low + 1
+            for _ in range(width):
+                result = mul(result, result)
+            digit = (exp >> low) & ((1 << width) - 1)
+            result = mul(result, odd_powers[digit >> 1])
+            i = low - 1
+
+        return self.from_montgomery(result)
+
+
+class FixedBaseTable:
+    """
+    Precomputed powers of a fixed base for fixed-base windowed
+    exponentiation: rows[i][d] = base^(d * 2^(window * i)) mod modulus.
+    An exponentiation then needs one multiplication per non-zero window
+    digit and no squarings.
+    """
+
+    def __init__(self, base, modulus, max_exp_bits, window=None):
+        self.modulus = int(modulus)
+        self.base = int(base) % self.modulus
+        self.max_exp_bits = max(1, int(max_exp_bits))
+        self.window = window or max(2, default_window_size(self.max_exp_bits) + 1)
+
+        digits = 1 << self.window
+        row_count = -(-self.max_exp_bits // self.window)
+        self.rows = []
+
+        row_base = self.base
+        for _ in range(row_count):
+            row = [1 % self.modulus, row_base]
+            for _ in range(digits - 2):
+                row.append((row[-1] * row_base) % self.modulus)
+            self.rows.append(row)
+            # Next row starts at row_base^(2^window)
+            row_base = (row[-1] * row_base) % self.modulus
+
+    def pow(self, exp):
+        """
+        base^exp % modulus, exp in [0, 2^max_exp_bits).
+        """
+        if instrumentation.ENABLED:
+            instrumentation.count("modexp_fixed_base")
+        exp = int(exp)
+        if exp < 0 or exp.bit_length() > self.max_exp_bits:
+            return pow(self.base, exp, self.modulus)
+
+        mask = (1 << self.window) - 1
+        result = 1 % self.modulus
+        for row in self.rows:
+            if exp == 0:
+                break
+            digit = exp & mask
+            if digit:
+                result = (result * row[digit]) % self.modulus
+            exp >>= self.window
+        return result
+
+
+def load_numpy():
+    """
+    Imports NumPy on first use (it is optional and slow to import).
+    Returns None if it is not installed.
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+def mod_pow_batch(bases, exp, mod):
+    """
+    Batch exponentiation: [b^exp % mod for b in bases].
+    Uses a vectorized square-and-multiply over uint64 arrays when NumPy is
+    available and mod <= 2^32, otherwise mod_pow per element.
+    Returns a NumPy array for array input, a list otherwise.
+    """
+    exp = int(exp)
+    mod = int(mod)
+    bases = bases if hasattr(bases, "__len__") else list(bases)
+    if instrumentation.ENABLED:
+        instrumentation.count("modexp", len(bases))
+    np = load_numpy() if 1 < mod <= VECTOR_MOD_LIMIT else None
+
+    if np is None or mod <= 1 or mod > VECTOR_MOD_LIMIT or exp < 0:
+        return [mod_pow(b, exp, mod) for b in bases]
+
+    as_array = isinstance(bases, np.ndarray)
+    if as_array and bases.dtype.kind in "iu":
+        # np.mod takes the sign of mod, so negative bases reduce like int %
+        base = np.mod(bases, mod).astype(np.uint64)
+    elif as_array:
+        base = np.array([int(b) % mod for b in bases.ravel()], dtype=np.uint64).reshape(bases.shape)
+    else:
+        base = np.fromiter((int(b) % mod for b in bases), dtype=np.uint64)
+
+    m = np.uint64(mod)
+    result = np.ones_like(base)
+    while exp > 0:
+        if exp % 2 == 1:
+            result = (result * base) % m
+        base = (base * base) % m
+        exp //= 2
+
+    return result if as_array else [int(x) for x in result]
+
+
 def get_prime_factors(n):
     """
     Decomposes n into its (unique) prime factors.
@@ -1,14 +1,22 @@
 # crypto_project/elgamal_cipher.py
 
-import sys
+from itertools import islice
 from .cipher_base import CipherBase
+from . import instrumentation
+from .instrumentation import log
 from .bootstrap import Bootstrap
+from .ephemeral_pool import EphemeralPool, DEFAULT_LOW_WATER, DEFAULT_HIGH_WATER
 from .crypto_utils import (
     mod_pow,
     mod_inverse,
+    batch_mod_inverse,
     find_generator,
+    ModContext,
+    FixedBaseTable,
+    BUDGET_CHECK_INTERVAL,
 )
 from .string_utils import color_string
+from .checkpoint import tick, table_record_size
 
 
 class ElGamal(CipherBase):
@@ -35,6 +43,10 @@ class ElGamal(CipherBase):
         self.g = None
         self.public_key = None
         self.private_key = None
+        self._mod_context = None
+        self._base_tables = {}
+        self._bootstrap = None
+        self.ephemeral_pool = None
 
         # If numeric components provided, use them directly
         if p is not None:
@@ -45,25 +57,72 @@ class ElGamal(CipherBase):
             return
 
         if load_from_files and self.load_keys():
-            sys.stderr.write("Found existing ElGamal keys.\n")
-            sys.stderr.write(f"  Public:  {self.public_key_file}\n")
-            sys.stderr.write(f"  Private: {self.private_key_file}\n")
+            log("Found existing ElGamal keys.\n")
+            log(f"  Public:  {self.public_key_file}\n")
+            log(f"  Private: {self.private_key_file}\n")
         else:
-            sys.stderr.write("No existing ElGamal keys found. Generating new keys...\n")
-            sys.stderr.write(f"  Prime range: [{min_random_number}, {max_random_number}]\n")
+            log("No existing ElGamal keys found. Generating new keys...\n")
+            log(f"  Prime range: [{min_random_number}, {max_random_number}]\n")
             self.generate_keys(min_random_number, max_random_number)
             try:
                 self.save_keys()
             except RuntimeError:
                 pass
-            sys.stderr.write("Keys generated\n")
+            log("Keys generated\n")
 
-    def generate_keys(self, min_value, max_value):
-        bootstrap = Bootstrap()
+    @classmethod
+    def from_keyring(cls, keyring, key_id=None, fingerprint=None):
+        """
+        Builds an ElGamal instance from a keyring entry (by key id or fingerprint).
+        """
+        entry = keyring.get(key_id) if key_id is not None else keyring.get_by_fingerprint(fingerprint)
+        if entry.algorithm != "elgamal":
+            raise RuntimeError(f"Keyring entry {entry.key_id} is not an ElGamal key")
+        p, g, public_key, private_key = entry.components
+        return cls(p=p, g=g, public_key=public_key, private_key=private_key)
+
+    @property
+    def mod_context(self):
+        """
+        ModContext for the current prime, rebuilt only when p changes.
+        """
+        if self._mod_context is None or self._mod_context.modulus != self.p:
+            self._mod_context = ModContext(self.p)
+        return self._mod_context
+
+    def fixed_base_table(self, base):
+        """
+        Fixed-base table for base under the current prime, built on first use.
+        Exponents are ephemeral keys k < p - 1.
+        """
+        key = (int(base), self.p)
+        table = self._base_tables.get(key)
+        if table is None:
+            table = FixedBaseTable(base, self.p, (self.p - 1).bit_length())
+            self._base_tables[key] = table
+        return table
+
+    def enable_ephemeral_pool(self, low_water=DEFAULT_LOW_WATER, high_water=DEFAULT_HIGH_WATER):
+        """
+        Starts a background pool of precomputed (g^k, y^k) pairs for the
+        current public key; encrypt() then only needs one multiplication.
+        """
+        self.disable_ephemeral_pool()
+        self.ephemeral_pool = EphemeralPool(self, low_water, high_water).start()
+        return self.ephemeral_pool
+
+    def disable_ephemeral_pool(self):
+        if self.ephemeral_pool is not None:
+            self.ephemeral_pool.stop()
+            self.ephemeral_pool = None
+
+    @instrumentation.timed("elgamal_keygen")
+    def generate_keys(self, min_value, max_value, bootstrap=None):
+        bootstrap = bootstrap or Bootstrap()
         self.p = bootstrap.generate_prime_in_range(min_value, max_value)
         self.g = find_generator(self.p)
         self.private_key = bootstrap.random_in_range(2, self.p - 2)
-        self.public_key = mod_pow(self.g, self.private_key, self.p)
+        self.public_key = self.mod_context.pow(self.g, self.private_key)
 
     def load_keys(self):
         # Public key file
@@ -110,10 +169,15 @@ class ElGamal(CipherBase):
             msg = f"Could not create private key file: {self.private_key_file}"
             raise RuntimeError(msg)
 
-    def baby_step_giant_step(self, a, value, p):
+    @instrumentation.timed("elgamal_bsgs")
+    def baby_step_giant_step(self, a, value, p, budget=None, order=None, checkpoint=None):
         """
         Solve a^x ≡ value (mod p) via Baby-Step Giant-Step.
         Used to recover the private key from (p, g, publicKey).
+        order limits the search to x < order (default p - 1); an optional
+        Budget (see attack_planner) can stop the search early. With a
+        Checkpoint the table and the giant-step position are saved
+        periodically and a saved search for the same problem is resumed.
         """
         from math import isqrt
 
@@ -121,54 +185,97 @@ class ElGamal(CipherBase):
         value = int(value)
         p = int(p)
 
-        n = p - 1
+        n = p - 1 if order is None else int(order)
         m = isqrt(n) + 1
 
-        # Tabelle L1: a^(j*m)
+        # Tabelle L1: a^(j*m), one multiplication per entry
         L1 = {}
-        for j in range(m + 1):
-            val = mod_pow(a, j * m, p)
+        a_m = mod_pow(a, m, p)
+        val = 1
+        gamma = value
+        start_j = start_i = 0
+
+        # Table entries are checkpointed incrementally in insertion order
+        problem = (a, value, p, n)
+        width = (p.bit_length() + 7) // 8
+        record_size = table_record_size(width)
+        table_bytes = 0
+        if checkpoint is not None:
+            state = checkpoint.load("bsgs", problem)
+            if state is not None:
+                if checkpoint.load_table("bsgs", problem, state["table_bytes"], width, L1) is None:
+                    # Table side file lost: start over
+                    L1.clear()
+                else:
+                    table_bytes = state["table_bytes"]
+                    start_j, val, start_i, gamma = state["j"], state["val"], state["i"], state["gamma"]
+
+        def save(next_j, next_i):
+            nonlocal table_bytes
+            new = islice(L1.items(), table_bytes // record_size, None)
+            table_bytes = checkpoint.append_table("bsgs", problem, table_bytes, new, width)
+            checkpoint.save("bsgs", problem, {"j": next_j, "val": val, "i": next_i,
+                                              "gamma": gamma, "table_bytes": table_bytes})
+
+        track = budget is not None or checkpoint is not None
+        for j in range(start_j, m + 1):
             L1[val] = j
+            val = (val * a_m) % p
+            if track and (j + 1) % BUDGET_CHECK_INTERVAL == 0:
+                tick(budget, checkpoint, "bsgs", problem, BUDGET_CHECK_INTERVAL,
+                     lambda: save(j + 1, 0))
+
+        if instrumentation.ENABLED:
+            instrumentation.count("bsgs_table_size", len(L1))
 
         a_inv = mod_inverse(a, p)
-        gamma = value
 
-        for i in range(m + 1):
+        for i in range(start_i, m + 1):
             if gamma in L1:
+                if instrumentation.ENABLED:
+                    instrumentation.count("bsgs_giant_steps", i + 1)
                 j = L1[gamma]
                 x = m * j - i
 
-                sys.stderr.write(f"Match found! L2[{i}] = L1[{j}] = {gamma}\n")
-                sys.stderr.write(f"i = {i}, j = {j}\n")
-                sys.stderr.write(f"Private key x = {x}\n")
+                log(f"Match found! L2[{i}] = L1[{j}] = {gamma}\n")
+                log(f"i = {i}, j = {j}\n")
+                log(f"Private key x = {x}\n")
 
                 check = mod_pow(a, x, p)
                 if check == value:
-                    sys.stderr.write(f"Verified: {a}^{x} ≡ {value} (mod {p})\n")
+                    log(f"Verified: {a}^{x} ≡ {value} (mod {p})\n")
+                    if checkpoint is not None:
+                        checkpoint.clear("bsgs", problem)
                     return x
                 else:
-                    sys.stderr.write("Verification failed with m*j - i, trying m*j + i...\n")
+                    log("Verification failed with m*j - i, trying m*j + i...\n")
                     x_alt = m * j + i
                     check_alt = mod_pow(a, x_alt, p)
                     if check_alt == value:
-                        sys.stderr.write(f"Verified: {a}^{x_alt} ≡ {value} (mod {p})\n")
+                        log(f"Verified: {a}^{x_alt} ≡ {value} (mod {p})\n")
+                        if checkpoint is not None:
+                            checkpoint.clear("bsgs", problem)
                         return x_alt
 
             gamma = (gamma * a_inv) % p
+            if track and (i + 1) % BUDGET_CHECK_INTERVAL == 0:
+                tick(budget, checkpoint, "bsgs", problem, BUDGET_CHECK_INTERVAL,
+                     lambda: save(m + 1, i + 1))
 
         raise RuntimeError("Baby-Step Giant-Step failed to find x")
 
-    def attack(self, cipher_file_path):
+    @instrumentation.timed("elgamal_attack")
+    def attack(self, cipher_file_path, budget=None):
         """
         Attack on ElGamal: discrete logarithm via Baby-Step Giant-Step.
         """
-        sys.stderr.write("\n=== ElGamal Attack (Discrete Logarithm) ===\n")
+        log("\n=== ElGamal Attack (Discrete Logarithm) ===\n")
 
-        sys.stderr.write("\nStep 1: Recovering private key x from public key (p, g, publicKey)...\n")
-        recovered_x = self.baby_step_giant_step(self.g, self.public_key, self.p)
-        sys.stderr.write(f"\nSuccessfully recovered private key: x = {recovered_x}\n")
+        log("\nStep 1: Recovering private key x from public key (p, g, publicKey)...\n")
+        recovered_x = self.baby_step_giant_step(self.g, self.public_key, self.p, budget)
+        log(f"\nSuccessfully recovered private key: x = {recovered_x}\n")
 
-        sys.stderr.write(f"\nStep 2: Reading ciphertext from {cipher_file_path}...\n")
+        log(f"\nStep 2: Reading ciphertext from {cipher_file_path}...\n")
         text = self.read_file(cipher_file_path)
         from io import StringIO
         buffer = StringIO(text)
@@ -178,8 +285,8 @@ class ElGamal(CipherBase):
         c1 = int(line1)
         c2 = int(line2)
 
-        sys.stderr.write(f"Ciphertext: ({c1}, {c2})\n")
-        sys.stderr.write("\nStep 3: Decrypting using recovered private key...\n")
+        log(f"Ciphertext: ({c1}, {c2})\n")
+        log("\nStep 3: Decrypting using recovered private key...\n")
 
         original_x = self.private_key
         self.private_key = recovered_x
@@ -187,22 +294,23 @@ class ElGamal(CipherBase):
         self.private_key = original_x
 
         msg = color_string(str(plaintext))
-        sys.stderr.write("\nSuccessfully decrypted message: " + msg + "\n")
+        log("\nSuccessfully decrypted message: " + msg + "\n")
 
         return plaintext
 
-    def attack_from_values(self, c1, c2):
+    @instrumentation.timed("elgamal_attack")
+    def attack_from_values(self, c1, c2, budget=None):
         """
         Attack like in attack(), but (c1, c2) are directly provided as values
         instead of being read from a file.
         """
-        sys.stderr.write("\n=== ElGamal Attack (Discrete Logarithm) ===\n")
+        log("\n=== ElGamal Attack (Discrete Logarithm) ===\n")
 
-        sys.stderr.write("\nStep 1: Recovering private key x from public key (p, g, publicKey)...\n")
-        recovered_x = self.baby_step_giant_step(self.g, self.public_key, self.p)
-        sys.stderr.write(f"\n Successfully recovered private key: x = {recovered_x}\n")
+        log("\nStep 1: Recovering private key x from public key (p, g, publicKey)...\n")
+        recovered_x = self.baby_step_giant_step(self.g, self.public_key, self.p, budget)
+        log(f"\n Successfully recovered private key: x = {recovered_x}\n")
 
-        sys.stderr.write("\nStep 2: Decrypting given ciphertext (c1, c2)...\n")
+        log("\nStep 2: Decrypting given ciphertext (c1, c2)...\n")
         c1 = int(c1)
         c2 = int(c2)
         original_x = self.private_key
@@ -211,26 +319,43 @@ class ElGamal(CipherBase):
         self.private_key = original_x
 
         msg = color_string(str(plaintext))
-        sys.stderr.write("\n Successfully decrypted message: " + msg + "\n")
+        log("\n Successfully decrypted message: " + msg + "\n")
 
         return plaintext
 
     def decrypt(self, cipher_pair):
         c1, c2 = cipher_pair
-        s = mod_pow(c1, self.private_key, self.p)
+        s = self.mod_context.pow(c1, self.private_key)
         s_inv = mod_inverse(s, self.p)
         clear_text = (c2 * s_inv) % self.p
         return clear_text
 
+    def decrypt_batch(self, cipher_pairs):
+        """
+        Decrypts many (c1, c2) pairs, sharing one modular inversion for all
+        shared secrets (see batch_mod_inverse).
+        """
+        cipher_pairs = [(int(c1), int(c2)) for c1, c2 in cipher_pairs]
+        ctx = self.mod_context
+        secrets = [ctx.pow(c1, self.private_key) for c1, _ in cipher_pairs]
+        inverses = batch_mod_inverse(secrets, self.p)
+        return [(c2 * s_inv) % self.p for (_, c2), s_inv in zip(cipher_pairs, inverses)]
+
     def encrypt(self, clear_text):
         clear_text = int(clear_text)
         if clear_text <= 0 or clear_text >= self.p:
             raise ValueError("ERROR: Message must be in range [1, p-1]")
 
-        bootstrap = Bootstrap()
-        k = bootstrap.random_in_range(2, self.p - 2)
-        c1 = mod_pow(self.g, k, self.p)
-        c2 = (clear_text * mod_pow(self.public_key, k, self.p)) % self.p
+        pool = self.ephemeral_pool
+        if pool is not None and pool.matches(self):
+            c1, shared = pool.take()
+        else:
+            if self._bootstrap is None:
+                self._bootstrap = Bootstrap()
+            k = self._bootstrap.random_in_range(2, self.p - 2)
+            c1 = self.fixed_base_table(self.g).pow(k)
+            shared = self.fixed_base_table(self.public_key).pow(k)
+        c2 = (clear_text * shared) % self.p
         return c1, c2
 
     def run(self, operation, file_path):
@@ -243,10 +368,10 @@ class ElGamal(CipherBase):
             return
 
         text_type = "cipher" if operation == "decrypt" else "clear"
-        sys.stderr.write(f"Reading {text_type}-text file: {file_path} ... ")
+        log(f"Reading {text_type}-text file: {file_path} ... ")
         text = self.read_file(file_path)
-        sys.stderr.write("Done!\n")
-        sys.stderr.write(operation + "ing ... ")
+        log("Done!\n")
+        log(operation + "ing ... ")
 
         output = ""
 
@@ -263,5 +388,5 @@ class ElGamal(CipherBase):
             clear_text = self.decrypt((c1, c2))
             output = str(clear_text)
 
-        sys.stderr.write("Done!\n")
+        log("Done!\n")
         print(output)
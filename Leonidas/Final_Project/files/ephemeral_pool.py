@@ -0,0 +1,123 @@
+# crypto_project/ephemeral_pool.py
+
+import threading
+from collections import deque
+from .bootstrap import Bootstrap
+
+
+DEFAULT_LOW_WATER = 64
+DEFAULT_HIGH_WATER = 256
+
+
+class EphemeralPool:
+    """
+    Offline/online ElGamal encryption: a background thread keeps a bounded
+    pool of (g^k, y^k) pairs for one public key (p, g, y). The online path
+    pops one pair and only has to multiply. Every k is drawn fresh, used for
+    exactly one pair and discarded, and every pair is handed out once.
+    """
+
+    def __init__(self, cipher, low_water=DEFAULT_LOW_WATER, high_water=DEFAULT_HIGH_WATER):
+        if low_water < 0 or high_water <= low_water:
+            raise ValueError("Pool needs 0 <= low_water < high_water")
+
+        self.p = cipher.p
+        self.g = cipher.g
+        self.public_key = cipher.public_key
+        self.low_water = low_water
+        self.high_water = high_water
+
+        # Tables are built here so the worker never touches the cipher
+        self._g_table = cipher.fixed_base_table(self.g)
+        self._y_table = cipher.fixed_base_table(self.public_key)
+        self._bootstrap = Bootstrap()
+
+        self._pairs = deque()
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+
+    def matches(self, cipher):
+        return (cipher.p, cipher.g, cipher.public_key) == (self.p, self.g, self.public_key)
+
+    def _new_pair(self):
+        k = self._bootstrap.random_in_range(2, self.p - 2)
+        return self._g_table.pow(k), self._y_table.pow(k)
+
+    def _fill(self):
+        while True:
+            with self._condition:
+                while self._running and len(self._pairs) > self.low_water:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                missing = self.high_water - len(self._pairs)
+
+            # Exponentiations happen outside the lock
+            for _ in range(missing):
+                pair = self._new_pair()
+                with self._condition:
+                    if not self._running:
+                        return
+                    self._pairs.append(pair)
+                    self.generated += 1
+
+    def start(self):
+        with self._condition:
+            if self._running:
+                return self
+            self._running = True
+        self._thread = threading.Thread(target=self._fill, name="elgamal-ephemeral-pool", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._pairs.clear()
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def take(self):
+        """
+        Returns a fresh (c1, shared_secret) pair. An empty pool is a miss and
+        the pair is computed inline.
+        """
+        with self._condition:
+            if self._pairs:
+                pair = self._pairs.popleft()
+                self.hits += 1
+            else:
+                pair = None
+                self.misses += 1
+            if len(self._pairs) <= self.low_water:
+                self._condition.notify()
+
+        if pair is None:
+            pair = self._new_pair()
+        return pair
+
+    def metrics(self):
+        with self._condition:
+            requests = self.hits + self.misses
+            return {
+                "depth": len(self._pairs),
+                "low_water": self.low_water,
+                "high_water": self.high_water,
+                "generated": self.generated,
+                "hits": self.hits,
+                "misses": self.misses,
+                "miss_rate": self.misses / requests if requests else 0.0,
+            }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,236 @@
+# crypto_project/hybrid.py
+
+import hashlib
+import hmac
+import os
+import struct
+from .bootstrap import Bootstrap
+from .crypto_utils import load_numpy
+from .rsa_cipher import RSA
+from .elgamal_cipher import ElGamal
+
+
+MAGIC = b"CPHY"
+VERSION = 1
+DEFAULT_CHUNK_SIZE = 1 << 20
+MAX_CHUNK_SIZE = 1 << 26
+
+# magic, version, algorithm, chunk size, nonce
+HEADER = struct.Struct(">4sBBI16s")
+# ciphertext length of one record (0 = end of stream)
+RECORD_HEAD = struct.Struct(">I")
+# chunk index, final flag, ciphertext length (authenticated with every record)
+TAG_INPUT = struct.Struct(">QBI")
+INT_LENGTH = struct.Struct(">I")
+
+NONCE_SIZE = 16
+TAG_SIZE = 32
+KDF_LABEL = b"crypto_project hybrid v1"
+
+ALGORITHMS = {1: "rsa", 2: "elgamal"}
+ALGORITHM_CODES = {name: code for code, name in ALGORITHMS.items()}
+
+
+def _algorithm(cipher):
+    if isinstance(cipher, RSA):
+        return "rsa"
+    if isinstance(cipher, ElGamal):
+        return "elgamal"
+    raise ValueError(f"Unsupported cipher: {type(cipher).__name__}")
+
+
+def _int_bytes(value):
+    return value.to_bytes((value.bit_length() + 7) // 8, "big")
+
+
+def _encapsulate(cipher, algorithm, bootstrap):
+    """
+    Draws a random secret below the modulus and encrypts it with the
+    public key. Returns (secret bytes, encrypted integers).
+    """
+    if algorithm == "rsa":
+        secret = bootstrap.random_in_range(2, cipher.n - 2)
+        return _int_bytes(secret), [cipher.encrypt(secret)]
+    secret = bootstrap.random_in_range(2, cipher.p - 2)
+    return _int_bytes(secret), list(cipher.encrypt(secret))
+
+
+def _decapsulate(cipher, algorithm, values):
+    if algorithm == "rsa":
+        if cipher.d is None or len(values) != 1:
+            raise RuntimeError("ERROR: RSA private key needed to decrypt")
+        return _int_bytes(cipher.decrypt(values[0]))
+    if cipher.private_key is None or len(values) != 2:
+        raise RuntimeError("ERROR: ElGamal private key needed to decrypt")
+    return _int_bytes(cipher.decrypt(tuple(values)))
+
+
+def _derive_keys(secret, nonce):
+    """
+    Keystream key and MAC key from the session secret and the nonce.
+    """
+    material = hashlib.shake_256(KDF_LABEL + secret + nonce).digest(64)
+    return material[:32], material[32:]
+
+
+def _xor_keystream(buf, length, key, index):
+    """
+    XORs buf[:length] in place with the SHAKE128 keystream of chunk `index`.
+    """
+    keystream = hashlib.shake_128(key + index.to_bytes(8, "big")).digest(length)
+    np = load_numpy()
+    if np is not None:
+        view = np.frombuffer(buf, dtype=np.uint8, count=length)
+        np.bitwise_xor(view, np.frombuffer(keystream, dtype=np.uint8), out=view)
+    else:
+        data = int.from_bytes(memoryview(buf)[:length], "little")
+        buf[:length] = (data ^ int.from_bytes(keystream, "little")).to_bytes(length, "little")
+
+
+def _tag(mac_key, header_hash, index, final, data):
+    mac = hmac.new(mac_key, header_hash, hashlib.sha256)
+    mac.update(TAG_INPUT.pack(index, final, len(data)))
+    mac.update(data)
+    return mac.digest()
+
+
+def _read_into(source, view):
+    """
+    Fills view from source (short reads from pipes included).
+    Returns the number of bytes read, less than len(view) only at EOF.
+    """
+    filled = 0
+    while filled < len(view):
+        n = source.readinto(view[filled:])
+        if not n:
+            break
+        filled += n
+    return filled
+
+
+def _read_exact(source, size):
+    data = source.read(size)
+    if data is None or len(data) != size:
+        raise RuntimeError("ERROR: Hybrid ciphertext is truncated")
+    return data
+
+
+def encrypt_stream(cipher, source, target, chunk_size=DEFAULT_CHUNK_SIZE, bootstrap=None):
+    """
+    Hybrid encryption of a binary stream: one public key operation on a
+    random session secret, then the payload in chunks XORed with a SHAKE128
+    keystream and authenticated with HMAC-SHA256. Memory use is one chunk.
+    The session secret is only as strong as the key it is encrypted with.
+    Returns the number of plaintext bytes.
+    """
+    if not 0 < chunk_size <= MAX_CHUNK_SIZE:
+        raise ValueError(f"chunk_size must be in range [1, {MAX_CHUNK_SIZE}]")
+
+    algorithm = _algorithm(cipher)
+    bootstrap = bootstrap or Bootstrap()
+    secret, encrypted = _encapsulate(cipher, algorithm, bootstrap)
+    nonce = os.urandom(NONCE_SIZE)
+    stream_key, mac_key = _derive_keys(secret, nonce)
+
+    header = bytearray(HEADER.pack(MAGIC, VERSION, ALGORITHM_CODES[algorithm], chunk_size, nonce))
+    header.append(len(encrypted))
+    for value in encrypted:
+        data = _int_bytes(value)
+        header += INT_LENGTH.pack(len(data)) + data
+    target.write(header)
+    header_hash = hashlib.sha256(header).digest()
+
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    index = 0
+    total = 0
+    while True:
+        length = _read_into(source, view)
+        if length == 0:
+            break
+        _xor_keystream(buf, length, stream_key, index)
+        chunk = view[:length]
+        target.write(RECORD_HEAD.pack(length))
+        target.write(chunk)
+        target.write(_tag(mac_key, header_hash, index, 0, chunk))
+        total += length
+        index += 1
+        if length < chunk_size:
+            break
+
+    # Authenticated end marker, so dropping trailing chunks is detected
+    target.write(RECORD_HEAD.pack(0))
+    target.write(_tag(mac_key, header_hash, index, 1, b""))
+    return total
+
+
+def decrypt_stream(cipher, source, target):
+    """
+    Reverses encrypt_stream. Every chunk is checked before it is written;
+    a modified, reordered or truncated stream raises RuntimeError.
+    Returns the number of plaintext bytes.
+    """
+    algorithm = _algorithm(cipher)
+    head = _read_exact(source, HEADER.size + 1)
+    magic, version, code, chunk_size, nonce = HEADER.unpack_from(head)
+    if magic != MAGIC or version != VERSION:
+        raise RuntimeError("ERROR: Not a hybrid ciphertext")
+    if ALGORITHMS.get(code) != algorithm:
+        raise RuntimeError(f"ERROR: Ciphertext was not made for {algorithm}")
+    if not 0 < chunk_size <= MAX_CHUNK_SIZE:
+        raise RuntimeError("ERROR: Invalid chunk size in hybrid ciphertext")
+
+    header = bytearray(head)
+    values = []
+    for _ in range(head[-1]):
+        length_bytes = _read_exact(source, INT_LENGTH.size)
+        data = _read_exact(source, INT_LENGTH.unpack(length_bytes)[0])
+        header += length_bytes + data
+        values.append(int.from_bytes(data, "big"))
+    header_hash = hashlib.sha256(header).digest()
+
+    stream_key, mac_key = _derive_keys(_decapsulate(cipher, algorithm, values), nonce)
+
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    index = 0
+    total = 0
+    while True:
+        (length,) = RECORD_HEAD.unpack(_read_exact(source, RECORD_HEAD.size))
+        if length > chunk_size:
+            raise RuntimeError("ERROR: Invalid chunk length in hybrid ciphertext")
+        chunk = view[:length]
+        if _read_into(source, chunk) != length:
+            raise RuntimeError("ERROR: Hybrid ciphertext is truncated")
+        final = 1 if length == 0 else 0
+        tag = _read_exact(source, TAG_SIZE)
+        if not hmac.compare_digest(tag, _tag(mac_key, header_hash, index, final, chunk)):
+            raise RuntimeError("ERROR: Hybrid ciphertext failed authentication")
+        if final:
+            return total
+
+        _xor_keystream(buf, length, stream_key, index)
+        target.write(chunk)
+        total += length
+        index += 1
+
+
+def encrypt_file(cipher, input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    with open(input_path, "rb") as source, open(output_path, "wb") as target:
+        return encrypt_stream(cipher, source, target, chunk_size)
+
+
+def decrypt_file(cipher, input_path, output_path):
+    """
+    Decrypts into a temporary file that replaces output_path only once the
+    whole stream is authenticated.
+    """
+    tmp_path = output_path + ".tmp"
+    try:
+        with open(input_path, "rb") as source, open(tmp_path, "wb") as target:
+            total = decrypt_stream(cipher, source, target)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return total
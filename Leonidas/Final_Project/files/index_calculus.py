@@ -0,0 +1,384 @@
+# crypto_project/index_calculus.py
+
+import math
+import multiprocessing
+import os
+import random
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from .bootstrap import PrimeIndex
+from .checkpoint import Checkpoint
+from .crypto_utils import mod_inverse, load_numpy
+from .instrumentation import log
+
+
+# Prime factors of p - 1 up to this bound are handled by Pohlig-Hellman
+# for every target; the larger ones (exponent 1) by the factor base logs
+SMALL_FACTOR_LIMIT = 1 << 20
+# Factor base bound: L(N)^0.6 = exp(0.6 * sqrt(ln N * ln ln N)) for the
+# sieved values N ~ p * SIEVE_WIDTH, clamped
+MIN_FACTOR_BASE_BOUND = 1000
+MAX_FACTOR_BASE_BOUND = 1 << 14
+# Relations wanted beyond the factor base size before solving, and the
+# cap (times the factor base size) before giving up on the rest
+RELATION_EXTRA = 16
+RELATION_LIMIT = 4
+# Values r + t * p (t < SIEVE_WIDTH) are sieved per exponent k; a value is
+# trial factored when its sieved bits reach its size minus SIEVE_SLACK_BITS
+SIEVE_WIDTH = 2048
+SIEVE_SLACK_BITS = 6
+ROUNDS_PER_TASK = 32
+# An individual log gives up after this many times the sieve tasks one
+# smooth value is expected to take (and at least LOG_MIN_TASKS)
+LOG_TASK_SLACK = 64
+LOG_MIN_TASKS = 16
+# Engines (with their factor base logs) kept per process
+MAX_CACHED_ENGINES = 16
+
+STORE_KIND = "index_calculus"
+
+
+def factor_base_bound(p):
+    ln_n = math.log(p * SIEVE_WIDTH)
+    bound = math.exp(0.6 * math.sqrt(ln_n * math.log(ln_n)))
+    return int(min(MAX_FACTOR_BASE_BOUND, max(MIN_FACTOR_BASE_BOUND, bound)))
+
+
+def factor_base(bound):
+    return [2] + list(PrimeIndex(3, bound).primes)
+
+
+def values_per_relation(p, bound):
+    """
+    Sieved values per smooth one: ~u^u with u = log(p * SIEVE_WIDTH) / log(bound).
+    """
+    u = math.log(p * SIEVE_WIDTH) / math.log(bound)
+    return u ** u
+
+
+def _smooth_exponents(value, primes):
+    """
+    Sparse exponent vector [(index, exponent), ...] of value over primes,
+    or None if value is not smooth.
+    """
+    exponents = []
+    for index, q in enumerate(primes):
+        if value % q == 0:
+            e = 0
+            while value % q == 0:
+                value //= q
+                e += 1
+            exponents.append((index, e))
+            if value == 1:
+                return exponents
+    return exponents if value == 1 else None
+
+
+def sieve_relations(p, g, multiplier, primes, seed, rounds=ROUNDS_PER_TASK, width=SIEVE_WIDTH):
+    """
+    Worker side: for random k, finds t with r + t * p smooth over primes,
+    where r = multiplier * g^k mod p. All r + t * p are ≡ g^k * multiplier
+    (mod p) and form an arithmetic progression, so each prime q divides
+    exactly the t ≡ -r / p (mod q); those are sieved with q's bit size
+    before trial factoring the candidates.
+    Returns [(k, exponents), ...].
+    """
+    rng = random.Random(seed)
+    np = load_numpy()
+    sizes = [max(1, round(math.log2(q))) for q in primes]
+    p_inverses = [mod_inverse(p % q, q) for q in primes]
+    threshold = (p * width).bit_length() - SIEVE_SLACK_BITS
+    relations = []
+    for _ in range(rounds):
+        k = rng.randrange(1, p - 1)
+        r = multiplier * pow(g, k, p) % p
+        if np is not None:
+            sieve = np.zeros(width, dtype=np.int32)
+            for q, size, p_inv in zip(primes, sizes, p_inverses):
+                sieve[(-r * p_inv) % q::q] += size
+            candidates = np.nonzero(sieve >= threshold)[0].tolist()
+        else:
+            sieve = [0] * width
+            for q, size, p_inv in zip(primes, sizes, p_inverses):
+                for t in range((-r * p_inv) % q, width, q):
+                    sieve[t] += size
+            candidates = [t for t, bits in enumerate(sieve) if bits >= threshold]
+        for t in candidates:
+            exponents = _smooth_exponents(r + t * p, primes)
+            if exponents is not None:
+                relations.append((k, exponents))
+    return relations
+
+
+class _Echelon:
+    """
+    Incremental sparse Gaussian elimination modulo a prime ell. Rows are
+    dicts {column: coefficient}; every row is reduced by the pivots in the
+    order they were created, so it never contains an older pivot column.
+    """
+
+    def __init__(self, ell):
+        self.ell = ell
+        self.pivots = []
+        self.pivot_of = {}
+
+    def add(self, row, rhs):
+        ell = self.ell
+        for column, pivot, pivot_rhs in self.pivots:
+            c = row.get(column)
+            if not c:
+                continue
+            for col, coef in pivot.items():
+                value = (row.get(col, 0) - c * coef) % ell
+                if value:
+                    row[col] = value
+                else:
+                    row.pop(col, None)
+            rhs = (rhs - c * pivot_rhs) % ell
+        if not row:
+            return False
+        # Largest prime first: it is in the fewest relations
+        column = max(row)
+        inverse = mod_inverse(row[column], ell)
+        row = {col: coef * inverse % ell for col, coef in row.items()}
+        self.pivot_of[column] = len(self.pivots)
+        self.pivots.append((column, row, rhs * inverse % ell))
+        return True
+
+    def solve(self):
+        """
+        {column: log mod ell} for every column whose value does not depend
+        on a column without pivot.
+        """
+        logs = {}
+        for column, row, rhs in reversed(self.pivots):
+            value = rhs
+            for col, coef in row.items():
+                if col == column:
+                    continue
+                if col not in logs:
+                    break
+                value -= coef * logs[col]
+            else:
+                logs[column] = value % self.ell
+        return logs
+
+
+class IndexCalculus:
+    """
+    Index-calculus discrete logarithms in Z_p^* for a generator g.
+
+    The expensive part only depends on the group: relations
+    g^k ≡ prod(q^e) (mod p) over a factor base of small primes q are
+    collected with a sieve on a process pool and solved for log_g(q)
+    modulo every large prime factor ell of p - 1. These factor base logs
+    are saved per (p, g) in store_dir (a Checkpoint directory), so each
+    public key of the group only costs one smooth relation for y * g^k.
+    Prime factors of p - 1 below SMALL_FACTOR_LIMIT are solved per target
+    with Pohlig-Hellman.
+    """
+
+    def __init__(self, p, g, bound=None, workers=None, store_dir=None):
+        self.p = int(p)
+        self.g = int(g)
+        self.bound = bound or factor_base_bound(self.p)
+        self.workers = workers
+        self.store = Checkpoint(store_dir) if store_dir is not None else None
+
+        # Set by _factor_order (p - 1 is factored under the caller's budget)
+        self.small_factors = None
+        self.large_primes = None
+        self.modulus = None
+
+        self.primes = factor_base(self.bound)
+        # Factor base index -> log_g(q) mod self.modulus, once precomputed
+        self.logs = None
+
+    def _factor_order(self, budget=None):
+        """
+        Splits the prime factors of p - 1 into the small ones (for
+        Pohlig-Hellman) and the large ones (for the factor base logs).
+        """
+        from .attack_planner import factorize
+
+        if self.modulus is not None:
+            return
+        factors = factorize(self.p - 1, budget)
+        large_primes = sorted(q for q in factors if q > SMALL_FACTOR_LIMIT)
+        if any(factors[q] > 1 for q in large_primes):
+            raise RuntimeError("ERROR: p - 1 has a repeated large prime factor")
+        self.small_factors = {q: e for q, e in factors.items() if q <= SMALL_FACTOR_LIMIT}
+        self.large_primes = large_primes
+        self.modulus = math.prod(large_primes)
+
+    def _problem(self):
+        return (self.p, self.g, self.bound)
+
+    def load(self, budget=None):
+        """
+        Factor base logs from the store. Returns True if found.
+        """
+        if self.store is None:
+            return False
+        self._factor_order(budget)
+        state = self.store.load(STORE_KIND, self._problem())
+        if state is None or state.get("modulus") != self.modulus:
+            return False
+        position = {q: i for i, q in enumerate(self.primes)}
+        self.logs = {position[q]: value for q, value in zip(state["primes"], state["logs"])}
+        return True
+
+    def save(self):
+        if self.store is None or self.logs is None:
+            return
+        primes = [self.primes[i] for i in sorted(self.logs)]
+        logs = [self.logs[i] for i in sorted(self.logs)]
+        self.store.save(STORE_KIND, self._problem(),
+                        {"modulus": self.modulus, "primes": primes, "logs": logs})
+
+    def _collect(self, multiplier, accept, budget=None, max_tasks=None):
+        """
+        Runs sieve_relations tasks (on a pool unless workers=1) and passes
+        every relation to accept(k, exponents) until it returns True.
+        Returns False if max_tasks tasks finished before that.
+        """
+        seeds = random.SystemRandom()
+        tasks = 0
+        if self.workers == 1:
+            while max_tasks is None or tasks < max_tasks:
+                relations = sieve_relations(self.p, self.g, multiplier, self.primes, seeds.getrandbits(64))
+                tasks += 1
+                if budget is not None:
+                    budget.spend(ROUNDS_PER_TASK * SIEVE_WIDTH)
+                if any(accept(k, exponents) for k, exponents in relations):
+                    return True
+            return False
+
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+            slots = 2 * (self.workers or os.cpu_count() or 1)
+            pending = set()
+            try:
+                while True:
+                    while len(pending) < slots and (max_tasks is None or tasks + len(pending) < max_tasks):
+                        pending.add(pool.submit(sieve_relations, self.p, self.g, multiplier,
+                                                self.primes, seeds.getrandbits(64)))
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        tasks += 1
+                        if budget is not None:
+                            budget.spend(ROUNDS_PER_TASK * SIEVE_WIDTH)
+                        if any(accept(k, exponents) for k, exponents in future.result()):
+                            return True
+                    if not pending:
+                        return False
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def precompute(self, budget=None):
+        """
+        Collects relations and solves for the factor base logs (or loads
+        them from the store). Returns self.
+        """
+        if self.logs is not None:
+            return self
+        self._factor_order(budget)
+        if self.load(budget):
+            return self
+        if not self.large_primes:
+            self.logs = {}
+            return self
+
+        size = len(self.primes)
+        log(f"Index calculus: {size} primes up to {self.bound}, "
+            f"logs modulo {self.modulus.bit_length()} bits\n")
+        systems = [_Echelon(ell) for ell in self.large_primes]
+        count = [0]
+
+        def accept(k, exponents):
+            count[0] += 1
+            for system in systems:
+                system.add({i: e % system.ell for i, e in exponents if e % system.ell}, k % system.ell)
+            full = all(len(system.pivots) == size for system in systems)
+            return full or count[0] >= RELATION_LIMIT * size + RELATION_EXTRA
+
+        self._collect(1, accept, budget)
+        log(f"Index calculus: {count[0]} relations\n")
+
+        # CRT over the large primes, for the logs known modulo all of them
+        solved = [system.solve() for system in systems]
+        self.logs = {}
+        for index in set.intersection(*(set(logs) for logs in solved)):
+            value = 0
+            modulus = 1
+            for ell, logs in zip(self.large_primes, solved):
+                value += modulus * ((logs[index] - value) * mod_inverse(modulus, ell) % ell)
+                modulus *= ell
+            self.logs[index] = value
+        if not self.logs:
+            raise RuntimeError("Index calculus found no factor base logs")
+        self.save()
+        return self
+
+    def log(self, y, budget=None):
+        """
+        x with g^x ≡ y (mod p): the part modulo the large primes from one
+        smooth y * g^k over the known factor base logs, the rest from
+        Pohlig-Hellman.
+        """
+        from .attack_planner import pohlig_hellman_partial
+
+        y = int(y) % self.p
+        if y == 0:
+            raise RuntimeError("ERROR: y ≡ 0 (mod p) has no discrete logarithm")
+        self.precompute(budget)
+        x, modulus = 0, 1
+        if self.large_primes:
+            found = []
+
+            def accept(k, exponents):
+                if all(i in self.logs for i, _ in exponents):
+                    found.append(sum(e * self.logs[i] for i, e in exponents) - k)
+                    return True
+                return False
+
+            # Relations over primes without a known log are skipped, so a
+            # partly solved factor base may never give one: bound the search
+            expected = values_per_relation(self.p, self.bound) / (ROUNDS_PER_TASK * SIEVE_WIDTH)
+            max_tasks = max(LOG_MIN_TASKS, math.ceil(LOG_TASK_SLACK * expected))
+            if not self._collect(y, accept, budget, max_tasks):
+                raise RuntimeError(f"Index calculus found no relation for y in {max_tasks} sieve tasks "
+                                   f"({len(self.logs)} of {len(self.primes)} factor base logs known)")
+            x, modulus = found[0] % self.modulus, self.modulus
+
+        if self.small_factors:
+            x_small, small = pohlig_hellman_partial(self.g, y, self.p, self.small_factors, budget)
+            x += modulus * ((x_small - x) * mod_inverse(modulus, small) % small)
+            modulus *= small
+        if pow(self.g, x, self.p) != y:
+            raise RuntimeError("Index calculus failed (g is not a generator)")
+        log(f"Private key x = {x}\n")
+        return x
+
+
+# Per process: (p, g, store_dir, workers) -> IndexCalculus
+_engines = OrderedDict()
+
+
+def index_calculus_log(g, y, p, workers=None, store_dir=None, budget=None):
+    """
+    log_g(y) mod p, reusing the factor base logs of (p, g) from earlier
+    calls in this process or from store_dir.
+    """
+    key = (int(p), int(g), store_dir, workers)
+    engine = _engines.get(key)
+    if engine is not None:
+        _engines.move_to_end(key)
+    else:
+        engine = IndexCalculus(p, g, workers=workers, store_dir=store_dir)
+        _engines[key] = engine
+        while len(_engines) > MAX_CACHED_ENGINES:
+            _engines.popitem(last=False)
+    return engine.log(y, budget)
@@ -0,0 +1,152 @@
+# crypto_project/instrumentation.py
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+def _env_flag(name):
+    return os.environ.get(name, "").strip().lower() not in ("", "0", "false", "no")
+
+
+# Hot paths check ENABLED before touching any metric, so switched off the
+# instrumentation costs one attribute lookup per call site.
+# CRYPTO_METRICS=1 enables collection, CRYPTO_QUIET=1 drops step messages.
+ENABLED = _env_flag("CRYPTO_METRICS")
+QUIET = _env_flag("CRYPTO_QUIET")
+
+
+class Metrics:
+    """
+    Counters and per-phase timers (total seconds and call count).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.timers = {}
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.timers = {}
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, phase, seconds):
+        with self._lock:
+            total, calls = self.timers.get(phase, (0.0, 0))
+            self.timers[phase] = (total + seconds, calls + 1)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "timers": {
+                    phase: {"seconds": total, "calls": calls}
+                    for phase, (total, calls) in self.timers.items()
+                },
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), sort_keys=True)
+
+    def to_prometheus(self, prefix="crypto"):
+        """
+        Prometheus text exposition format.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot["counters"].items()):
+            metric = f"{prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        if snapshot["timers"]:
+            lines.append(f"# TYPE {prefix}_phase_seconds_total counter")
+            lines.append(f"# TYPE {prefix}_phase_calls_total counter")
+        for phase, timer in sorted(snapshot["timers"].items()):
+            lines.append(f'{prefix}_phase_seconds_total{{phase="{phase}"}} {timer["seconds"]:.9f}')
+            lines.append(f'{prefix}_phase_calls_total{{phase="{phase}"}} {timer["calls"]}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def count(name, amount=1):
+    if ENABLED:
+        metrics.count(name, amount)
+
+
+@contextmanager
+def phase(name):
+    """
+    Times the enclosed block as phase `name` (only when enabled).
+    """
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """
+    Decorator form of phase() for whole functions.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def log(message):
+    """
+    Step / progress message on stderr, dropped in quiet mode.
+    """
+    if not QUIET:
+        sys.stderr.write(message)
+
+
+@contextmanager
+def collect(reset=True, quiet=None):
+    """
+    Enables collection for the enclosed block and yields the Metrics
+    object; quiet=True also silences step messages for the block.
+    """
+    global ENABLED, QUIET
+    previous = (ENABLED, QUIET)
+    if reset:
+        metrics.reset()
+    ENABLED = True
+    if quiet is not None:
+        QUIET = quiet
+    try:
+        yield metrics
+    finally:
+        ENABLED, QUIET = previous
+
+
+@contextmanager
+def quiet():
+    global QUIET
+    previous = QUIET
+    QUIET = True
+    try:
+        yield
+    finally:
+        QUIET = previous
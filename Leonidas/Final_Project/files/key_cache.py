@@ -0,0 +1,246 @@
+# crypto_project/key_cache.py
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from .crypto_utils import ModContext
+from .keyring import read_int_lines
+from .rsa_cipher import RSA
+from .elgamal_cipher import ElGamal
+
+
+DEFAULT_MAX_ENTRIES = 1024
+# ElGamal keys carry two fixed-base tables (~6 MB each at 2048 bits)
+DEFAULT_MAX_BYTES = 256 << 20
+
+
+class FrozenKey:
+    """
+    Base for immutable key records: attributes are set once in __init__.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def _set(self, name, value):
+        object.__setattr__(self, name, value)
+
+    def approx_size(self):
+        size = sys.getsizeof(self)
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if isinstance(value, int):
+                size += sys.getsizeof(value)
+        return size
+
+
+class RSAKey(FrozenKey):
+    """
+    RSA key with its derived state (modular context, CRT parameters).
+    """
+
+    __slots__ = ("n", "e", "d", "primes", "crt_params", "mod_context")
+
+    def __init__(self, n, e=None, d=None, primes=None):
+        cipher = RSA(n=n, e=e, d=d, primes=primes)
+        self._set("n", cipher.n)
+        self._set("e", cipher.e)
+        self._set("d", cipher.d)
+        self._set("primes", tuple(cipher.primes) if cipher.primes else None)
+        params = cipher.crt_params
+        self._set("crt_params", tuple(params) if params else None)
+        self._set("mod_context", ModContext(cipher.n))
+
+    def cipher(self):
+        """
+        RSA instance that reuses this key's derived state.
+        """
+        cipher = RSA(n=self.n, e=self.e, d=self.d, primes=self.primes)
+        cipher._mod_context = self.mod_context
+        if self.crt_params is not None:
+            cipher._crt = ((self.n, self.d, self.primes), list(self.crt_params))
+        return cipher
+
+
+class ElGamalKey(FrozenKey):
+    """
+    ElGamal key with its derived state (modular context, fixed-base tables
+    for g and the public key). The tables are built on first encrypt and
+    shared by every cipher() of the key.
+    """
+
+    __slots__ = ("p", "g", "public_key", "private_key", "mod_context", "base_tables", "_table_sizes")
+
+    def __init__(self, p, g=None, public_key=None, private_key=None):
+        p = int(p)
+        self._set("p", p)
+        self._set("g", int(g) if g is not None else None)
+        self._set("public_key", int(public_key) if public_key is not None else None)
+        self._set("private_key", int(private_key) if private_key is not None else None)
+        self._set("mod_context", ModContext(p))
+        # (base, p) -> FixedBaseTable, filled by ElGamal.fixed_base_table
+        self._set("base_tables", {})
+        self._set("_table_sizes", {})
+
+    def approx_size(self):
+        """
+        Counts the tables built so far; each one is measured once.
+        """
+        size = super().approx_size()
+        for table_key, table in list(self.base_tables.items()):
+            table_size = self._table_sizes.get(table_key)
+            if table_size is None:
+                table_size = sum(sys.getsizeof(x) for row in table.rows for x in row)
+                self._table_sizes[table_key] = table_size
+            size += table_size
+        return size
+
+    def cipher(self):
+        """
+        ElGamal instance that reuses this key's derived state.
+        """
+        cipher = ElGamal(p=self.p, g=self.g, public_key=self.public_key, private_key=self.private_key)
+        cipher._mod_context = self.mod_context
+        cipher._base_tables = self.base_tables
+        return cipher
+
+
+def _mtimes(paths):
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append(os.stat(path).st_mtime_ns)
+        except OSError as err:
+            msg = f"ERROR: Could not open key file: {path}"
+            raise RuntimeError(msg) from err
+    return tuple(mtimes)
+
+
+class KeyCache:
+    """
+    LRU cache of key objects loaded from key files. An entry is reloaded
+    when the modification time of one of its files changes, and the least
+    recently used entries are evicted beyond max_entries / max_bytes
+    (max_bytes=None: no size limit). Entry sizes are refreshed on access,
+    so tables built since the last one are counted then. A key whose file
+    is gone is dropped.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, cache_key, paths, loader):
+        try:
+            mtimes = _mtimes(paths)
+        except RuntimeError:
+            # A key file is gone: its entry is stale
+            with self._lock:
+                old = self._entries.pop(cache_key, None)
+                if old is not None:
+                    self.total_bytes -= old[2]
+            raise
+
+        with self._lock:
+            cached = self._entries.get(cache_key)
+            if cached is not None and cached[0] == mtimes:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                key = cached[1]
+                size = key.approx_size()
+                if size != cached[2]:
+                    # Tables built since the last access
+                    self._entries[cache_key] = (mtimes, key, size)
+                    self.total_bytes += size - cached[2]
+                    self._evict()
+                return key
+            self.misses += 1
+
+        key = loader()
+        size = key.approx_size()
+
+        with self._lock:
+            old = self._entries.pop(cache_key, None)
+            if old is not None:
+                self.total_bytes -= old[2]
+            self._entries[cache_key] = (mtimes, key, size)
+            self.total_bytes += size
+            self._evict()
+        return key
+
+    def _evict(self):
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            _, (_, _, size) = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+
+    def get_rsa(self, public_key_file, private_key_file=None):
+        paths = [p for p in (public_key_file, private_key_file) if p is not None]
+
+        def load():
+            public = read_int_lines(public_key_file)
+            if len(public) < 2:
+                raise RuntimeError(f"ERROR: Invalid key file: {public_key_file}")
+            if private_key_file is None:
+                return RSAKey(public[0], e=public[1])
+
+            private = read_int_lines(private_key_file)
+            if len(private) < 2 or private[0] != public[0]:
+                raise RuntimeError("Public and private key moduli do not match")
+            return RSAKey(public[0], e=public[1], d=private[1], primes=private[2:])
+
+        return self._get(("rsa",) + tuple(paths), paths, load)
+
+    def get_elgamal(self, public_key_file, private_key_file=None):
+        paths = [p for p in (public_key_file, private_key_file) if p is not None]
+
+        def load():
+            public = read_int_lines(public_key_file)
+            if len(public) < 3:
+                raise RuntimeError(f"ERROR: Invalid key file: {public_key_file}")
+            private_key = None
+            if private_key_file is not None:
+                private = read_int_lines(private_key_file)
+                if not private:
+                    raise RuntimeError(f"ERROR: Invalid key file: {private_key_file}")
+                private_key = private[0]
+            return ElGamalKey(public[0], public[1], public[2], private_key)
+
+        return self._get(("elgamal",) + tuple(paths), paths, load)
+
+    def invalidate(self, *paths):
+        """
+        Drops every entry that was loaded from one of the given files
+        (or all entries when called without arguments).
+        """
+        with self._lock:
+            for cache_key in list(self._entries):
+                if not paths or any(p in cache_key[1:] for p in paths):
+                    _, _, size = self._entries.pop(cache_key)
+                    self.total_bytes -= size
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,215 @@
+# crypto_project/key_inventory.py
+
+import hashlib
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from . import instrumentation
+from .rsa_cipher import RSA
+from .elgamal_cipher import ElGamal
+
+
+DEFAULT_STOCK = 8
+# Bytes of the digest kept per issued public key
+SEEN_DIGEST_SIZE = 16
+# A kind fails after this many duplicates in a row (its prime range is
+# exhausted) or this many failed generations in a row
+MAX_DUPLICATE_RUN = 32
+MAX_FAILURE_RUN = 3
+
+
+def generate_key(algorithm, min_prime, max_prime, num_primes=2):
+    """
+    Worker side: generates one key and returns its components as a tuple
+    (RSA: n, e, d, primes / ElGamal: p, g, public key, private key).
+    """
+    with instrumentation.quiet():
+        if algorithm == "rsa":
+            cipher = RSA(n=1, e=1, d=1)
+            cipher.generate_keys(min_prime, max_prime, num_primes)
+            return cipher.n, cipher.e, cipher.d, tuple(cipher.primes)
+        cipher = ElGamal(p=1)
+        cipher.generate_keys(min_prime, max_prime)
+        return cipher.p, cipher.g, cipher.public_key, cipher.private_key
+
+
+def public_digest(algorithm, components):
+    """
+    Compact fingerprint of a generated key's public part (RSA: n, e /
+    ElGamal: p, g, public key).
+    """
+    public = components[:2] if algorithm == "rsa" else components[:3]
+    text = algorithm + ":" + ":".join(str(value) for value in public)
+    return hashlib.blake2b(text.encode("ascii"), digest_size=SEEN_DIGEST_SIZE).digest()
+
+
+def key_from_components(algorithm, components):
+    if algorithm == "rsa":
+        n, e, d, primes = components
+        return RSA(n=n, e=e, d=d, primes=list(primes))
+    p, g, public_key, private_key = components
+    return ElGamal(p=p, g=g, public_key=public_key, private_key=private_key)
+
+
+class KeyInventory:
+    """
+    Keeps a stock of freshly generated keys per (algorithm, min_prime,
+    max_prime, num_primes) and refills it in the background on a process
+    pool. Every key is handed out once: the digest of every public key
+    generated so far is kept for the inventory's lifetime, and a key
+    generated again (likely for narrow prime ranges) is dropped.
+    A kind that keeps failing makes take() raise RuntimeError; the next
+    take() starts over.
+    """
+
+    def __init__(self, workers=None):
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        self._condition = threading.Condition()
+        self._stock = {}
+        self._targets = {}
+        self._in_flight = {}
+        # Digests of every public key generated, never forgotten
+        self._seen = set()
+        self._closed = False
+        self._errors = {}
+        # Per kind: duplicates / failed generations in a row
+        self._duplicate_runs = {}
+        self._failure_runs = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.duplicates = 0
+
+    @staticmethod
+    def _spec(algorithm, min_prime, max_prime, num_primes=2):
+        algorithm = algorithm.lower()
+        if algorithm not in ("rsa", "elgamal"):
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        return algorithm, int(min_prime), int(max_prime), int(num_primes) if algorithm == "rsa" else 1
+
+    def add_target(self, algorithm, min_prime, max_prime, num_primes=2, stock=DEFAULT_STOCK):
+        """
+        Keeps `stock` keys of this kind ready from now on.
+        """
+        spec = self._spec(algorithm, min_prime, max_prime, num_primes)
+        with self._condition:
+            self._targets[spec] = stock
+            self._stock.setdefault(spec, deque())
+            self._in_flight.setdefault(spec, 0)
+            self._refill(spec)
+        return spec
+
+    def _refill(self, spec):
+        # Caller holds the lock
+        if self._closed or spec in self._errors:
+            return
+        algorithm, min_prime, max_prime, num_primes = spec
+        missing = self._targets.get(spec, 0) - len(self._stock[spec]) - self._in_flight[spec]
+        for _ in range(max(0, missing)):
+            try:
+                future = self._pool.submit(generate_key, algorithm, min_prime, max_prime, num_primes)
+            except RuntimeError as err:
+                # Broken or shut down pool
+                self._fail(spec, err)
+                return
+            self._in_flight[spec] += 1
+            future.add_done_callback(lambda f, spec=spec: self._arrived(spec, f))
+
+    def _fail(self, spec, err):
+        self._errors.setdefault(spec, err)
+        self._condition.notify_all()
+
+    def _arrived(self, spec, future):
+        with self._condition:
+            self._in_flight[spec] -= 1
+            try:
+                components = future.result()
+            except Exception as err:
+                # Retried a few times: bad parameters or a dead worker
+                # fail every time
+                self._failure_runs[spec] = self._failure_runs.get(spec, 0) + 1
+                if self._failure_runs[spec] >= MAX_FAILURE_RUN:
+                    self._fail(spec, err)
+                    return
+                self._refill(spec)
+                return
+            self._failure_runs[spec] = 0
+
+            digest = public_digest(spec[0], components)
+            if digest in self._seen:
+                self.duplicates += 1
+                self._duplicate_runs[spec] = self._duplicate_runs.get(spec, 0) + 1
+                if self._duplicate_runs[spec] >= MAX_DUPLICATE_RUN:
+                    self._fail(spec, RuntimeError(
+                        f"ERROR: {MAX_DUPLICATE_RUN} duplicate keys in a row, prime range exhausted"))
+                    return
+            else:
+                self._seen.add(digest)
+                self._duplicate_runs[spec] = 0
+                self._stock[spec].append(components)
+                self._condition.notify_all()
+            self._refill(spec)
+
+    def take(self, algorithm, min_prime, max_prime, num_primes=2, timeout=None):
+        """
+        Returns a ready RSA / ElGamal instance. If the stock is empty the
+        call waits for the background workers (registering the kind as a
+        target first if needed). Raises TimeoutError after timeout seconds.
+        """
+        spec = self._spec(algorithm, min_prime, max_prime, num_primes)
+        with self._condition:
+            if spec not in self._targets:
+                self._targets[spec] = DEFAULT_STOCK
+                self._stock[spec] = deque()
+                self._in_flight[spec] = 0
+                self._refill(spec)
+
+            stock = self._stock[spec]
+            if stock:
+                self.hits += 1
+            else:
+                self.misses += 1
+                ready = self._condition.wait_for(
+                    lambda: stock or self._closed or spec in self._errors, timeout)
+                if not ready:
+                    raise TimeoutError("No key available in time")
+                if not stock:
+                    if spec in self._errors:
+                        # Reported once; the next take() tries again
+                        err = self._errors.pop(spec)
+                        self._duplicate_runs[spec] = 0
+                        self._failure_runs[spec] = 0
+                        self._refill(spec)
+                        raise RuntimeError(f"Key generation failed: {err}") from err
+                    raise RuntimeError("Key inventory is closed")
+
+            components = stock.popleft()
+            self._refill(spec)
+
+        return key_from_components(spec[0], components)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "stock": {f"{s[0]}[{s[1]}-{s[2]}]x{s[3]}": len(q) for s, q in self._stock.items()},
+                "in_flight": sum(self._in_flight.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "duplicates": self.duplicates,
+                "seen": len(self._seen),
+            }
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,308 @@
+# crypto_project/keyring.py
+
+import hashlib
+import mmap
+import os
+import struct
+
+
+MAGIC = b"CPKR"
+VERSION = 1
+
+# magic, version, reserved, record count, slot count, index offset
+HEADER = struct.Struct(">4sHHIIQ")
+# key hash, record offset (0 = empty slot, records never start at 0)
+SLOT = struct.Struct(">QQ")
+# algorithm, component count, key id length
+RECORD_HEAD = struct.Struct(">BBH")
+INT_LENGTH = struct.Struct(">I")
+
+FINGERPRINT_SIZE = 32
+NONE_LENGTH = 0xFFFFFFFF
+
+ALGORITHMS = {1: "rsa", 2: "elgamal"}
+ALGORITHM_CODES = {name: code for code, name in ALGORITHMS.items()}
+
+
+def fingerprint(algorithm, public_components):
+    """
+    SHA-256 over the algorithm name and the public key components
+    (RSA: n, e / ElGamal: p, g, public key) as a hex string.
+    """
+    text = algorithm + ":" + ":".join(str(int(c)) for c in public_components)
+    return hashlib.sha256(text.encode("ascii")).hexdigest()
+
+
+def _lookup_hash(kind, value):
+    digest = hashlib.blake2b(kind + b":" + value, digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def _encode_int(value):
+    if value is None:
+        return INT_LENGTH.pack(NONE_LENGTH)
+    value = int(value)
+    if value < 0:
+        raise ValueError("Key components must be >= 0")
+    data = value.to_bytes((value.bit_length() + 7) // 8, "big")
+    return INT_LENGTH.pack(len(data)) + data
+
+
+class KeyEntry:
+    """
+    One keyring record. components is (n, e, d, *primes) for RSA and
+    (p, g, public_key, private_key) for ElGamal; missing parts are None.
+    """
+
+    def __init__(self, algorithm, key_id, fingerprint, components):
+        self.algorithm = algorithm
+        self.key_id = key_id
+        self.fingerprint = fingerprint
+        self.components = tuple(components)
+
+    def public_components(self):
+        return self.components[:2] if self.algorithm == "rsa" else self.components[:3]
+
+    def __repr__(self):
+        return f"KeyEntry({self.algorithm!r}, {self.key_id!r}, {self.fingerprint[:16]}...)"
+
+
+class KeyringWriter:
+    """
+    Collects key entries and writes them as one indexed keyring file.
+    An existing keyring at path is loaded first, so writing adds to it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+
+        if os.path.exists(path):
+            with Keyring(path) as keyring:
+                for entry in keyring:
+                    self.entries[entry.key_id] = entry
+
+    def add(self, algorithm, key_id, components, replace=False):
+        if algorithm not in ALGORITHM_CODES:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        if key_id in self.entries and not replace:
+            raise ValueError(f"Duplicate key id: {key_id}")
+
+        components = [None if c is None else int(c) for c in components]
+        public = components[:2] if algorithm == "rsa" else components[:3]
+        if any(c is None for c in public):
+            raise ValueError("Public key components must be present")
+
+        entry = KeyEntry(algorithm, key_id, fingerprint(algorithm, public), components)
+        self.entries[key_id] = entry
+        return entry
+
+    def add_rsa(self, key_id, n, e, d=None, primes=None, replace=False):
+        return self.add("rsa", key_id, [n, e, d] + list(primes or []), replace)
+
+    def add_elgamal(self, key_id, p, g, public_key, private_key=None, replace=False):
+        return self.add("elgamal", key_id, [p, g, public_key, private_key], replace)
+
+    def write(self):
+        """
+        Writes header, records and index to a temporary file and moves it
+        over path, so readers never see a half written keyring.
+        """
+        # Two index entries (id, fingerprint) per key, load factor <= 1/2
+        slot_count = 8
+        while slot_count < 4 * len(self.entries):
+            slot_count *= 2
+
+        body = bytearray()
+        slots = [None] * slot_count
+        mask = slot_count - 1
+
+        for entry in self.entries.values():
+            offset = HEADER.size + len(body)
+            key_id = entry.key_id.encode("utf-8")
+            body += RECORD_HEAD.pack(ALGORITHM_CODES[entry.algorithm], len(entry.components), len(key_id))
+            body += key_id
+            body += bytes.fromhex(entry.fingerprint)
+            for component in entry.components:
+                body += _encode_int(component)
+
+            for kind, value in ((b"id", key_id), (b"fp", bytes.fromhex(entry.fingerprint))):
+                key_hash = _lookup_hash(kind, value)
+                slot = key_hash & mask
+                while slots[slot] is not None:
+                    slot = (slot + 1) & mask
+                slots[slot] = (key_hash, offset)
+
+        index_offset = HEADER.size + len(body)
+        header = HEADER.pack(MAGIC, VERSION, 0, len(self.entries), slot_count, index_offset)
+
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(header)
+                f.write(body)
+                for slot in slots:
+                    f.write(SLOT.pack(*(slot or (0, 0))))
+            os.replace(tmp_path, self.path)
+        except OSError:
+            msg = f"Could not write keyring file: {self.path}"
+            raise RuntimeError(msg)
+
+
+class Keyring:
+    """
+    Read-only, memory mapped keyring. Lookups by key id or fingerprint
+    hash into the index and decode only the matching record.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            msg = f"ERROR: Could not open keyring file: {path}"
+            raise RuntimeError(msg)
+
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise RuntimeError(f"ERROR: Invalid keyring file: {path}")
+
+        magic, version, _, count, slot_count, index_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise RuntimeError(f"ERROR: Invalid keyring file: {path}")
+
+        self.count = count
+        self.slot_count = slot_count
+        self.index_offset = index_offset
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, key_id):
+        return self._find(b"id", key_id.encode("utf-8")) is not None
+
+    def __iter__(self):
+        offset = HEADER.size
+        for _ in range(self.count):
+            entry, offset = self._read_record(offset)
+            yield entry
+
+    def _read_record(self, offset):
+        buf = self._map
+        code, component_count, id_length = RECORD_HEAD.unpack_from(buf, offset)
+        offset += RECORD_HEAD.size
+        key_id = bytes(buf[offset:offset + id_length]).decode("utf-8")
+        offset += id_length
+        fp = bytes(buf[offset:offset + FINGERPRINT_SIZE]).hex()
+        offset += FINGERPRINT_SIZE
+
+        components = []
+        for _ in range(component_count):
+            (length,) = INT_LENGTH.unpack_from(buf, offset)
+            offset += INT_LENGTH.size
+            if length == NONE_LENGTH:
+                components.append(None)
+                continue
+            components.append(int.from_bytes(buf[offset:offset + length], "big"))
+            offset += length
+
+        return KeyEntry(ALGORITHMS[code], key_id, fp, components), offset
+
+    def _record_matches(self, offset, kind, value):
+        _, _, id_length = RECORD_HEAD.unpack_from(self._map, offset)
+        start = offset + RECORD_HEAD.size
+        if kind == b"id":
+            return self._map[start:start + id_length] == value
+        start += id_length
+        return self._map[start:start + FINGERPRINT_SIZE] == value
+
+    def _find(self, kind, value):
+        key_hash = _lookup_hash(kind, value)
+        mask = self.slot_count - 1
+        slot = key_hash & mask
+
+        for _ in range(self.slot_count):
+            slot_hash, offset = SLOT.unpack_from(self._map, self.index_offset + slot * SLOT.size)
+            if offset == 0:
+                return None
+            if slot_hash == key_hash and self._record_matches(offset, kind, value):
+                return offset
+            slot = (slot + 1) & mask
+        return None
+
+    def get(self, key_id):
+        offset = self._find(b"id", key_id.encode("utf-8"))
+        if offset is None:
+            raise KeyError(key_id)
+        return self._read_record(offset)[0]
+
+    def get_by_fingerprint(self, fp):
+        offset = self._find(b"fp", bytes.fromhex(fp))
+        if offset is None:
+            raise KeyError(fp)
+        return self._read_record(offset)[0]
+
+
+def read_int_lines(file_path):
+    """
+    Reads a decimal key file (one integer per line).
+    """
+    try:
+        with open(file_path, "r", encoding="utf-8") as key_file:
+            lines = key_file.read().strip().splitlines()
+    except OSError:
+        msg = f"ERROR: Could not open key file: {file_path}"
+        raise RuntimeError(msg)
+    return [int(line.strip()) for line in lines if line.strip()]
+
+
+def import_rsa_key_files(writer, key_id, public_key_file, private_key_file=None):
+    """
+    Adds an RSA key stored as text files (n, e / n, d[, primes...]).
+    """
+    public = read_int_lines(public_key_file)
+    if len(public) < 2:
+        raise RuntimeError(f"ERROR: Invalid key file: {public_key_file}")
+    n, e = public[0], public[1]
+
+    d = None
+    primes = None
+    if private_key_file is not None:
+        private = read_int_lines(private_key_file)
+        if len(private) < 2 or private[0] != n:
+            raise RuntimeError("Public and private key moduli do not match")
+        d = private[1]
+        primes = private[2:]
+
+    return writer.add_rsa(key_id, n, e, d, primes)
+
+
+def import_elgamal_key_files(writer, key_id, public_key_file, private_key_file=None):
+    """
+    Adds an ElGamal key stored as text files (p, g, public key / private key).
+    """
+    public = read_int_lines(public_key_file)
+    if len(public) < 3:
+        raise RuntimeError(f"ERROR: Invalid key file: {public_key_file}")
+
+    private_key = None
+    if private_key_file is not None:
+        private = read_int_lines(private_key_file)
+        if not private:
+            raise RuntimeError(f"ERROR: Invalid key file: {private_key_file}")
+        private_key = private[0]
+
+    return writer.add_elgamal(key_id, public[0], public[1], public[2], private_key)
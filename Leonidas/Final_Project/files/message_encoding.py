@@ -0,0 +1,138 @@
+# crypto_project/message_encoding.py
+
+import codecs
+from .rsa_cipher import RSA
+from .elgamal_cipher import ElGamal
+
+
+# ISO/IEC 7816-4 padding: one marker byte, then zeros up to the block end.
+# The marker ends the message, so streams of unknown length need no
+# length prefix.
+PAD_MARKER = 0x80
+
+
+def block_size(modulus):
+    """
+    Payload bytes per block. Blocks are stored as value + 1, so every
+    block is in [1, 2^(8B)] and stays below an odd modulus (ElGamal
+    cannot encrypt 0).
+    """
+    size = (int(modulus).bit_length() - 1) // 8
+    if size <= 0:
+        raise ValueError("ERROR: Modulus too small to hold one byte per block")
+    return size
+
+
+def cipher_modulus(cipher):
+    if isinstance(cipher, RSA):
+        return cipher.n
+    if isinstance(cipher, ElGamal):
+        return cipher.p
+    raise ValueError(f"Unsupported cipher: {type(cipher).__name__}")
+
+
+def _byte_chunks(message):
+    """
+    Accepts bytes-like or str, or an iterable of either, and yields
+    bytes-like chunks (text is UTF-8 encoded incrementally).
+    """
+    if isinstance(message, (bytes, bytearray, memoryview)):
+        yield message
+        return
+    if isinstance(message, str):
+        yield message.encode("utf-8")
+        return
+
+    encoder = codecs.getincrementalencoder("utf-8")()
+    for chunk in message:
+        yield encoder.encode(chunk) if isinstance(chunk, str) else chunk
+    tail = encoder.encode("", final=True)
+    if tail:
+        yield tail
+
+
+def encode_blocks(message, modulus):
+    """
+    Lazily packs a message into integers below modulus. Full blocks are
+    read straight from the input through memoryview slices; only a block
+    split across two input chunks is copied.
+    """
+    size = block_size(modulus)
+    carry = bytearray()
+
+    for chunk in _byte_chunks(message):
+        view = memoryview(chunk).cast("B")
+        pos = 0
+        if carry:
+            take = min(size - len(carry), len(view))
+            carry += view[:take]
+            pos = take
+            if len(carry) < size:
+                continue
+            yield int.from_bytes(carry, "big") + 1
+            carry = bytearray()
+
+        end = pos + (len(view) - pos) // size * size
+        for start in range(pos, end, size):
+            yield int.from_bytes(view[start:start + size], "big") + 1
+        carry += view[end:]
+
+    carry.append(PAD_MARKER)
+    carry += bytes(size - len(carry))
+    yield int.from_bytes(carry, "big") + 1
+
+
+def decode_blocks(blocks, modulus):
+    """
+    Reverses encode_blocks and yields the message as bytes chunks (one
+    per block). The last block is held back until the input ends, so
+    its padding can be removed.
+    """
+    size = block_size(modulus)
+    limit = 1 << (8 * size)
+    previous = None
+
+    for value in blocks:
+        value = int(value) - 1
+        if not 0 <= value < limit:
+            raise ValueError("ERROR: Block out of range for this modulus")
+        if previous is not None:
+            yield previous
+        previous = value.to_bytes(size, "big")
+
+    if previous is None:
+        raise ValueError("ERROR: Encoded message is empty")
+    end = previous.rstrip(b"\x00")
+    if not end or end[-1] != PAD_MARKER:
+        raise ValueError("ERROR: Invalid message padding")
+    if len(end) > 1:
+        yield end[:-1]
+
+
+def decode_text(blocks, modulus):
+    """
+    Like decode_blocks, but yields UTF-8 decoded text chunks.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in decode_blocks(blocks, modulus):
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    decoder.decode(b"", final=True)
+
+
+def encrypt_message(cipher, message):
+    """
+    Generator of ciphertexts (RSA: int / ElGamal: (c1, c2)), one per block.
+    """
+    for block in encode_blocks(message, cipher_modulus(cipher)):
+        yield cipher.encrypt(block)
+
+
+def decrypt_message(cipher, cipher_texts, text=False):
+    """
+    Generator of plaintext chunks (bytes, or str with text=True).
+    """
+    modulus = cipher_modulus(cipher)
+    blocks = (cipher.decrypt(c) for c in cipher_texts)
+    return decode_text(blocks, modulus) if text else decode_blocks(blocks, modulus)
@@ -0,0 +1,184 @@
+# crypto_project/multi_recipient.py
+
+import multiprocessing
+import os
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from .key_cache import RSAKey, ElGamalKey
+
+
+# Messages and recipients per tile: one tile is encrypted by one worker,
+# recipient by recipient, so each key's tables stay hot for a whole row
+DEFAULT_TILE_MESSAGES = 256
+DEFAULT_TILE_RECIPIENTS = 16
+# Keys (with their fixed-base tables) kept per worker process
+MAX_CACHED_KEYS = 1024
+
+# Per process: (algorithm, components) -> RSAKey / ElGamalKey
+_keys = OrderedDict()
+
+
+def _key(algorithm, components):
+    """
+    Worker side: key with its precomputation, built once per process.
+    """
+    cache_key = (algorithm, components)
+    key = _keys.get(cache_key)
+    if key is not None:
+        _keys.move_to_end(cache_key)
+        return key
+    if algorithm == "rsa":
+        key = RSAKey(components[0], e=components[1])
+    else:
+        key = ElGamalKey(components[0], g=components[1], public_key=components[2])
+    _keys[cache_key] = key
+    while len(_keys) > MAX_CACHED_KEYS:
+        _keys.popitem(last=False)
+    return key
+
+
+def encrypt_tile(algorithm, recipients, messages):
+    """
+    Worker side: encrypts every message for every recipient of one tile
+    (a list of public key components of one algorithm).
+    Returns one list of ciphertexts per recipient.
+    """
+    results = []
+    for components in recipients:
+        cipher = _key(algorithm, components).cipher()
+        if algorithm == "rsa":
+            results.append(cipher.encrypt_batch(messages))
+        else:
+            results.append([cipher.encrypt(m) for m in messages])
+    return results
+
+
+def _check_fits(recipient_id, algorithm, components, low, high):
+    modulus = components[0]
+    if algorithm == "rsa" and (low < 0 or high >= modulus):
+        raise ValueError(f"ERROR: Message must be in range [0, n-1] for recipient {recipient_id}")
+    if algorithm == "elgamal" and (low <= 0 or high >= modulus):
+        raise ValueError(f"ERROR: Message must be in range [1, p-1] for recipient {recipient_id}")
+
+
+class MultiRecipientEncryptor:
+    """
+    Encrypts one stream of integer messages for many RSA (n, e) and
+    ElGamal (p, g, public key) recipients. Recipients are grouped by
+    algorithm and modulus size and cut into tiles of tile_recipients keys
+    x tile_messages messages, which run on a process pool (inline with
+    workers=1). Workers keep each key's precomputation (modular context,
+    fixed-base tables) across tiles.
+    """
+
+    def __init__(self, recipients, workers=None, tile_messages=DEFAULT_TILE_MESSAGES,
+                 tile_recipients=DEFAULT_TILE_RECIPIENTS):
+        """
+        recipients: iterable of (recipient_id, algorithm, components).
+        """
+        if tile_messages <= 0 or tile_recipients <= 0:
+            raise ValueError("tile sizes must be > 0")
+        self.recipients = []
+        seen = set()
+        for recipient_id, algorithm, components in recipients:
+            if algorithm not in ("rsa", "elgamal"):
+                raise ValueError(f"Unknown algorithm: {algorithm}")
+            count = 2 if algorithm == "rsa" else 3
+            if len(components) < count:
+                raise ValueError(f"ERROR: Recipient {recipient_id} needs {count} key components")
+            if recipient_id in seen:
+                raise ValueError(f"ERROR: Duplicate recipient: {recipient_id}")
+            seen.add(recipient_id)
+            self.recipients.append((recipient_id, algorithm, tuple(int(c) for c in components[:count])))
+        if not self.recipients:
+            raise ValueError("ERROR: At least one recipient is needed")
+
+        self.tile_messages = tile_messages
+        self.tile_recipients = tile_recipients
+        self.workers = workers
+        # Tiles in flight before encrypt_stream waits for results
+        self._lookahead = 2 * (workers or os.cpu_count() or 1)
+        self._pool = None
+        if workers != 1:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        self.tiles = self._make_tiles()
+
+    def _make_tiles(self):
+        """
+        [(algorithm, [recipient position, ...]), ...], recipients of one
+        algorithm and modulus bit length together.
+        """
+        groups = {}
+        for position, (_, algorithm, components) in enumerate(self.recipients):
+            groups.setdefault((algorithm, components[0].bit_length()), []).append(position)
+        tiles = []
+        for (algorithm, _), positions in sorted(groups.items()):
+            for start in range(0, len(positions), self.tile_recipients):
+                tiles.append((algorithm, positions[start:start + self.tile_recipients]))
+        return tiles
+
+    def _submit(self, algorithm, positions, messages):
+        recipients = [self.recipients[i][2] for i in positions]
+        if self._pool is None:
+            return encrypt_tile(algorithm, recipients, messages)
+        return self._pool.submit(encrypt_tile, algorithm, recipients, messages)
+
+    def _chunks(self, messages):
+        messages = iter(messages)
+        while True:
+            chunk = [int(m) for m in islice(messages, self.tile_messages)]
+            if not chunk:
+                return
+            low, high = min(chunk), max(chunk)
+            for recipient_id, algorithm, components in self.recipients:
+                _check_fits(recipient_id, algorithm, components, low, high)
+            yield chunk
+
+    def encrypt_stream(self, messages):
+        """
+        Yields (recipient_id, offset, ciphertexts) for every chunk of
+        tile_messages messages starting at offset, recipients in the
+        order they were given. messages may be any iterable (also an
+        unbounded one); a few chunks are encrypted ahead.
+        """
+        pending = deque()
+        offset = 0
+        for chunk in self._chunks(messages):
+            pending.append((offset, [self._submit(algorithm, positions, chunk)
+                                     for algorithm, positions in self.tiles]))
+            offset += len(chunk)
+            while len(pending) * len(self.tiles) > self._lookahead and len(pending) > 1:
+                yield from self._collect(*pending.popleft())
+        while pending:
+            yield from self._collect(*pending.popleft())
+
+    def _collect(self, offset, tiles):
+        by_position = {}
+        for (_, positions), tile in zip(self.tiles, tiles):
+            results = tile if self._pool is None else tile.result()
+            by_position.update(zip(positions, results))
+        for position, (recipient_id, _, _) in enumerate(self.recipients):
+            yield recipient_id, offset, by_position[position]
+
+    def encrypt(self, messages):
+        """
+        {recipient_id: [ciphertext per message]}, in recipient order.
+        """
+        result = OrderedDict((recipient_id, []) for recipient_id, _, _ in self.recipients)
+        for recipient_id, _, ciphertexts in self.encrypt_stream(messages):
+            result[recipient_id].extend(ciphertexts)
+        return result
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
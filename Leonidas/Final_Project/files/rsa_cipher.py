@@ -1,18 +1,29 @@
 # crypto_project/rsa_cipher.py
 
-import sys
+import math
 from .cipher_base import CipherBase
-from .bootstrap import Bootstrap
+from . import instrumentation
+from .instrumentation import log
+from .bootstrap import Bootstrap, prime_index
 from .bbs_random import BBSRandom
+from .checkpoint import tick
 from .crypto_utils import (
     are_relatively_prime,
     mod_inverse,
     mod_pow,
+    mod_pow_batch,
     find_gcd,
+    ModContext,
+    BUDGET_CHECK_INTERVAL,
 )
 from .string_utils import color_string
 
 
+# Number of prime factors of n (RFC 8017 multi-prime RSA)
+MIN_PRIMES = 2
+MAX_PRIMES = 5
+
+
 class RSA(CipherBase):
     """
     RSA class in Python.
@@ -28,6 +39,8 @@ class RSA(CipherBase):
         n: int = None,
         e: int = None,
         d: int = None,
+        primes: list = None,
+        num_primes: int = 2,
     ):
         self.public_key_file = public_key_file
         self.private_key_file = private_key_file
@@ -35,42 +48,109 @@ class RSA(CipherBase):
         self.n = None
         self.e = None
         self.d = None
+        self.primes = None
+        self._mod_context = None
+        self._crt = None
 
         # If numeric key components were provided directly, use them
         if n is not None:
             self.n = int(n)
             self.e = int(e) if e is not None else None
             self.d = int(d) if d is not None else None
+            self.primes = [int(r) for r in primes] if primes else None
+            if self.primes and math.prod(self.primes) != self.n:
+                raise ValueError("ERROR: The primes do not multiply to n")
             return
 
         # Otherwise try to load from files (legacy behaviour) or generate new keys
         if load_from_files and self.load_keys():
-            sys.stderr.write("Found existing RSA keys.\n")
-            sys.stderr.write(f"  Public:  {self.public_key_file}\n")
-            sys.stderr.write(f"  Private: {self.private_key_file}\n")
+            log("Found existing RSA keys.\n")
+            log(f"  Public:  {self.public_key_file}\n")
+            log(f"  Private: {self.private_key_file}\n")
         else:
-            sys.stderr.write("No existing RSA keys found. Generating new keys...\n")
-            sys.stderr.write(f"  Prime range: [{min_prime}, {max_prime}]\n")
-            self.generate_keys(min_prime, max_prime)
+            log("No existing RSA keys found. Generating new keys...\n")
+            log(f"  Prime range: [{min_prime}, {max_prime}]\n")
+            self.generate_keys(min_prime, max_prime, num_primes)
             try:
                 self.save_keys()
             except RuntimeError:
                 # If saving fails, continue with in-memory keys
                 pass
-            sys.stderr.write("Keys generated\n")
-
-    def generate_keys(self, min_prime, max_prime):
-        bootstrap = Bootstrap()
-        sys.stderr.write("Generating prime p...\n")
-        p = bootstrap.generate_prime_in_range(min_prime, max_prime)
-        sys.stderr.write("Generating prime q...\n")
-        q = bootstrap.generate_prime_in_range(min_prime, max_prime)
+            log("Keys generated\n")
 
-        while p == q:
-            q = bootstrap.generate_prime_in_range(min_prime, max_prime)
+    @classmethod
+    def from_keyring(cls, keyring, key_id=None, fingerprint=None):
+        """
+        Builds an RSA instance from a keyring entry (by key id or fingerprint).
+        """
+        entry = keyring.get(key_id) if key_id is not None else keyring.get_by_fingerprint(fingerprint)
+        if entry.algorithm != "rsa":
+            raise RuntimeError(f"Keyring entry {entry.key_id} is not an RSA key")
+        n, e, d = entry.components[:3]
+        return cls(n=n, e=e, d=d, primes=list(entry.components[3:]))
+
+    @property
+    def mod_context(self):
+        """
+        ModContext for the current modulus, rebuilt only when n changes.
+        """
+        if self._mod_context is None or self._mod_context.modulus != self.n:
+            self._mod_context = ModContext(self.n)
+        return self._mod_context
 
-        n = p * q
-        phi_n = (p - 1) * (q - 1)
+    @property
+    def crt_params(self):
+        """
+        CRT parameters [(r_i, d_i, t_i), ...] as in RFC 8017 (multi-prime):
+        d_i = d mod (r_i - 1), t_i = (r_1 * ... * r_(i-1))^(-1) mod r_i.
+        None if the key has no (matching) prime factors.
+        """
+        if not self.primes or self.d is None:
+            return None
+
+        key = (self.n, self.d, tuple(self.primes))
+        if self._crt is None or self._crt[0] != key:
+            product = 1
+            for r in self.primes:
+                product *= r
+            if product != self.n:
+                # Cached as well, so a mismatch is not recomputed per decrypt
+                self._crt = (key, None)
+                return None
+
+            params = []
+            prefix = 1
+            for r in self.primes:
+                t = mod_inverse(prefix, r) if prefix > 1 else 1
+                params.append((r, self.d % (r - 1), t))
+                prefix *= r
+            self._crt = (key, params)
+        return self._crt[1]
+
+    @instrumentation.timed("rsa_keygen")
+    def generate_keys(self, min_prime, max_prime, num_primes=2, bootstrap=None):
+        if num_primes < MIN_PRIMES or num_primes > MAX_PRIMES:
+            raise ValueError(f"num_primes must be in [{MIN_PRIMES}, {MAX_PRIMES}]")
+
+        index = prime_index(min_prime, max_prime)
+        if index is not None and len(index.primes) < num_primes:
+            raise ValueError(f"ERROR: [{min_prime}, {max_prime}] holds {len(index.primes)} primes, "
+                             f"{num_primes} distinct primes needed")
+
+        bootstrap = bootstrap or Bootstrap()
+        primes = []
+        while len(primes) < num_primes:
+            log(f"Generating prime {len(primes) + 1} of {num_primes}...\n")
+            r = bootstrap.generate_prime_in_range(min_prime, max_prime)
+            while r in primes:
+                r = bootstrap.generate_prime_in_range(min_prime, max_prime)
+            primes.append(r)
+
+        n = 1
+        phi_n = 1
+        for r in primes:
+            n *= r
+            phi_n *= r - 1
         e = 65537
 
         while not are_relatively_prime(e, phi_n):
@@ -84,12 +164,16 @@ class RSA(CipherBase):
         self.n = n
         self.e = e
         self.d = d
+        self.primes = primes
 
-    def save_key_file(self, file_path, exponent):
+    def save_key_file(self, file_path, exponent, primes=None):
         try:
             with open(file_path, "w", encoding="utf-8") as f:
                 f.write(str(self.n) + "\n")
                 f.write(str(exponent) + "\n")
+                # Private key files may list the prime factors of n (one per line)
+                for r in primes or []:
+                    f.write(str(r) + "\n")
             return True
         except OSError:
             return False
@@ -99,11 +183,18 @@ class RSA(CipherBase):
             msg = f"Could not create public key file: {self.public_key_file}"
             raise RuntimeError(msg)
 
-        if not self.save_key_file(self.private_key_file, self.d):
+        if not self.save_key_file(self.private_key_file, self.d, self.primes):
             msg = f"Could not create private key file: {self.private_key_file}"
             raise RuntimeError(msg)
 
     def read_key_file(self, file_path):
+        n, e_or_d, _ = self.read_key_file_with_primes(file_path)
+        return n, e_or_d
+
+    def read_key_file_with_primes(self, file_path):
+        """
+        Reads (n, e_or_d, primes); primes is None for two line key files.
+        """
         try:
             with open(file_path, "r", encoding="utf-8") as key_file:
                 lines = key_file.read().strip().splitlines()
@@ -117,7 +208,8 @@ class RSA(CipherBase):
 
         n = int(lines[0].strip())
         e_or_d = int(lines[1].strip())
-        return n, e_or_d
+        primes = [int(line.strip()) for line in lines[2:] if line.strip()]
+        return n, e_or_d, primes or None
 
     def load_keys(self):
         # Public Key
@@ -130,18 +222,25 @@ class RSA(CipherBase):
 
         # Private Key
         try:
-            n_priv, d = self.read_key_file(self.private_key_file)
+            n_priv, d, primes = self.read_key_file_with_primes(self.private_key_file)
             if n_priv != self.n:
                 raise RuntimeError("Public and private key moduli do not match")
             self.d = d
+            self.primes = primes
         except RuntimeError:
             return False
 
         return True
 
-    def pollards_rho(self, n):
+    @instrumentation.timed("rsa_pollards_rho")
+    def pollards_rho(self, n, budget=None, checkpoint=None, bootstrap=None):
         """
-        Factorization of n using Pollard's Rho.
+        Factorization of n using Pollard's Rho. An optional Budget (see
+        attack_planner) is charged every BUDGET_CHECK_INTERVAL iterations
+        and stops the search by raising BudgetExceeded. With a Checkpoint
+        the walk position is saved periodically and a saved walk for the
+        same n is resumed. Restarts draw their start values from a
+        BBSRandom seeded by bootstrap (if given).
         """
         n = int(n)
         if n == 1:
@@ -152,8 +251,23 @@ class RSA(CipherBase):
         x = 5
         y = 26
         d = 1
+        iterations = 0
+        rng = None
 
+        problem = (n,)
+        if checkpoint is not None:
+            state = checkpoint.load("rho", problem)
+            if state is not None:
+                x, y, iterations = state["x"], state["y"], state["iterations"]
+
+        def save():
+            checkpoint.save("rho", problem, {"x": x, "y": y, "iterations": iterations})
+
+        track = budget is not None or checkpoint is not None
         while d == 1:
+            iterations += 1
+            if track and iterations % BUDGET_CHECK_INTERVAL == 0:
+                tick(budget, checkpoint, "rho", problem, BUDGET_CHECK_INTERVAL, save)
             x = (x * x + 1) % n
             y = (y * y + 1) % n
             y = (y * y + 1) % n
@@ -164,105 +278,140 @@ class RSA(CipherBase):
             d = find_gcd(diff, n)
 
             if d == n:
-                rng = BBSRandom()
+                if instrumentation.ENABLED:
+                    instrumentation.count("rho_restarts")
+                if rng is None:
+                    rng = BBSRandom(bootstrap=bootstrap)
                 x = rng.rand() % n
                 y = rng.rand() % n
                 d = 1
 
+        if checkpoint is not None:
+            checkpoint.clear("rho", problem)
+        if instrumentation.ENABLED:
+            instrumentation.count("rho_iterations", iterations)
         return d
 
-    def attack(self, cipher_file_path, target_pubkey_path):
+    @instrumentation.timed("rsa_attack")
+    def attack(self, cipher_file_path, target_pubkey_path, budget=None):
         """
         Attack: Factorization of the target modulus and recovery of the plaintext.
         """
-        sys.stderr.write("\n=== RSA (Factorization) ===\n\n")
+        log("\n=== RSA (Factorization) ===\n\n")
 
-        sys.stderr.write(f"Step 1: Read public key {target_pubkey_path}...\n\n")
+        log(f"Step 1: Read public key {target_pubkey_path}...\n\n")
         n_target, e_target = self.read_key_file(target_pubkey_path)
 
-        sys.stderr.write("Step 2: Finding divisor of n ...\n\n")
-        p = self.pollards_rho(n_target)
+        log("Step 2: Finding divisor of n ...\n\n")
+        p = self.pollards_rho(n_target, budget)
         q = n_target // p
 
-        sys.stderr.write(f"Step 3: Calculating phi({n_target}) ...\n\n")
+        log(f"Step 3: Calculating phi({n_target}) ...\n\n")
         phi = (p - 1) * (q - 1)
 
-        sys.stderr.write("Step 4: Calculating private exponent d ...\n\n")
+        log("Step 4: Calculating private exponent d ...\n\n")
         d_target = mod_inverse(e_target, phi)
 
-        sys.stderr.write(f"Step 5: Reading ciphertext from {cipher_file_path}...\n")
+        log(f"Step 5: Reading ciphertext from {cipher_file_path}...\n")
         text = self.read_file(cipher_file_path)
         cipher_text = int(text.strip())
 
         plain_text = mod_pow(cipher_text, d_target, n_target)
         msg = color_string(str(plain_text))
-        sys.stderr.write("\n Successfully decrypted message: " + msg + "\n")
+        log("\n Successfully decrypted message: " + msg + "\n")
 
         return plain_text
     
-    def attack_from_value(self, cipher_text, target_pubkey_path="target_rsa_key.pub"):
+    @instrumentation.timed("rsa_attack")
+    def attack_from_value(self, cipher_text, target_pubkey_path="target_rsa_key.pub", budget=None,
+                          bootstrap=None):
         """
         Attack like in attack(), but the ciphertext is directly provided as a number
         instead of being read from a file.
         """
-        sys.stderr.write("\n=== RSA (Factorization) ===\n\n")
+        log("\n=== RSA (Factorization) ===\n\n")
 
-        sys.stderr.write(f"Step 1: Read public key {target_pubkey_path}...\n\n")
+        log(f"Step 1: Read public key {target_pubkey_path}...\n\n")
         n_target, e_target = self.read_key_file(target_pubkey_path)
 
-        sys.stderr.write("Step 2: Finding divisor of n ...\n\n")
-        p = self.pollards_rho(n_target)
+        log("Step 2: Finding divisor of n ...\n\n")
+        p = self.pollards_rho(n_target, budget, bootstrap=bootstrap)
         q = n_target // p
 
-        sys.stderr.write(f"Step 3: Calculating phi({n_target}) ...\n\n")
+        log(f"Step 3: Calculating phi({n_target}) ...\n\n")
         phi = (p - 1) * (q - 1)
 
-        sys.stderr.write("Step 4: Calculating private exponent d ...\n\n")
+        log("Step 4: Calculating private exponent d ...\n\n")
         d_target = mod_inverse(e_target, phi)
 
-        sys.stderr.write("Step 5: Decrypting ciphertext value ...\n")
+        log("Step 5: Decrypting ciphertext value ...\n")
         cipher_text = int(cipher_text)
         plain_text = mod_pow(cipher_text, d_target, n_target)
         msg = color_string(str(plain_text))
-        sys.stderr.write("\n Successfully decrypted message: " + msg + "\n")
+        log("\n Successfully decrypted message: " + msg + "\n")
 
         return plain_text
 
-    def attack_from_components(self, cipher_text, n_target, e_target):
+    @instrumentation.timed("rsa_attack")
+    def attack_from_components(self, cipher_text, n_target, e_target, budget=None, bootstrap=None):
         """
         Faktorisiere n_target und entschlüssele cipher_text, wenn die
         öffentlichen Komponenten (n_target, e_target) direkt übergeben werden.
         """
-        sys.stderr.write("\n=== RSA (Factorization) ===\n\n")
+        log("\n=== RSA (Factorization) ===\n\n")
 
-        sys.stderr.write("Step 2: Finding divisor of n ...\n\n")
-        p = self.pollards_rho(n_target)
+        log("Step 2: Finding divisor of n ...\n\n")
+        p = self.pollards_rho(n_target, budget, bootstrap=bootstrap)
         q = n_target // p
 
-        sys.stderr.write(f"Step 3: Calculating phi({n_target}) ...\n\n")
+        log(f"Step 3: Calculating phi({n_target}) ...\n\n")
         phi = (p - 1) * (q - 1)
 
-        sys.stderr.write("Step 4: Calculating private exponent d ...\n\n")
+        log("Step 4: Calculating private exponent d ...\n\n")
         d_target = mod_inverse(e_target, phi)
 
-        sys.stderr.write("Step 5: Decrypting ciphertext value ...\n")
+        log("Step 5: Decrypting ciphertext value ...\n")
         cipher_text = int(cipher_text)
         plain_text = mod_pow(cipher_text, d_target, n_target)
         msg = color_string(str(plain_text))
-        sys.stderr.write("\n Successfully decrypted message: " + msg + "\n")
+        log("\n Successfully decrypted message: " + msg + "\n")
 
         return plain_text
 
     def decrypt(self, cipher_text):
         cipher_text = int(cipher_text)
-        clear_text = mod_pow(cipher_text, self.d, self.n)
+        params = self.crt_params
+        if params is None:
+            return self.mod_context.pow(cipher_text, self.d)
+
+        # Garner recombination of m_i = c^(d_i) mod r_i
+        r_1, d_1, _ = params[0]
+        clear_text = pow(cipher_text, d_1, r_1)
+        product = r_1
+        for r, d_i, t in params[1:]:
+            m_i = pow(cipher_text, d_i, r)
+            h = ((m_i - clear_text) * t) % r
+            clear_text += product * h
+            product *= r
         return clear_text
 
     def encrypt(self, clear_text):
         clear_text = int(clear_text)
-        cipher_text = mod_pow(clear_text, self.e, self.n)
+        cipher_text = self.mod_context.pow(clear_text, self.e)
         return cipher_text
 
+    def decrypt_batch(self, cipher_texts):
+        """
+        Decrypts many ciphertexts at once (list or NumPy array).
+        """
+        return mod_pow_batch(cipher_texts, self.d, self.n)
+
+    def encrypt_batch(self, clear_texts):
+        """
+        Encrypts many plaintexts at once (list or NumPy array).
+        """
+        return mod_pow_batch(clear_texts, self.e, self.n)
+
     def run(self, operation, file_path):
         self.print_run_header("RSA", operation, file_path)
 
@@ -275,10 +424,10 @@ class RSA(CipherBase):
             return
 
         text_type = "cipher" if operation == "decrypt" else "clear"
-        sys.stderr.write(f"Reading {text_type}-text file: {file_path} ... ")
+        log(f"Reading {text_type}-text file: {file_path} ... ")
         text = self.read_file(file_path)
-        sys.stderr.write("Done!\n")
-        sys.stderr.write(operation + "ing ... ")
+        log("Done!\n")
+        log(operation + "ing ... ")
 
         output = ""
 
@@ -289,5 +438,5 @@ class RSA(CipherBase):
             cipher_n = int(text.strip())
             output = str(self.decrypt(cipher_n))
 
-        sys.stderr.write("Done!\n")
+        log("Done!\n")
         print(output)
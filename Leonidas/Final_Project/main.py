@@ -68,7 +68,8 @@ def create_cipher(algorithm, operation):
         if algorithm == "elgamal":
             return ElGamal(min_random_number=min_prime, max_random_number=max_prime)
         else:
-            return RSA(min_prime=min_prime, max_prime=max_prime)
+            num_primes = ask_int("Number of primes in n (2-5): ")
+            return RSA(min_prime=min_prime, max_prime=max_prime, num_primes=num_primes)
     # For non-generate operations we construct ciphers from numeric
     # components directly in `main` (no file IO here).
 
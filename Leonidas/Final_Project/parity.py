@@ -0,0 +1,454 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks import README_RSA, README_ELGAMAL, SEED, range_label
+from files import instrumentation
+from files.bootstrap import Bootstrap
+from files.elgamal_cipher import ElGamal
+from files.keyring import read_int_lines
+from files.rsa_cipher import RSA
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(os.path.dirname(HERE))
+CPP_PROJECT = os.path.join(REPO_ROOT, "Alexan", "final_project")
+RUST_PROJECT = os.path.join(REPO_ROOT, "Ryan", "project")
+DRIVERS = os.path.join(HERE, "drivers")
+
+# The Rust version computes in i128, so moduli stay below 2^63 (squares
+# of residues must not overflow)
+KEY_RANGES = [(1000, 10000), (10 ** 5, 10 ** 6), (10 ** 8, 10 ** 9)]
+# Its BSGS is quadratic, so the attacks run on small keys only
+ATTACK_RANGES = [(1000, 10000), (10 ** 4, 10 ** 5)]
+COUNT = 200
+ATTACK_COUNT = 3
+BUILD_TIMEOUT = 600
+RUN_TIMEOUT = 600
+
+IMPLEMENTATIONS = ("python", "cpp", "rust")
+
+# Known answers from the C++ project: (cipher file, public key file,
+# plaintext), relative to it. Where the private key file next to the
+# public one matches, the vector is decrypted as well as attacked.
+KNOWN_ANSWERS = [
+    ("tests/test_data/ryans_cipher_rsa.txt", "keys/rsa_key.pub", 1337),
+    ("tests/test_data/leonidas_cipher_rsa2.txt", "keys/rsa_attack_leo2ryan.pub", 1234),
+    ("tests/test_data/r2l_rsa_cipher.txt", "keys/rsa_attack_ryan2leo.pub", 9878),
+    ("tests/test_data/ryans_cipher_elg.txt", "keys/elgamal_key.pub", 42),
+    ("tests/test_data/leonidas_cipher_elg.txt", "keys/elgamal_key.pub", 420),
+    ("tests/test_data/leonidas_cipher_elg2.txt", "keys/elgamal_ryan2leonidas.pub", 300),
+    ("tests/test_data/ryans_cipher_elg2.txt", "keys/elgamal_key_leonidas.pub", 617),
+]
+# A driver that dies is restarted on the batches after the one it died in
+DRIVER_RESTARTS = 3
+
+
+def build_cpp(project, build_dir):
+    """
+    Compiles the C++ sources (without their CLI main.cpp) together with
+    drivers/parity_driver.cpp. Returns (executable, None) or (None, reason).
+    """
+    compiler = shutil.which("g++") or shutil.which("clang++")
+    if compiler is None:
+        return None, "no C++ compiler found"
+    sources = [s for s in sorted(glob.glob(os.path.join(project, "src", "*.cpp")))
+               if os.path.basename(s) != "main.cpp"]
+    if not sources:
+        return None, f"no sources in {project}/src"
+
+    driver = os.path.join(DRIVERS, "parity_driver.cpp")
+    executable = os.path.join(build_dir, "cpp_parity_driver")
+    newest = max(os.path.getmtime(path) for path in sources + [driver])
+    if os.path.exists(executable) and os.path.getmtime(executable) > newest:
+        return executable, None
+
+    command = [compiler, "-O2", "-std=c++17", "-I", os.path.join(project, "src"),
+               driver, *sources, "-o", executable, "-lgmpxx", "-lgmp"]
+    result = subprocess.run(command, capture_output=True, text=True, timeout=BUILD_TIMEOUT)
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        return None, "build failed: " + (lines[-1] if lines else f"exit code {result.returncode}")
+    return executable, None
+
+
+def _find_cargo():
+    cargo = shutil.which("cargo")
+    if cargo is None:
+        candidate = os.path.join(os.path.expanduser("~"), ".cargo", "bin", "cargo")
+        cargo = candidate if os.path.exists(candidate) else None
+    return cargo
+
+
+def _cargo_section(text, name):
+    match = re.search(rf"^\[{re.escape(name)}\]\s*$(.*?)(?=^\[|\Z)", text, re.M | re.S)
+    return match.group(1).strip() if match else ""
+
+
+def build_rust(project, build_dir):
+    """
+    Builds drivers/parity_driver.rs in a scratch crate that includes the
+    project's rsa and elgamal modules by path and reuses its dependencies
+    and Cargo.lock (so cached crates build offline).
+    Returns (executable, None) or (None, reason).
+    """
+    cargo = _find_cargo()
+    if cargo is None:
+        return None, "cargo not found"
+    manifest_path = os.path.join(project, "Cargo.toml")
+    modules = {name: os.path.join(project, "src", name, "mod.rs") for name in ("rsa", "elgamal")}
+    if not os.path.exists(manifest_path) or not all(os.path.exists(m) for m in modules.values()):
+        return None, f"no rsa/elgamal modules in {project}"
+
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = f.read()
+    edition = re.search(r'^edition\s*=\s*"(\d+)"', manifest, re.M)
+    crate = os.path.join(build_dir, "rust_parity")
+    os.makedirs(os.path.join(crate, "src"), exist_ok=True)
+    with open(os.path.join(crate, "Cargo.toml"), "w", encoding="utf-8") as f:
+        f.write('[package]\nname = "parity_driver"\nversion = "0.1.0"\n'
+                f'edition = "{edition.group(1) if edition else "2021"}"\n\n'
+                f"[dependencies]\n{_cargo_section(manifest, 'dependencies')}\n")
+    lock = os.path.join(project, "Cargo.lock")
+    if os.path.exists(lock) and not os.path.exists(os.path.join(crate, "Cargo.lock")):
+        shutil.copyfile(lock, os.path.join(crate, "Cargo.lock"))
+
+    with open(os.path.join(DRIVERS, "parity_driver.rs"), "r", encoding="utf-8") as f:
+        driver = f.read()
+    header = "#![allow(dead_code)]\n"
+    for name, path in modules.items():
+        header += f"#[path = {json.dumps(path)}]\nmod {name};\n"
+    with open(os.path.join(crate, "src", "main.rs"), "w", encoding="utf-8") as f:
+        f.write(header + driver)
+
+    # Offline with the project's lock file, offline with whatever versions
+    # are cached, then online
+    result = None
+    for attempt in ("locked", "cached", "online"):
+        if attempt == "cached" and os.path.exists(os.path.join(crate, "Cargo.lock")):
+            os.remove(os.path.join(crate, "Cargo.lock"))
+        offline = [] if attempt == "online" else ["--offline"]
+        result = subprocess.run([cargo, "build", "--release", "--quiet", *offline], cwd=crate,
+                                capture_output=True, text=True, timeout=BUILD_TIMEOUT)
+        if result.returncode == 0:
+            return os.path.join(crate, "target", "release", "parity_driver"), None
+    lines = result.stderr.strip().splitlines()
+    return None, "build failed: " + (lines[-1] if lines else f"exit code {result.returncode}")
+
+
+def _elgamal_decrypt(key, c1, c2):
+    p, _, _, x = key
+    return c2 * pow(c1, p - 1 - x, p) % p
+
+
+def known_answers(cpp_project=CPP_PROJECT):
+    """
+    [(algorithm, key, ciphertext values, plaintext), ...] for the
+    KNOWN_ANSWERS files found in cpp_project; key as in make_workload.
+    """
+    vectors = []
+    for cipher_file, key_file, clear_text in KNOWN_ANSWERS:
+        cipher_path = os.path.join(cpp_project, cipher_file)
+        key_path = os.path.join(cpp_project, key_file)
+        if not (os.path.exists(cipher_path) and os.path.exists(key_path)):
+            sys.stderr.write(f"Known answer skipped, missing {cipher_file} or {key_file}\n")
+            continue
+        cipher_text = read_int_lines(cipher_path)
+        public = read_int_lines(key_path)
+        private_path = key_path[:-len(".pub")]
+        private = read_int_lines(private_path) if os.path.exists(private_path) else []
+        if len(public) == 2:
+            n, e = public
+            d = private[1] if len(private) == 2 and private[0] == n else 0
+            if d and pow(cipher_text[0], d, n) != clear_text:
+                d = 0
+            vectors.append(("rsa", [n, e, d], cipher_text[:1], clear_text))
+        else:
+            p, g, y = public
+            x = private[0] if len(private) == 1 and pow(g, private[0], p) == y else 0
+            vectors.append(("elgamal", [p, g, y, x], cipher_text[:2], clear_text))
+    return vectors
+
+
+def make_workload(key_ranges=KEY_RANGES, attack_ranges=ATTACK_RANGES, count=COUNT,
+                  attack_count=ATTACK_COUNT, cpp_project=CPP_PROJECT):
+    """
+    Batches of one operation under one key, the same for every
+    implementation: {"op", "size", "key", "args", "expected"}. Keys come
+    from the Python key generation (seeded), expected values from plain
+    pow; ElGamal encryption is randomized and checked by decrypting.
+    Keys are RSA [n, e, d] / ElGamal [p, g, y, x] (d / x = 0 if unknown).
+    The README vectors and the C++ project's test data (KNOWN_ANSWERS)
+    are added as known-answer batches.
+    """
+    rng = random.Random(SEED)
+    batches = []
+
+    def rsa_key(low, high):
+        cipher = RSA(n=1, e=1, d=1)
+        cipher.generate_keys(low, high, bootstrap=Bootstrap(rng.randrange(1 << 32)))
+        return [cipher.n, cipher.e, cipher.d]
+
+    def elgamal_key(low, high):
+        cipher = ElGamal(p=1)
+        cipher.generate_keys(low, high, bootstrap=Bootstrap(rng.randrange(1 << 32)))
+        return [cipher.p, cipher.g, cipher.public_key, cipher.private_key]
+
+    def elgamal_pairs(key, messages):
+        p, g, y, _ = key
+        pairs = []
+        for m in messages:
+            k = rng.randrange(2, p - 1)
+            pairs.append([pow(g, k, p), m * pow(y, k, p) % p])
+        return pairs
+
+    def add(op, size, key, args, expected):
+        batches.append({"op": op, "size": size, "key": key, "args": args, "expected": expected})
+
+    for low, high in key_ranges:
+        size = range_label(low, high)
+        key = rsa_key(low, high)
+        n, e, _ = key
+        messages = [rng.randrange(1, n) for _ in range(count)]
+        ciphertexts = [pow(m, e, n) for m in messages]
+        add("rsa_encrypt", size, key, [[m] for m in messages], [[c] for c in ciphertexts])
+        add("rsa_decrypt", size, key, [[c] for c in ciphertexts], [[m] for m in messages])
+
+        key = elgamal_key(low, high)
+        messages = [rng.randrange(1, key[0]) for _ in range(count)]
+        add("elgamal_encrypt", size, key, [[m] for m in messages], None)
+        add("elgamal_decrypt", size, key, elgamal_pairs(key, messages), [[m] for m in messages])
+
+    for low, high in attack_ranges:
+        size = range_label(low, high)
+        key = rsa_key(low, high)
+        n, e, _ = key
+        messages = [rng.randrange(1, n) for _ in range(attack_count)]
+        add("rsa_attack", size, [n, e, 0], [[pow(m, e, n)] for m in messages], [[m] for m in messages])
+
+        key = elgamal_key(low, high)
+        messages = [rng.randrange(1, key[0]) for _ in range(attack_count)]
+        add("elgamal_attack", size, key[:3] + [0], elgamal_pairs(key, messages), [[m] for m in messages])
+
+    # Known answers from the README
+    for n, e, c, m in README_RSA:
+        add("rsa_attack", f"readme {n}", [n, e, 0], [[c]], [[m]])
+    for p, g, y, (c1, c2), m in README_ELGAMAL:
+        add("elgamal_attack", f"readme {p} {c1}", [p, g, y, 0], [[c1, c2]], [[m]])
+
+    # Known answers from the C++ project's test data
+    for algorithm, key, cipher_text, m in known_answers(cpp_project):
+        size = f"kat {key[0]} {cipher_text[0]}"
+        public = key[:-1] + [0]
+        add(f"{algorithm}_attack", size, public, [cipher_text], [[m]])
+        if key[-1]:
+            add(f"{algorithm}_decrypt", size, key, [cipher_text], [[m]])
+    return batches
+
+
+def run_python(batches):
+    """
+    The Python side of the driver protocol, in process: one cipher per
+    batch, each operation timed on its own. Returns per batch a list of
+    (result values, nanoseconds).
+    """
+    outputs = []
+    with instrumentation.quiet():
+        for batch in batches:
+            op, key = batch["op"], batch["key"]
+            if op.startswith("rsa_"):
+                cipher = RSA(n=key[0], e=key[1], d=key[2])
+            else:
+                cipher = ElGamal(p=key[0], g=key[1], public_key=key[2], private_key=key[3])
+            operations = {
+                "rsa_encrypt": lambda a: [cipher.encrypt(a[0])],
+                "rsa_decrypt": lambda a: [cipher.decrypt(a[0])],
+                "rsa_attack": lambda a: [cipher.attack_from_components(a[0], key[0], key[1])],
+                "elgamal_encrypt": lambda a: list(cipher.encrypt(a[0])),
+                "elgamal_decrypt": lambda a: [cipher.decrypt(tuple(a))],
+                "elgamal_attack": lambda a: [cipher.attack_from_values(a[0], a[1])],
+            }
+            operation = operations[op]
+            results = []
+            for args in batch["args"]:
+                start = time.perf_counter_ns()
+                values = operation(args)
+                results.append(([int(v) for v in values], time.perf_counter_ns() - start))
+            outputs.append(results)
+    return outputs
+
+
+def run_driver(command, batches, timeout=RUN_TIMEOUT):
+    """
+    Feeds all batches to a driver process (see drivers/) and splits its
+    "= values... ns" lines back into batches at the "=end <batch>"
+    marker the driver prints after each one. A driver that dies is
+    restarted on the batches after the one it died in (at most
+    DRIVER_RESTARTS times); batches it did not finish keep the answers
+    it gave.
+    """
+    outputs = [[] for _ in batches]
+    start = 0
+    for attempt in range(DRIVER_RESTARTS + 1):
+        lines = []
+        for batch in batches[start:]:
+            key = " ".join(str(v) for v in batch["key"])
+            lines.append(f"{batch['op']} {len(batch['args'])} {key}")
+            lines.extend(" ".join(str(v) for v in args) for args in batch["args"])
+        result = subprocess.run(command, input="\n".join(lines) + "\n", capture_output=True,
+                                text=True, timeout=timeout)
+
+        current = start
+        for line in result.stdout.splitlines():
+            if line.startswith("=end "):
+                current = start + int(line.split()[1]) + 1
+            elif line.startswith("= ") and current < len(batches):
+                words = line.split()[1:]
+                outputs[current].append(([int(w) for w in words[:-1]], int(words[-1])))
+
+        if result.returncode == 0 or current >= len(batches):
+            break
+        sys.stderr.write(f"{os.path.basename(command[0])} exited with {result.returncode} "
+                         f"in batch {current}\n")
+        # Skip the batch it died in
+        start = current + 1
+        if start >= len(batches):
+            break
+    return outputs
+
+
+def check(batch, results):
+    """
+    Number of results that match the expected values.
+    """
+    ok = 0
+    for index, (values, _) in enumerate(results):
+        if batch["expected"] is not None:
+            ok += values == batch["expected"][index]
+        elif len(values) == 2:
+            ok += _elgamal_decrypt(batch["key"], *values) == batch["args"][index][0]
+    return ok
+
+
+def summarize(times):
+    if not times:
+        return {"ops_per_second": None, "p50_us": None, "p99_us": None}
+    times = sorted(times)
+    return {
+        "ops_per_second": len(times) / (sum(times) / 1e9) if sum(times) else None,
+        "p50_us": times[len(times) // 2] / 1e3,
+        "p99_us": times[min(len(times) - 1, int(len(times) * 0.99))] / 1e3,
+    }
+
+
+def run_parity(implementations=IMPLEMENTATIONS, cpp_project=CPP_PROJECT, rust_project=RUST_PROJECT,
+               build_dir=None, quick=False):
+    """
+    Builds the drivers, runs the workload on every implementation that
+    could be built and returns the report dict.
+    """
+    key_ranges = KEY_RANGES[:2] if quick else KEY_RANGES
+    attack_ranges = ATTACK_RANGES[:1] if quick else ATTACK_RANGES
+    with instrumentation.quiet():
+        batches = make_workload(key_ranges, attack_ranges, COUNT // 4 if quick else COUNT,
+                                cpp_project=cpp_project)
+
+    build_dir = build_dir or os.path.join(tempfile.gettempdir(), "crypto-parity")
+    os.makedirs(build_dir, exist_ok=True)
+    skipped = {}
+    outputs = {}
+    for name in implementations:
+        if name == "python":
+            outputs[name] = run_python(batches)
+            continue
+        if name == "cpp":
+            executable, reason = build_cpp(cpp_project, build_dir)
+        else:
+            executable, reason = build_rust(rust_project, build_dir)
+        if executable is None:
+            skipped[name] = reason
+            sys.stderr.write(f"Skipping {name}: {reason}\n")
+            continue
+        work_dir = tempfile.mkdtemp(prefix=f"parity-{name}-", dir=build_dir)
+        try:
+            outputs[name] = run_driver([executable, work_dir], batches)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    rows = []
+    for index, batch in enumerate(batches):
+        row = {"op": batch["op"], "size": batch["size"], "count": len(batch["args"])}
+        for name, results in outputs.items():
+            entry = summarize([ns for _, ns in results[index]])
+            entry["ok"] = check(batch, results[index])
+            entry["answered"] = len(results[index])
+            row[name] = entry
+        rows.append(row)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": SEED,
+            "quick": quick,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "skipped": skipped,
+        },
+        "rows": rows,
+    }
+
+
+def print_report(report, out=sys.stdout):
+    rows = report["rows"]
+    names = [n for n in IMPLEMENTATIONS if rows and n in rows[0]]
+    header = f"{'operation':<16} {'size':<18}" + "".join(f" {n + ' ops/s':>14} {'p50 us':>10}" for n in names)
+    out.write(header + "  parity\n")
+    out.write("-" * (len(header) + 8) + "\n")
+    failures = 0
+    for row in rows:
+        line = f"{row['op']:<16} {row['size']:<18}"
+        bad = []
+        for name in names:
+            entry = row[name]
+            rate = f"{entry['ops_per_second']:.0f}" if entry["ops_per_second"] else "-"
+            p50 = f"{entry['p50_us']:.2f}" if entry["p50_us"] is not None else "-"
+            line += f" {rate:>14} {p50:>10}"
+            if entry["ok"] != row["count"]:
+                bad.append(f"{name} {entry['ok']}/{row['count']}")
+        failures += bool(bad)
+        out.write(line + "  " + (", ".join(bad) if bad else "ok") + "\n")
+    for name, reason in report["meta"]["skipped"].items():
+        out.write(f"{name}: skipped ({reason})\n")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Checks that the Python, C++ and Rust implementations agree and compares their speed.")
+    parser.add_argument("--only", action="append", choices=IMPLEMENTATIONS,
+                        help="Implementation to run (repeatable, default: all)")
+    parser.add_argument("--cpp-project", default=CPP_PROJECT)
+    parser.add_argument("--rust-project", default=RUST_PROJECT)
+    parser.add_argument("--build-dir", help="Where the drivers are built (default: a temp dir)")
+    parser.add_argument("--quick", action="store_true", help="Fewer sizes and operations")
+    parser.add_argument("--json", "-o", help="Also write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    report = run_parity(args.only or IMPLEMENTATIONS, args.cpp_project, args.rust_project,
+                        args.build_dir, args.quick)
+    failures = print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(json.dumps(report, indent=2, sort_keys=True) + "\n")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+import argparse
+import asyncio
+from files.crypto_service import CryptoService, DEFAULT_HOST, DEFAULT_PORT
+from files.key_inventory import KeyInventory, DEFAULT_STOCK
+
+
+def parse_stock(text):
+    """
+    "algorithm:min_prime:max_prime[:num_primes]" -> add_target arguments.
+    """
+    parts = text.split(":")
+    if len(parts) not in (3, 4):
+        raise argparse.ArgumentTypeError(f"Expected algorithm:min:max[:num_primes], got {text}")
+    return [parts[0]] + [int(x) for x in parts[1:]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSA / ElGamal crypto service (line-delimited JSON).")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", default=None, help="Listen on a Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    parser.add_argument("--stock", type=parse_stock, action="append", default=[],
+                        help="Keep pre-generated keys ready, e.g. rsa:1000:10000 (repeatable)")
+    parser.add_argument("--stock-size", type=int, default=DEFAULT_STOCK)
+    args = parser.parse_args()
+
+    inventory = None
+    if args.stock:
+        inventory = KeyInventory(workers=args.workers)
+        for target in args.stock:
+            inventory.add_target(*target, stock=args.stock_size)
+
+    service = CryptoService(workers=args.workers, inventory=inventory)
+    try:
+        asyncio.run(service.serve_forever(host=args.host, port=args.port, unix_path=args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if inventory is not None:
+            inventory.close()
+
+
+if __name__ == "__main__":
+    main()
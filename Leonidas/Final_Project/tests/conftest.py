@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The modules live in the files/ package next to this directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from files import instrumentation
+
+instrumentation.QUIET = True
@@ -0,0 +1,46 @@
+import pytest
+
+from files.crypto_utils import mod_pow, mod_pow_batch, load_numpy
+from files.rsa_cipher import RSA
+
+# (primes, e): n below 2^32 takes the vectorized kernel, above it mod_pow
+KEYS = [([61, 53], 17), ([65521, 65537], 65537), ([1000003, 1000033], 65537)]
+
+
+def _key(primes, e):
+    n = primes[0] * primes[1]
+    d = pow(e, -1, (primes[0] - 1) * (primes[1] - 1))
+    return RSA(n=n, e=e, d=d)
+
+
+def _values(n):
+    return [0, 1, 2, n - 2, n - 1, n // 3, 12345 % n]
+
+
+@pytest.mark.parametrize("mod", [7, 3233, 2 ** 32 - 5, 2 ** 32 + 15])
+@pytest.mark.parametrize("exp", [0, 1, 2, 65537])
+def test_mod_pow_batch_matches_mod_pow(mod, exp):
+    bases = [-mod - 1, -1, 0, 1, 5, mod - 1, mod, 3 * mod + 2]
+    assert mod_pow_batch(bases, exp, mod) == [mod_pow(b, exp, mod) for b in bases]
+
+
+def test_mod_pow_batch_arrays():
+    np = load_numpy()
+    if np is None:
+        pytest.skip("NumPy is not installed")
+    expected = [mod_pow(b, 3, 7) for b in (-1, 5, 0, 6)]
+    for dtype in (np.int64, np.int32, object):
+        result = mod_pow_batch(np.array([-1, 5, 0, 6], dtype=dtype), 3, 7)
+        assert isinstance(result, np.ndarray)
+        assert result.tolist() == expected
+    assert mod_pow_batch(np.array([6, 2], dtype=np.uint64), 3, 7).tolist() == [6, 1]
+
+
+@pytest.mark.parametrize("primes,e", KEYS)
+def test_encrypt_decrypt_batch_match_scalar(primes, e):
+    rsa = _key(primes, e)
+    clear_texts = _values(rsa.n)
+    cipher_texts = rsa.encrypt_batch(clear_texts)
+    assert cipher_texts == [rsa.encrypt(m) for m in clear_texts]
+    assert rsa.decrypt_batch(cipher_texts) == [rsa.decrypt(c) for c in cipher_texts]
+    assert rsa.decrypt_batch(cipher_texts) == clear_texts
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from files.attack_planner import Budget, BudgetExceeded
+from files.checkpoint import Checkpoint
+from files.elgamal_cipher import ElGamal
+
+# m = isqrt(P - 1) + 1 = 1183216: the table holds m + 1 entries
+P, G, X = 1400000000363, 2, 987654321
+Y = pow(G, X, P)
+PROBLEM = (G, Y, P, P - 1)
+
+
+def _interrupted(tmp_path, iterations):
+    # Saved when the budget runs out, well before the default interval
+    checkpoint = Checkpoint(str(tmp_path))
+    cipher = ElGamal(p=P, g=G, public_key=Y)
+    with pytest.raises(BudgetExceeded):
+        cipher.baby_step_giant_step(G, Y, P, Budget(max_iterations=iterations), checkpoint=checkpoint)
+    return cipher, checkpoint
+
+
+# Stopped while building the table / during the giant steps
+@pytest.mark.parametrize("iterations", [300000, 1500000])
+def test_bsgs_resumes_from_checkpoint(tmp_path, iterations):
+    cipher, checkpoint = _interrupted(tmp_path, iterations)
+    state = checkpoint.load("bsgs", PROBLEM)
+    assert state["j"] > 0 and state["table_bytes"] > 0
+    assert (state["i"] > 0) == (iterations > 1183217)
+
+    resumed = Checkpoint(str(tmp_path))
+    assert cipher.baby_step_giant_step(G, Y, P, checkpoint=resumed) == X
+    assert resumed.load("bsgs", PROBLEM) is None
+    assert not os.path.exists(resumed.table_path("bsgs", PROBLEM))
+
+
+def test_bsgs_starts_over_without_table_file(tmp_path):
+    cipher, checkpoint = _interrupted(tmp_path, 300000)
+    os.remove(checkpoint.table_path("bsgs", PROBLEM))
+
+    resumed = Checkpoint(str(tmp_path))
+    assert cipher.baby_step_giant_step(G, Y, P, checkpoint=resumed) == X
+    assert resumed.load("bsgs", PROBLEM) is None
+    assert os.listdir(str(tmp_path)) == []
@@ -0,0 +1,39 @@
+import json
+
+import cli
+from files.rsa_cipher import RSA
+
+
+def _run_jobs(tmp_path, capsys, jobs):
+    job_file = tmp_path / "jobs.jsonl"
+    job_file.write_text("".join(json.dumps(job) + "\n" for job in jobs))
+    cli.main(["jobs", str(job_file), "--workers", "1"])
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_jobs_file_with_generate(tmp_path, capsys):
+    jobs = [
+        {"id": "rsa-key", "algorithm": "rsa", "op": "generate", "min_prime": 1000, "max_prime": 5000},
+        {"id": "elgamal-key", "algorithm": "elgamal", "op": "generate", "min_prime": 1000, "max_prime": 5000},
+        {"id": "enc", "algorithm": "rsa", "op": "encrypt", "key": {"n": 3233, "e": 17}, "value": 65},
+        {"id": "bad", "algorithm": "rsa", "op": "sign", "key": {"n": 3233, "e": 17}, "value": 65},
+    ]
+    records = _run_jobs(tmp_path, capsys, jobs)
+    assert [r["id"] for r in records] == ["rsa-key", "elgamal-key", "enc", "bad"]
+
+    rsa_key = records[0]["result"]
+    assert len(rsa_key["primes"]) == 2
+    assert rsa_key["primes"][0] * rsa_key["primes"][1] == rsa_key["n"]
+    rsa = RSA(n=rsa_key["n"], e=rsa_key["e"], d=rsa_key["d"])
+    assert rsa.decrypt(rsa.encrypt(42)) == 42
+
+    elgamal_key = records[1]["result"]
+    assert pow(elgamal_key["g"], elgamal_key["private_key"], elgamal_key["p"]) == elgamal_key["public_key"]
+
+    assert records[2]["result"] == 2790
+    assert "Unknown operation" in records[3]["error"]
+
+
+def test_generate_job_errors_are_reported(tmp_path, capsys):
+    records = _run_jobs(tmp_path, capsys, [{"id": 1, "algorithm": "dsa", "op": "generate"}])
+    assert records == [{"id": 1, "line": 1, "error": "Unknown algorithm: dsa"}]
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from files.index_calculus import IndexCalculus, index_calculus_log
+
+# Safe prime p = 2q + 1 (q prime), so the logs are solved modulo q
+P = 1400000000363
+G = 2
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    return str(tmp_path_factory.mktemp("index_calculus"))
+
+
+@pytest.fixture(scope="module")
+def engine(store):
+    return IndexCalculus(P, G, workers=1, store_dir=store).precompute()
+
+
+def test_logs_round_trip(engine):
+    assert engine.large_primes == [(P - 1) // 2]
+    rng = random.Random(1)
+    for x in [1, 2, P - 2] + [rng.randrange(1, P - 1) for _ in range(5)]:
+        assert engine.log(pow(G, x, P)) == x
+
+
+def test_reload_from_store(engine, store):
+    reloaded = IndexCalculus(P, G, workers=1, store_dir=store)
+    assert reloaded.load()
+    assert reloaded.logs == engine.logs
+    assert reloaded.log(pow(G, 123456789, P)) == 123456789
+
+
+def test_zero_has_no_log(engine):
+    with pytest.raises(RuntimeError):
+        engine.log(0)
+    with pytest.raises(RuntimeError):
+        index_calculus_log(G, P, P, workers=1)
+
+
+def test_unknown_logs_stop_the_search(store):
+    partial = IndexCalculus(P, G, workers=1, store_dir=store).precompute()
+    partial.logs = {0: partial.logs[0]}
+    with pytest.raises(RuntimeError):
+        partial.log(pow(G, 987654321, P))
+
+
+def test_factoring_order_spends_budget():
+    from files.attack_planner import Budget, BudgetExceeded
+
+    # p - 1 = 2 * 1000159 * 1000000007: the cofactor is split by rho
+    p = 2000318014002227
+    engine = IndexCalculus(p, 2, workers=1)
+    with pytest.raises(BudgetExceeded):
+        engine.precompute(Budget(max_iterations=100))
+    assert engine.modulus is None
@@ -0,0 +1,50 @@
+from files.key_cache import KeyCache
+
+P, G, X = 1400000000363, 2, 123456789
+
+
+def _write_keys(tmp_path):
+    public_file = tmp_path / "elgamal.pub"
+    private_file = tmp_path / "elgamal.priv"
+    public_file.write_text(f"{P}\n{G}\n{pow(G, X, P)}\n")
+    private_file.write_text(f"{X}\n")
+    return str(public_file), str(private_file)
+
+
+def test_elgamal_tables_are_built_on_first_encrypt(tmp_path):
+    public_file, private_file = _write_keys(tmp_path)
+    cache = KeyCache()
+    key = cache.get_elgamal(public_file, private_file)
+    assert key.base_tables == {}
+    loaded_bytes = cache.stats()["bytes"]
+
+    cipher = key.cipher()
+    pair = cipher.encrypt(4242)
+    assert len(key.base_tables) == 2
+    assert cipher.decrypt(pair) == 4242
+
+    # Counted on the next access, and only once
+    assert cache.get_elgamal(public_file, private_file) is key
+    grown_bytes = cache.stats()["bytes"]
+    assert grown_bytes > loaded_bytes
+    key.cipher().encrypt(17)
+    cache.get_elgamal(public_file, private_file)
+    assert cache.stats()["bytes"] == grown_bytes
+    assert len(key.base_tables) == 2
+
+
+def test_table_bytes_count_against_max_bytes(tmp_path):
+    public_file, private_file = _write_keys(tmp_path)
+    other_public, other_private = tmp_path / "other.pub", tmp_path / "other.priv"
+    other_public.write_text(f"{P}\n{G}\n{pow(G, 7, P)}\n")
+    other_private.write_text("7\n")
+
+    cache = KeyCache(max_bytes=None)
+    key = cache.get_elgamal(public_file, private_file)
+    cache.get_elgamal(str(other_public), str(other_private))
+    key.cipher().encrypt(4242)
+    cache.max_bytes = cache.stats()["bytes"] + 1
+    # The older entry grows past max_bytes and evicts the other one
+    cache.get_elgamal(public_file, private_file)
+    assert len(cache) == 1
+    assert cache.stats()["evictions"] == 1
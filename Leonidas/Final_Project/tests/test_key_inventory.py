@@ -0,0 +1,20 @@
+import pytest
+
+from files.key_inventory import KeyInventory
+
+# ElGamal keys with p in {101, 103, 107, 109}: the generator is fixed per
+# p, so there are sum(p - 3) distinct public keys
+MIN_PRIME, MAX_PRIME = 100, 110
+KEY_SPACE = sum(p - 3 for p in (101, 103, 107, 109))
+
+
+def test_exhausted_range_never_repeats_a_key():
+    keys = []
+    with KeyInventory(workers=1) as inventory:
+        with pytest.raises(RuntimeError, match="duplicate keys"):
+            while len(keys) <= KEY_SPACE:
+                cipher = inventory.take("elgamal", MIN_PRIME, MAX_PRIME, timeout=60)
+                keys.append((cipher.p, cipher.g, cipher.public_key))
+        assert inventory.stats()["seen"] >= len(keys)
+    assert keys
+    assert len(set(keys)) == len(keys)
@@ -0,0 +1,55 @@
+import pytest
+
+from files.elgamal_cipher import ElGamal
+from files.multi_recipient import MultiRecipientEncryptor
+from files.rsa_cipher import RSA
+
+# (primes, e) and (p, g, private key)
+RSA_KEYS = [([61, 53], 17), ([65521, 65537], 65537), ([1000003, 1000033], 65537)]
+ELGAMAL_KEYS = [(787, 2, 467), (9871, 3, 9214), (1400000000363, 2, 123456789)]
+
+
+def _recipients():
+    ciphers = {}
+    for primes, e in RSA_KEYS:
+        n = primes[0] * primes[1]
+        d = pow(e, -1, (primes[0] - 1) * (primes[1] - 1))
+        ciphers[f"rsa-{n}"] = ("rsa", RSA(n=n, e=e, d=d), (n, e))
+    for p, g, x in ELGAMAL_KEYS:
+        cipher = ElGamal(p=p, g=g, public_key=pow(g, x, p), private_key=x)
+        ciphers[f"elgamal-{p}"] = ("elgamal", cipher, (p, g, cipher.public_key))
+    return ciphers
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_round_trip(workers):
+    ciphers = _recipients()
+    recipients = [(rid, algorithm, components) for rid, (algorithm, _, components) in ciphers.items()]
+    messages = list(range(1, 700))
+    with MultiRecipientEncryptor(recipients, workers=workers, tile_messages=64,
+                                 tile_recipients=2) as encryptor:
+        result = encryptor.encrypt(messages)
+
+    assert list(result) == list(ciphers)
+    for rid, ciphertexts in result.items():
+        _, cipher, _ = ciphers[rid]
+        assert len(ciphertexts) == len(messages)
+        assert [cipher.decrypt(tuple(c) if isinstance(c, list) else c) for c in ciphertexts] == messages
+
+
+def test_stream_offsets():
+    recipients = [("a", "rsa", (3233, 17)), ("b", "elgamal", (787, 2, 255))]
+    with MultiRecipientEncryptor(recipients, workers=1, tile_messages=10) as encryptor:
+        chunks = list(encryptor.encrypt_stream(range(1, 26)))
+    assert [(rid, offset, len(c)) for rid, offset, c in chunks] == [
+        ("a", 0, 10), ("b", 0, 10), ("a", 10, 10), ("b", 10, 10), ("a", 20, 5), ("b", 20, 5)]
+
+
+def test_rejects_bad_input():
+    with pytest.raises(ValueError):
+        MultiRecipientEncryptor([], workers=1)
+    with pytest.raises(ValueError):
+        MultiRecipientEncryptor([("a", "rsa", (3233, 17)), ("a", "rsa", (3233, 17))], workers=1)
+    with MultiRecipientEncryptor([("a", "rsa", (3233, 17))], workers=1) as encryptor:
+        with pytest.raises(ValueError):
+            encryptor.encrypt([3233])
@@ -0,0 +1,74 @@
+import pytest
+
+from files.bootstrap import Bootstrap
+from files.rsa_cipher import RSA
+
+# README vectors: (n, e, ciphertext, plaintext)
+README_RSA = [
+    (12697493, 5664221, 4803848, 777),
+    (25931089, 16691407, 7510948, 1234),
+]
+
+
+@pytest.mark.parametrize("n,e,cipher_text,clear_text", README_RSA)
+def test_attack_from_value(tmp_path, n, e, cipher_text, clear_text):
+    key_file = tmp_path / "target_rsa_key.pub"
+    key_file.write_text(f"{n}\n{e}\n")
+    attacker = RSA(n=1, e=1, d=1)
+    assert attacker.attack_from_value(cipher_text, str(key_file)) == clear_text
+    assert attacker.attack_from_value(cipher_text, str(key_file), bootstrap=Bootstrap(1)) == clear_text
+
+
+@pytest.mark.parametrize("n,e,cipher_text,clear_text", README_RSA)
+def test_attack_from_components(n, e, cipher_text, clear_text):
+    attacker = RSA(n=1, e=1, d=1)
+    assert attacker.attack_from_components(cipher_text, n, e, bootstrap=Bootstrap(1)) == clear_text
+
+
+# 3- and 4-prime keys; d from phi(n), e = 65537 is coprime to every r - 1
+MULTI_PRIMES = [
+    [1009, 1013, 1019],
+    [1000003, 1000033, 1000037],
+    [1009, 1013, 1019, 1021],
+    [65521, 65539, 1000003, 1000033],
+]
+
+
+def _multi_prime_key(primes, e=65537):
+    n = 1
+    phi = 1
+    for r in primes:
+        n *= r
+        phi *= r - 1
+    return RSA(n=n, e=e, d=pow(e, -1, phi), primes=primes)
+
+
+@pytest.mark.parametrize("primes", MULTI_PRIMES)
+def test_multi_prime_round_trip(primes):
+    rsa = _multi_prime_key(primes)
+    assert len(rsa.crt_params) == len(primes)
+    for m in [0, 1, 2, 12345, rsa.n // 3, rsa.n - 1] + primes:
+        assert rsa.decrypt(rsa.encrypt(m)) == m
+
+
+@pytest.mark.parametrize("primes", MULTI_PRIMES)
+def test_garner_decrypt_matches_pow(primes):
+    rsa = _multi_prime_key(primes)
+    for c in [0, 1, 7, primes[-1], rsa.n // 5, rsa.n - 2]:
+        assert rsa.decrypt(c) == pow(c, rsa.d, rsa.n)
+
+
+@pytest.mark.parametrize("num_primes", [3, 4])
+def test_generated_multi_prime_keys(num_primes):
+    rsa = RSA(n=1, e=1, d=1)
+    rsa.generate_keys(1000, 5000, num_primes, bootstrap=Bootstrap(num_primes))
+    assert len(set(rsa.primes)) == num_primes
+    assert rsa.decrypt(rsa.encrypt(4242)) == 4242
+    assert rsa.decrypt(999) == pow(999, rsa.d, rsa.n)
+
+
+def test_primes_must_multiply_to_n():
+    with pytest.raises(ValueError):
+        RSA(n=1009 * 1013 * 1019, e=65537, d=1, primes=[1009, 1013, 1021])
+    with pytest.raises(ValueError):
+        RSA(n=1009 * 1013 * 1019, e=65537, d=1, primes=[1009, 1013])